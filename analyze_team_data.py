@@ -3,11 +3,20 @@
 Analyze team data to verify:
 1. Is Team A data inflated with TFOS?
 2. Calculate correct efficiency based on person-hours
+
+The analysis runs on pandas/NumPy arrays: completed_by is exploded to one
+row per initial once, and each table is an aggregation over integer codes
+(bincount / groupby). team_frames() returns the tables as DataFrames for
+other tools to reuse.
 """
 
-from supabase import create_client
-from collections import defaultdict
-from datetime import datetime
+import sys
+
+import numpy as np
+import pandas as pd
+from supabase_metrics import create_client
+from table_scan import scan_parallel
+from team_mapping import INITIAL_TO_TEAM as CURRENT_MAPPING, display_team
 
 # Supabase configuration
 SUPABASE_URL = "https://fsubmqjevlfpcirgsbhi.supabase.co"
@@ -15,200 +24,359 @@ SUPABASE_KEY = "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJpc3MiOiJzdXBhYmFzZSIsInJ
 
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-# Team mapping
-INITIAL_TO_TEAM = {
-    # Team A
-    "AS": "Team A", "JT": "Team A", "CB": "Team A", "JD": "Team A",
-    "KM": "Team A", "CP": "Team A", "KA": "Team A",
-    # Team B
-    "LN": "Team B", "NA": "Team B", "PS": "Team B", "AOO": "Team B",
-    "JN": "Team B", "DK": "Team B", "DH": "Team B", "JL": "Team B",
-    # Team C
-    "SC": "Team C", "MA": "Team C", "CC": "Team C", "OM": "Team C",
-    "AL": "Team C", "VN": "Team C", "RN": "Team C", "LVN": "Team C",
-    # Team D (Night Shift)
-    "SA": "Team D", "MR": "Team D", "AR": "Team D", "DB": "Team D",
-    "GT": "Team D", "UQ": "Team D", "BP": "Team D", "RB": "Team D",
-    # TFOS - separate
-    "TFOS": "TFOS",
-}
+# Key ranges of task_completions fetched concurrently
+FETCH_WORKERS = 4
+
+# Team mapping (team_membership.json), with Night Shift reported as Team D
+INITIAL_TO_TEAM = {initial: display_team(team) for initial, team in CURRENT_MAPPING.items()}
+
+COMPLETION_COLUMNS = 'id, status, completed_by, completed_at, total_minutes, team_id, teams(name)'
+
+
+def load_completions(client=None, where=None, extra_columns=()):
+    """
+    Stream task_completions into a DataFrame with columns
+    status, completed_by, completed_at, day, total_minutes, db_team, plus
+    any extra_columns. `where` is passed to scan_parallel() as a filter.
+
+    status, completed_by (as tuples), day (date part of completed_at) and
+    db_team are factorized once here into Categoricals, so the report
+    aggregates their integer codes instead of hashing strings again.
+    """
+    client = client or supabase
+    select = ', '.join([COMPLETION_COLUMNS, *extra_columns])
+    columns = {'status': [], 'completed_by': [], 'completed_at': [],
+               'total_minutes': [], 'db_team': []}
+    for name in extra_columns:
+        columns[name] = []
+    for c in scan_parallel(client, 'task_completions', select, where=where,
+                           workers=FETCH_WORKERS, progress_every=10000):
+        columns['status'].append(c.get('status'))
+        completed_by = c.get('completed_by')
+        # Tuples rather than lists so the column can be factorized
+        columns['completed_by'].append(tuple(completed_by) if isinstance(completed_by, list) else completed_by)
+        columns['completed_at'].append(c.get('completed_at'))
+        columns['total_minutes'].append(c.get('total_minutes'))
+        columns['db_team'].append(c['teams'].get('name') if c.get('teams') else None)
+        for name in extra_columns:
+            columns[name].append(c.get(name))
+
+    df = pd.DataFrame({name: values for name, values in columns.items() if name != 'completed_by'})
+    df.insert(1, 'completed_by', categorical(columns['completed_by']))
+    df.insert(3, 'day', day_categorical(df['completed_at']))
+    df['status'] = categorical(df['status'])
+    df['db_team'] = categorical(df['db_team'])
+    df['total_minutes'] = pd.to_numeric(df['total_minutes'], errors='coerce').fillna(0)
+    return df
+
+
+def categorical(values):
+    """Factorize values (None -> missing) into a Categorical"""
+    codes, uniques = pd.factorize(pd.Index(values, dtype=object, tupleize_cols=False))
+    return pd.Categorical.from_codes(codes, categories=pd.Index(uniques, dtype=object, tupleize_cols=False))
+
+
+def day_categorical(completed_at):
+    """Date part of each completed_at (before 'T') as a Categorical"""
+    at_codes, at_uniques = pd.factorize(completed_at)
+    day_codes, days = pd.factorize(pd.Index([str(v).partition('T')[0] for v in at_uniques], dtype=object))
+    return pd.Categorical.from_codes(np.append(day_codes, -1)[at_codes], categories=days)
+
+
+def parse_initials(completed_by):
+    """Initials from a completed_by array or comma-separated string"""
+    if isinstance(completed_by, str):
+        return [s.strip().upper() for s in completed_by.split(',') if s.strip()]
+    return [str(i).strip().upper() for i in completed_by]
+
+
+def codes_of(column):
+    """(integer codes, uniques) of a column; free for a Categorical"""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy(), column.cat.categories
+    return pd.factorize(column)
+
+
+def explode_initials(df):
+    """
+    One row per (completion, initial), with the completion's minutes split
+    evenly between its initials.
+
+    Each distinct completed_by value is parsed once; rows are then expanded
+    with NumPy index arithmetic instead of per-row Python. Columns: row
+    (position in df), initial, team, completed, minutes, day (integer code
+    of the completed_at date, -1 if missing).
+
+    Categorical completed_by and day columns (load_completions()) are used
+    through their codes; other frames are factorized here.
+    """
+    try:
+        codes, uniques = codes_of(df['completed_by'])
+    except TypeError:
+        # Lists aren't hashable; tuples factorize like strings
+        codes, uniques = pd.factorize(df['completed_by'].map(
+            lambda v: tuple(v) if isinstance(v, list) else v))
+    parsed = [parse_initials(v) for v in uniques]
+
+    # Flattened initials of every distinct value; missing values (code -1)
+    # index the trailing zero count
+    counts = np.array([len(p) for p in parsed] + [0])
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    flat_codes, initial_names = pd.factorize(pd.Index([i for p in parsed for i in p], dtype=object))
+    flat_codes = np.append(flat_codes, -1)
+
+    row_counts = counts[codes]
+    rows = np.repeat(np.arange(len(df)), row_counts)
+    first = np.repeat(np.cumsum(row_counts) - row_counts, row_counts)
+    initial_codes = flat_codes[offsets[codes[rows]] + np.arange(len(rows)) - first]
+
+    if 'day' in df:
+        day = df['day'].cat.codes.to_numpy()
+    else:
+        day = day_categorical(df['completed_at']).codes
+
+    team_codes, team_names = pd.factorize(pd.Index(
+        [INITIAL_TO_TEAM.get(i, 'Unknown') for i in initial_names], dtype=object))
+    return pd.DataFrame({
+        'row': rows,
+        'initial': pd.Categorical.from_codes(initial_codes, categories=initial_names),
+        'team': pd.Categorical.from_codes(team_codes[initial_codes], categories=team_names),
+        'completed': (df['status'] == 'completed').to_numpy()[rows],
+        'minutes': df['total_minutes'].to_numpy(dtype=float)[rows] / row_counts[rows],
+        'day': day[rows],
+    })
+
+
+def efficiency_pct(minutes, days):
+    """Task hours / (8 hours x days worked), as a rounded percentage (0 if no days)"""
+    days = np.asarray(days, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = np.where(days > 0, (np.asarray(minutes) / 60) / (8 * days) * 100, 0)
+    return np.round(pct, 1)
+
+
+def team_frames(df):
+    """
+    Compute every table of the report from a load_completions() frame.
+
+    Returns a dict of DataFrames:
+      db_teams    - by database team: completed, total, minutes, hours
+      initials    - by initial, most tasks first: team, count, minutes,
+                    days, hours, efficiency
+      teams       - by team from initials: count, minutes, person_days,
+                    members, hours, max_hours, efficiency
+      tfos        - TFOS tasks by database team (in_team_a, no_team)
+      unknown     - initials not in INITIAL_TO_TEAM
+    """
+    completed = (df['status'] == 'completed').to_numpy()
+    minutes = df['total_minutes'].to_numpy(dtype=float)
+
+    # By database team_id
+    # Night Shift is reported as Team D; missing teams as 'No Team'
+    codes, uniques = codes_of(df['db_team'])
+    names = ['Team D' if n == 'Night Shift' else n for n in uniques] + ['No Team']
+    name_codes, team_names = pd.factorize(pd.Index(names, dtype=object))
+    team_codes = name_codes[codes]
+    n_teams = len(team_names)
+    db_teams = pd.DataFrame({
+        'completed': np.bincount(team_codes, weights=completed, minlength=n_teams).astype(int),
+        'total': np.bincount(team_codes, minlength=n_teams),
+        'minutes': np.bincount(team_codes, weights=np.where(completed, minutes, 0), minlength=n_teams),
+    }, index=pd.Index(team_names, name='team')).sort_index()
+    db_teams = db_teams[db_teams['total'] > 0]
+    db_teams['hours'] = (db_teams['minutes'] / 60).round(1)
+
+    exploded = explode_initials(df)
+    initial_codes = exploded['initial'].cat.codes.to_numpy()
+    initial_names = exploded['initial'].cat.categories
+
+    # TFOS attribution uses every status
+    is_tfos = initial_codes == (initial_names.get_loc('TFOS') if 'TFOS' in initial_names else -2)
+    tfos_mask = np.zeros(len(df), dtype=bool)
+    tfos_mask[exploded['row'].to_numpy()[is_tfos]] = True
+    tfos_rows = np.flatnonzero(tfos_mask)
+    tfos_teams = df['db_team'].iloc[tfos_rows]
+    tfos = pd.DataFrame([{
+        'in_team_a': int((tfos_teams == 'Team A').sum()),
+        'no_team': int(tfos_teams.isna().sum()),
+    }])
+
+    # By completed_by initials (completed tasks only)
+    done = exploded['completed'].to_numpy()
+    # Category codes are int8/int16 for few categories; widen before the
+    # grid arithmetic so initials x days can't overflow
+    codes_done = initial_codes[done].astype(np.int64)
+    n_initials = len(initial_names)
+    days_done = exploded['day'].to_numpy()[done].astype(np.int64)
+    # Distinct (initial, day) pairs, marked in an initials x days grid
+    dated = days_done >= 0
+    n_days = int(days_done.max(initial=-1)) + 1
+    worked = np.zeros(n_initials * n_days, dtype=bool)
+    worked[codes_done[dated] * n_days + days_done[dated]] = True
+    person_days = worked.reshape(n_initials, n_days).sum(axis=1)
+
+    initials = pd.DataFrame({
+        'count': np.bincount(codes_done, minlength=n_initials),
+        'minutes': np.bincount(codes_done, weights=exploded['minutes'].to_numpy()[done], minlength=n_initials),
+        'days': person_days,
+    }, index=pd.Index(initial_names, name='initial'))
+    initials, teams = efficiency_tables(initials[initials['count'] > 0])
+
+    unknown = sorted(initials.index[initials['team'] == 'Unknown'])
+
+    return {'db_teams': db_teams, 'initials': initials, 'teams': teams,
+            'tfos': tfos, 'unknown': pd.Series(unknown, name='initial', dtype=object)}
+
+
+def efficiency_tables(initials):
+    """
+    From per-initial count, minutes and days, add team/hours/efficiency
+    (most tasks first) and roll them up by team. Returns (initials, teams).
+    """
+    initials = initials.copy()
+    initials.insert(0, 'team', [INITIAL_TO_TEAM.get(i, 'Unknown') for i in initials.index])
+    initials['hours'] = (initials['minutes'] / 60).round(1)
+    initials['efficiency'] = efficiency_pct(initials['minutes'], initials['days'])
+    initials = initials.sort_values('count', ascending=False, kind='stable')
+
+    # Grouped by team from initials
+    by_team = initials.groupby('team')
+    teams = pd.DataFrame({
+        'count': by_team['count'].sum(),
+        'minutes': by_team['minutes'].sum(),
+        'person_days': by_team['days'].sum(),
+        'members': initials.reset_index().groupby('team')['initial'].agg(lambda m: ', '.join(sorted(m))),
+    }).sort_index()
+    teams['hours'] = (teams['minutes'] / 60).round(1)
+    teams['max_hours'] = teams['person_days'] * 8
+    teams['efficiency'] = efficiency_pct(teams['minutes'], teams['person_days'])
+    return initials, teams
+
+
+def load_rollup(client=None, page_size=1000):
+    """The efficiency_daily rollup (see rollup_efficiency.py) as a DataFrame"""
+    client = client or supabase
+    rows = []
+    while True:
+        page = client.table('efficiency_daily').select(
+            'work_date, team, initial, phase, task_count, task_minutes'
+        ).order('work_date').order('team').order('initial').order('phase').range(
+            len(rows), len(rows) + page_size - 1).execute().data
+        rows.extend(page)
+        if len(page) < page_size:
+            break
+    return pd.DataFrame(rows, columns=['work_date', 'team', 'initial', 'phase', 'task_count', 'task_minutes'])
+
+
+def rollup_frames(rollup):
+    """
+    The per-initial and per-team efficiency tables from efficiency_daily
+    rows instead of raw completions. Completions without a date are rollup
+    rows with no work_date: they count, but add no days.
+    """
+    signed = rollup[rollup['initial'] != '']
+    by_initial = signed.groupby('initial')
+    initials = pd.DataFrame({
+        'count': by_initial['task_count'].sum(),
+        'minutes': pd.to_numeric(signed['task_minutes']).groupby(signed['initial']).sum(),
+        'days': by_initial['work_date'].nunique(),
+    })
+    initials, teams = efficiency_tables(initials)
+    unknown = sorted(initials.index[initials['team'] == 'Unknown'])
+    return {'initials': initials, 'teams': teams,
+            'unknown': pd.Series(unknown, name='initial', dtype=object)}
+
+
+def print_efficiency(frames):
+    """Individual performance and team efficiency sections"""
+    # Individual breakdown
+    print("\n" + "=" * 70)
+    print("INDIVIDUAL PERFORMANCE (Top 20)")
+    print("=" * 70)
+
+    print(f"\n{'Initial':<10} {'Team':<12} {'Tasks':<10} {'Hours':<10} {'Days':<8} {'Efficiency'}")
+    print("-" * 70)
+
+    for row in frames['initials'].head(20).itertuples():
+        print(f"{row.Index:<10} {row.team:<12} {row.count:<10} {row.hours:<10} "
+              f"{row.days:<8} {row.efficiency}%")
+
+    if len(frames['unknown']):
+        print(f"\n\nUnknown initials found: {list(frames['unknown'])}")
+
+    # Calculate correct team efficiency
+    print("\n" + "=" * 70)
+    print("CORRECT EFFICIENCY CALCULATION")
+    print("=" * 70)
+    print("Formula: Efficiency = (task hours) / (8 hours × person-days worked)")
+
+    print(f"\n{'Team':<15} {'Task Hours':<12} {'Person-Days':<14} {'Max Hours':<12} {'Efficiency'}")
+    print("-" * 70)
+
+    for row in frames['teams'].drop(index='Unknown', errors='ignore').itertuples():
+        print(f"{row.Index:<15} {row.hours:<12} {row.person_days:<14} {row.max_hours:<12} {row.efficiency}%")
+
 
 def analyze():
     print("=" * 70)
     print("ANALYZING TEAM DATA")
     print("=" * 70)
 
-    # Fetch all completions
     print("\nFetching task completions...")
-    all_completions = []
-    offset = 0
-    batch_size = 1000
-
-    while True:
-        result = supabase.table('task_completions').select(
-            'id, status, completed_by, completed_at, total_minutes, team_id, teams(name)'
-        ).range(offset, offset + batch_size - 1).execute()
+    df = load_completions()
+    print(f"\nTotal completions: {len(df)}")
 
-        if not result.data:
-            break
-        all_completions.extend(result.data)
-        offset += batch_size
-        if offset % 10000 == 0:
-            print(f"  Fetched {len(all_completions)} records...")
-
-    print(f"\nTotal completions: {len(all_completions)}")
+    frames = team_frames(df)
 
     # Analyze by database team_id
     print("\n" + "=" * 70)
     print("ANALYSIS BY DATABASE TEAM_ID")
     print("=" * 70)
 
-    db_team_stats = defaultdict(lambda: {'completed': 0, 'total': 0, 'minutes': 0})
-    for c in all_completions:
-        team_name = c.get('teams', {}).get('name') if c.get('teams') else 'No Team'
-        if team_name == 'Night Shift':
-            team_name = 'Team D'
-        db_team_stats[team_name]['total'] += 1
-        if c['status'] == 'completed':
-            db_team_stats[team_name]['completed'] += 1
-            db_team_stats[team_name]['minutes'] += c.get('total_minutes') or 0
-
     print(f"\n{'Team':<15} {'Completed':<12} {'Total':<10} {'Hours':<10}")
     print("-" * 50)
-    for team in sorted(db_team_stats.keys()):
-        stats = db_team_stats[team]
-        hours = round(stats['minutes'] / 60, 1)
-        print(f"{team:<15} {stats['completed']:<12} {stats['total']:<10} {hours:<10}")
+    for row in frames['db_teams'].itertuples():
+        print(f"{row.Index:<15} {row.completed:<12} {row.total:<10} {row.hours:<10}")
 
     # Analyze by completed_by initials
     print("\n" + "=" * 70)
     print("ANALYSIS BY COMPLETED_BY INITIALS")
     print("=" * 70)
 
-    initial_stats = defaultdict(lambda: {'count': 0, 'minutes': 0, 'dates': set()})
-    unknown_initials = set()
-
-    for c in all_completions:
-        if c['status'] != 'completed':
-            continue
-
-        completed_by = c.get('completed_by')
-        if not completed_by:
-            continue
-
-        # Parse completed_by (could be array or comma-separated string)
-        if isinstance(completed_by, list):
-            initials = completed_by
-        else:
-            initials = [s.strip() for s in str(completed_by).split(',') if s.strip()]
-
-        for initial in initials:
-            initial_upper = initial.upper().strip()
-            initial_stats[initial_upper]['count'] += 1
-            initial_stats[initial_upper]['minutes'] += (c.get('total_minutes') or 0) / len(initials)
-
-            # Track dates
-            if c.get('completed_at'):
-                date_str = c['completed_at'].split('T')[0]
-                initial_stats[initial_upper]['dates'].add(date_str)
-
-            if initial_upper not in INITIAL_TO_TEAM:
-                unknown_initials.add(initial_upper)
-
-    # Group by team from initials
-    team_from_initials = defaultdict(lambda: {'count': 0, 'minutes': 0, 'person_days': 0, 'members': set()})
-
-    for initial, stats in initial_stats.items():
-        team = INITIAL_TO_TEAM.get(initial, 'Unknown')
-        team_from_initials[team]['count'] += stats['count']
-        team_from_initials[team]['minutes'] += stats['minutes']
-        team_from_initials[team]['members'].add(initial)
-        team_from_initials[team]['person_days'] += len(stats['dates'])
-
     print(f"\n{'Team':<15} {'Tasks':<10} {'Hours':<10} {'Person-Days':<12} {'Members'}")
     print("-" * 80)
-    for team in sorted(team_from_initials.keys()):
-        stats = team_from_initials[team]
-        hours = round(stats['minutes'] / 60, 1)
-        members = ', '.join(sorted(stats['members']))
-        print(f"{team:<15} {stats['count']:<10} {hours:<10} {stats['person_days']:<12} {members}")
+    for row in frames['teams'].itertuples():
+        print(f"{row.Index:<15} {row.count:<10} {row.hours:<10} {row.person_days:<12} {row.members}")
 
     # Check for TFOS in database team assignments
     print("\n" + "=" * 70)
     print("CHECKING TFOS ATTRIBUTION")
     print("=" * 70)
 
-    tfos_in_team_a = 0
-    tfos_standalone = 0
+    tfos = frames['tfos'].iloc[0]
+    print(f"\nTFOS tasks with Team A in database: {tfos['in_team_a']}")
+    print(f"TFOS tasks with no team: {tfos['no_team']}")
 
-    for c in all_completions:
-        completed_by = c.get('completed_by')
-        if not completed_by:
-            continue
-
-        if isinstance(completed_by, list):
-            initials = completed_by
-        else:
-            initials = [s.strip().upper() for s in str(completed_by).split(',') if s.strip()]
-
-        has_tfos = 'TFOS' in [i.upper() for i in initials]
-
-        if has_tfos:
-            team_name = c.get('teams', {}).get('name') if c.get('teams') else None
-            if team_name == 'Team A':
-                tfos_in_team_a += 1
-            elif not team_name:
-                tfos_standalone += 1
+    print_efficiency(frames)
 
-    print(f"\nTFOS tasks with Team A in database: {tfos_in_team_a}")
-    print(f"TFOS tasks with no team: {tfos_standalone}")
 
-    # Individual breakdown
-    print("\n" + "=" * 70)
-    print("INDIVIDUAL PERFORMANCE (Top 20)")
+def analyze_rollup():
+    """Efficiency sections only, read from the efficiency_daily rollup"""
     print("=" * 70)
-
-    sorted_initials = sorted(initial_stats.items(), key=lambda x: x[1]['count'], reverse=True)
-
-    print(f"\n{'Initial':<10} {'Team':<12} {'Tasks':<10} {'Hours':<10} {'Days':<8} {'Efficiency'}")
-    print("-" * 70)
-
-    for initial, stats in sorted_initials[:20]:
-        team = INITIAL_TO_TEAM.get(initial, 'Unknown')
-        hours = round(stats['minutes'] / 60, 1)
-        days = len(stats['dates'])
-        # Efficiency = task hours / (8 hours × days worked)
-        if days > 0:
-            efficiency = round((stats['minutes'] / 60) / (8 * days) * 100, 1)
-        else:
-            efficiency = 0
-        print(f"{initial:<10} {team:<12} {stats['count']:<10} {hours:<10} {days:<8} {efficiency}%")
-
-    if unknown_initials:
-        print(f"\n\nUnknown initials found: {sorted(unknown_initials)}")
-
-    # Calculate correct team efficiency
-    print("\n" + "=" * 70)
-    print("CORRECT EFFICIENCY CALCULATION")
+    print("ANALYZING TEAM DATA (FROM efficiency_daily ROLLUP)")
     print("=" * 70)
-    print("Formula: Efficiency = (task hours) / (8 hours × person-days worked)")
 
-    print(f"\n{'Team':<15} {'Task Hours':<12} {'Person-Days':<14} {'Max Hours':<12} {'Efficiency'}")
-    print("-" * 70)
+    rollup = load_rollup()
+    print(f"\nRollup rows: {len(rollup)}")
+    if rollup.empty:
+        print("Rollup is empty - run rollup_efficiency.py first")
+        return
 
-    for team in sorted(team_from_initials.keys()):
-        if team == 'Unknown':
-            continue
-        stats = team_from_initials[team]
-        task_hours = stats['minutes'] / 60
-        person_days = stats['person_days']
-        max_hours = person_days * 8
-        if max_hours > 0:
-            efficiency = round(task_hours / max_hours * 100, 1)
-        else:
-            efficiency = 0
-        print(f"{team:<15} {round(task_hours, 1):<12} {person_days:<14} {round(max_hours, 1):<12} {efficiency}%")
+    print_efficiency(rollup_frames(rollup))
 
 
 if __name__ == "__main__":
-    analyze()
+    if '--rollup' in sys.argv[1:]:
+        analyze_rollup()
+    else:
+        analyze()
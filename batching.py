@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Shared batching helpers for bulk writes to Supabase.
+
+AdaptiveBatcher cuts rows into batches by serialized size instead of a
+fixed row count, and tunes the target size from measured response times:
+slow requests shrink the next batches, fast ones let them grow. Rows with
+long descriptions therefore no longer time out a 500-row batch, and small
+rows no longer waste round trips.
+
+post_rows() writes a batch straight to the PostgREST endpoint so the body
+can optionally be gzip-compressed (the supabase client always sends plain
+JSON). Only use compress=True against an endpoint that accepts
+Content-Encoding: gzip request bodies.
+"""
+
+import gzip
+import json
+import time
+from contextlib import contextmanager
+
+# Row payloads (JSON request bodies)
+DEFAULT_TARGET_BYTES = 256 * 1024
+DEFAULT_MIN_BYTES = 16 * 1024
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+DEFAULT_MAX_ROWS = 1000
+
+# ID lists for .in_('id', [...]) filters travel in the URL, so keep them
+# well under typical proxy limits (~8KB)
+ID_TARGET_BYTES = 4 * 1024
+ID_MAX_BYTES = 6 * 1024
+
+# Aim for requests around this long; shrink above, grow below
+DEFAULT_TARGET_SECONDS = 2.0
+
+
+def payload_bytes(row):
+    """Serialized size of a row as it will be sent in a JSON body"""
+    return len(json.dumps(row, default=str, separators=(',', ':')))
+
+
+def id_bytes(row_id):
+    """Size of an ID inside a URL-encoded in.(...) filter"""
+    return len(str(row_id)) + 3
+
+
+class AdaptiveBatcher:
+    """
+    Groups rows into batches of roughly target_bytes, adjusting the target
+    from the latency reported through record() / timed().
+
+    Use add()/flush() when rows arrive one at a time, or split() for a list.
+    record() may be called from another thread than add(); the target is a
+    single attribute so readers just see the old or new value.
+    """
+
+    def __init__(self, target_bytes=DEFAULT_TARGET_BYTES, min_bytes=DEFAULT_MIN_BYTES,
+                 max_bytes=DEFAULT_MAX_BYTES, max_rows=DEFAULT_MAX_ROWS,
+                 target_seconds=DEFAULT_TARGET_SECONDS, size_of=payload_bytes):
+        self.target_bytes = target_bytes
+        self.min_bytes = min_bytes
+        self.max_bytes = max_bytes
+        self.max_rows = max_rows
+        self.target_seconds = target_seconds
+        self.size_of = size_of
+        self.requests = 0
+        self.total_seconds = 0.0
+        self._batch = []
+        self._batch_bytes = 0
+
+    @classmethod
+    def for_ids(cls, **kwargs):
+        """Batcher for ID lists sent in .in_() URL filters"""
+        kwargs.setdefault('target_bytes', ID_TARGET_BYTES)
+        kwargs.setdefault('min_bytes', 512)
+        kwargs.setdefault('max_bytes', ID_MAX_BYTES)
+        kwargs.setdefault('size_of', id_bytes)
+        return cls(**kwargs)
+
+    def add(self, row):
+        """Add a row; returns a full batch when the target size is reached"""
+        self._batch.append(row)
+        self._batch_bytes += self.size_of(row)
+        if self._batch_bytes >= self.target_bytes or len(self._batch) >= self.max_rows:
+            return self.flush()
+        return None
+
+    def flush(self):
+        """Return the partial batch, if any"""
+        batch = self._batch
+        self._batch = []
+        self._batch_bytes = 0
+        return batch or None
+
+    def split(self, rows):
+        """Yield batches from a list of rows"""
+        for row in rows:
+            batch = self.add(row)
+            if batch:
+                yield batch
+        batch = self.flush()
+        if batch:
+            yield batch
+
+    def record(self, seconds):
+        """
+        Feed back how long a request took. Slow requests halve the target
+        (multiplicative decrease); fast ones grow it by a quarter.
+        """
+        self.requests += 1
+        self.total_seconds += seconds
+        if seconds > self.target_seconds * 1.5:
+            self.target_bytes = max(self.min_bytes, self.target_bytes // 2)
+        elif seconds < self.target_seconds / 2:
+            self.target_bytes = min(self.max_bytes, int(self.target_bytes * 1.25))
+
+    @contextmanager
+    def timed(self):
+        """Time the enclosed request and record() it, even if it fails"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(time.perf_counter() - start)
+
+    def summary(self):
+        avg = self.total_seconds / self.requests if self.requests else 0
+        return (f"{self.requests} requests, avg {avg:.2f}s, "
+                f"final target {self.target_bytes // 1024}KB")
+
+
+class RestError(Exception):
+    """
+    PostgREST error response, with the same fields as postgrest.APIError
+    (code is the PostgREST/SQLSTATE code when the body has one) plus the
+    HTTP status
+    """
+
+    def __init__(self, status, body):
+        self.status = status
+        self.code = (body.get('code') if isinstance(body, dict) else None) or str(status)
+        self.message = body.get('message') if isinstance(body, dict) else str(body)
+        self.details = body.get('details') if isinstance(body, dict) else None
+        self.hint = body.get('hint') if isinstance(body, dict) else None
+        super().__init__(f"{status} {self.code}: {self.message}")
+
+
+def encode_rows(rows, compress=False):
+    """JSON-encode rows for a request body, returning (body, extra headers)"""
+    body = json.dumps(rows, default=str, separators=(',', ':')).encode('utf-8')
+    if compress:
+        return gzip.compress(body, compresslevel=5), {'Content-Encoding': 'gzip'}
+    return body, {}
+
+
+async def post_rows(http, supabase_url, supabase_key, table, rows,
+                    upsert=False, on_conflict=None, compress=False):
+    """
+    Insert (or upsert) rows with a direct PostgREST POST using an
+    httpx.AsyncClient. Raises RestError on a non-2xx response.
+    """
+    body, headers = encode_rows(rows, compress=compress)
+    prefer = ['return=minimal']
+    if upsert:
+        prefer.append('resolution=merge-duplicates')
+    headers.update({
+        'apikey': supabase_key,
+        'Authorization': f"Bearer {supabase_key}",
+        'Content-Type': 'application/json',
+        'Prefer': ','.join(prefer),
+    })
+    params = {'on_conflict': on_conflict} if on_conflict else None
+
+    response = await http.post(f"{supabase_url}/rest/v1/{table}", content=body,
+                               headers=headers, params=params)
+    if response.status_code >= 300:
+        try:
+            error_body = response.json()
+        except ValueError:
+            error_body = response.text
+        raise RestError(response.status_code, error_body)
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Data-quality checks for task_completions in a single pass.
+
+task_completions is streamed once and every registered rule checks each
+chunk as a DataFrame with vectorized operations. Rules that need the whole
+table (duplicates, orphan cars) collect compact state per chunk and settle
+it at the end. The output is a report per rule and, optionally, a fix plan:
+bulk updates/deletes the rules know how to repair, listed for review
+(--plan) and run only with --apply.
+
+Rules:
+  date_out_of_range  completed_at outside fix_bad_dates' valid range
+  unknown_initials   completed_by initials not in team_membership.json
+  zero_minutes       completed tasks with no total_minutes
+  orphan_cars        cars without task_completions, and completions
+                     without a car
+  duplicate_tasks    the same task recorded twice on a car
+
+Usage:
+    python data_quality.py
+    python data_quality.py --rule zero_minutes --rule duplicate_tasks
+    python data_quality.py --report dq_report.json --plan dq_plan.json
+    python data_quality.py --apply
+"""
+
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+from analyze_team_data import FETCH_WORKERS, SUPABASE_KEY, SUPABASE_URL, explode_initials
+from batching import AdaptiveBatcher
+from fix_bad_dates import CUTOFF_DATE, MIN_VALID_DATE, bad_date_filter
+from supabase_metrics import create_client
+from table_scan import bulk_update, scan, scan_parallel
+
+# Rows handed to the rules at a time
+CHUNK_ROWS = 20000
+
+# Example rows kept per rule for the report
+SAMPLE_SIZE = 10
+
+# Columns that identify the same task on a car; a worksheet may repeat a
+# task at different positions, and sync_worksheets matches on sort_order
+DUPLICATE_KEY = ('car_id', 'sort_order', 'task_name', 'description')
+
+
+class FixAction:
+    """One bulk repair: an update or delete by filter or by a list of ids"""
+
+    def __init__(self, rule, table, kind, values=None, ids=None, where=None, where_text=None):
+        self.rule = rule
+        self.table = table
+        self.kind = kind
+        self.values = values
+        self.ids = list(ids) if ids is not None else None
+        self.where = where
+        self.where_text = where_text
+
+    @property
+    def rows(self):
+        return len(self.ids) if self.ids is not None else None
+
+    def describe(self):
+        target = f"{self.rows} rows by id" if self.ids is not None else f"rows where {self.where_text}"
+        values = f" set {self.values}" if self.values else ''
+        return f"[{self.rule}] {self.kind.upper()} {self.table}{values} - {target}"
+
+    def as_dict(self):
+        return {
+            'rule': self.rule,
+            'table': self.table,
+            'action': self.kind,
+            'values': self.values,
+            'where': self.where_text,
+            'ids': self.ids,
+        }
+
+    def apply(self, client):
+        """Run the action. Returns the number of rows changed (or requested, for id lists)."""
+        if self.ids is None:
+            if self.kind == 'update':
+                return bulk_update(client, self.table, self.values, self.where)
+            return self.where(client.table(self.table).delete(count='exact')).execute().count or 0
+
+        # Id lists travel in the URL, so batch them by size
+        for batch in AdaptiveBatcher.for_ids().split(self.ids):
+            table = client.table(self.table)
+            query = table.update(self.values) if self.kind == 'update' else table.delete()
+            query.in_('id', batch).execute()
+        return len(self.ids)
+
+
+class Rule:
+    """
+    Base class for a check. Subclasses define check(chunk), which receives
+    each chunk as a DataFrame and records offending rows with flag();
+    finish() runs once after the scan.
+    """
+
+    name = ''
+    description = ''
+    columns = ()
+    advice = None
+
+    def __init__(self):
+        self.count = 0
+        self.ids = []
+        self.samples = []
+
+    def flag(self, ids, details):
+        """Record offending rows (ids and a detail string for each)"""
+        ids = list(ids)
+        self.count += len(ids)
+        self.ids.extend(ids)
+        room = SAMPLE_SIZE - len(self.samples)
+        if room > 0:
+            self.samples.extend({'id': i, 'detail': d} for i, d in zip(ids[:room], list(details)[:room]))
+
+    def finish(self, client):
+        pass
+
+    def fixes(self):
+        """FixActions that repair what was found"""
+        return []
+
+    def summary(self):
+        return {}
+
+
+class DateOutOfRange(Rule):
+    name = 'date_out_of_range'
+    description = f"completed_at before {MIN_VALID_DATE.date()} or after {CUTOFF_DATE.date()}"
+    columns = ('completed_at',)
+
+    def check(self, chunk):
+        # ISO timestamps compare correctly as strings, and years like 3034
+        # don't overflow the way datetime64 would
+        at = chunk['completed_at']
+        bad = at.notna() & ((at < MIN_VALID_DATE.isoformat()) | (at > CUTOFF_DATE.isoformat()))
+        self.flag(chunk['id'][bad], at[bad])
+
+    def fixes(self):
+        if not self.count:
+            return []
+        # Same predicate and repair as fix_bad_dates.py
+        return [FixAction(self.name, 'task_completions', 'update', values={'completed_at': None},
+                          where=bad_date_filter(), where_text=self.description)]
+
+
+class UnknownInitials(Rule):
+    name = 'unknown_initials'
+    description = "completed_by contains initials not in team_membership.json"
+    columns = ('status', 'completed_by', 'completed_at', 'total_minutes')
+    advice = "add these initials to a new version of team_membership.json, or correct them in the sheets"
+
+    def __init__(self):
+        super().__init__()
+        self.by_initial = {}
+
+    def check(self, chunk):
+        exploded = explode_initials(chunk)
+        unknown = exploded[(exploded['team'] == 'Unknown').to_numpy()]
+        if unknown.empty:
+            return
+        for initial, n in unknown['initial'].astype(object).value_counts().items():
+            self.by_initial[initial] = self.by_initial.get(initial, 0) + int(n)
+        rows = np.unique(unknown['row'].to_numpy())
+        self.flag(chunk['id'].to_numpy()[rows], chunk['completed_by'].to_numpy()[rows])
+
+    def summary(self):
+        return {'rows_by_initial': dict(sorted(self.by_initial.items(), key=lambda kv: -kv[1]))}
+
+
+class ZeroMinutes(Rule):
+    name = 'zero_minutes'
+    description = "completed tasks with total_minutes missing or 0"
+    columns = ('status', 'task_name', 'total_minutes')
+    advice = "run update_task_minutes.py to fill minutes from Master Data"
+
+    def __init__(self):
+        super().__init__()
+        self.by_task = {}
+
+    def check(self, chunk):
+        minutes = pd.to_numeric(chunk['total_minutes'], errors='coerce')
+        zero = (chunk['status'] == 'completed') & ~(minutes > 0)
+        if not zero.any():
+            return
+        for name, n in chunk['task_name'][zero].fillna('').value_counts().items():
+            self.by_task[name] = self.by_task.get(name, 0) + int(n)
+        self.flag(chunk['id'][zero], chunk['task_name'][zero])
+
+    def summary(self):
+        top = sorted(self.by_task.items(), key=lambda kv: -kv[1])[:SAMPLE_SIZE]
+        return {'distinct_tasks': len(self.by_task), 'top_tasks': dict(top)}
+
+
+class OrphanCars(Rule):
+    name = 'orphan_cars'
+    description = "cars with no task_completions, and task_completions with no car"
+    columns = ('car_id',)
+
+    def __init__(self):
+        super().__init__()
+        self.seen_cars = set()
+        self.orphan_cars = []
+        self.missing_car = 0
+
+    def check(self, chunk):
+        car_ids = chunk['car_id']
+        self.seen_cars.update(car_ids.dropna().unique())
+        no_car = car_ids.isna()
+        self.missing_car += int(no_car.sum())
+        self.flag(chunk['id'][no_car], ['completion without car_id'] * int(no_car.sum()))
+
+    def finish(self, client):
+        # cars is small next to task_completions; read it after the scan
+        for car in scan(client, 'cars', 'id, unit_id, car_number'):
+            if car['id'] not in self.seen_cars:
+                self.orphan_cars.append(car['id'])
+                self.flag([car['id']], [f"car {car.get('car_number')} of unit {car.get('unit_id')} has no tasks"])
+        self.seen_cars = set()
+
+    def fixes(self):
+        if not self.orphan_cars:
+            return []
+        return [FixAction(self.name, 'cars', 'delete', ids=self.orphan_cars)]
+
+    def summary(self):
+        return {'cars_without_tasks': len(self.orphan_cars), 'completions_without_car': self.missing_car}
+
+
+class DuplicateTasks(Rule):
+    name = 'duplicate_tasks'
+    description = f"more than one task_completion with the same {', '.join(DUPLICATE_KEY)}"
+    columns = DUPLICATE_KEY + ('status', 'completed_at', 'updated_at')
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self.extra_ids = []
+
+    def check(self, chunk):
+        # Keep only a 64-bit hash of the key and what's needed to pick the
+        # copy to keep, not the rows themselves
+        keyed = chunk[chunk['car_id'].notna()]
+        if keyed.empty:
+            return
+        # sort_order comes back int or float depending on NULLs in the chunk;
+        # hash a text form so equal keys match across chunks
+        key = keyed[list(DUPLICATE_KEY)].assign(
+            sort_order=pd.to_numeric(keyed['sort_order']).astype('Int64'))
+        self.parts.append(pd.DataFrame({
+            'key': pd.util.hash_pandas_object(key.astype(object).fillna('').astype(str), index=False).to_numpy(),
+            'id': keyed['id'].to_numpy(),
+            'completed': (keyed['status'] == 'completed').to_numpy(),
+            'dated': keyed['completed_at'].notna().to_numpy(),
+            'updated_at': keyed['updated_at'].fillna('').to_numpy(),
+        }))
+
+    def finish(self, client):
+        if not self.parts:
+            return
+        rows = pd.concat(self.parts, ignore_index=True)
+        self.parts = []
+        rows = rows[rows['key'].duplicated(keep=False)]
+
+        # Keep the completed, dated, most recently updated copy of each task
+        rows = rows.sort_values(['key', 'completed', 'dated', 'updated_at', 'id'],
+                                ascending=[True, False, False, False, True])
+        extra = rows[rows['key'].duplicated(keep='first')]
+        kept = rows.drop_duplicates('key').set_index('key')['id']
+        self.extra_ids = extra['id'].tolist()
+        self.flag(extra['id'], [f"duplicate of {k}" for k in kept.loc[extra['key']].to_numpy()])
+
+    def fixes(self):
+        if not self.extra_ids:
+            return []
+        return [FixAction(self.name, 'task_completions', 'delete', ids=self.extra_ids)]
+
+
+RULES = [DateOutOfRange, UnknownInitials, ZeroMinutes, OrphanCars, DuplicateTasks]
+
+
+def run_rules(client, rules, chunk_rows=CHUNK_ROWS):
+    """Stream task_completions once through every rule. Returns rows scanned."""
+    columns = ['id']
+    for rule in rules:
+        columns.extend(c for c in rule.columns if c not in columns)
+
+    scanned = 0
+    chunk = []
+
+    def evaluate(rows):
+        df = pd.DataFrame.from_records(rows, columns=columns)
+        for rule in rules:
+            rule.check(df)
+
+    for row in scan_parallel(client, 'task_completions', ', '.join(columns),
+                             workers=FETCH_WORKERS, progress_every=50000):
+        chunk.append(row)
+        if len(chunk) >= chunk_rows:
+            evaluate(chunk)
+            scanned += len(chunk)
+            chunk = []
+    if chunk:
+        evaluate(chunk)
+        scanned += len(chunk)
+
+    for rule in rules:
+        rule.finish(client)
+    return scanned
+
+
+def print_report(rules, scanned):
+    print(f"\nRows scanned: {scanned}")
+    for rule in rules:
+        print("\n" + "-" * 60)
+        print(f"{rule.name}: {rule.count}")
+        print(f"  {rule.description}")
+        for key, value in rule.summary().items():
+            print(f"  {key}: {value}")
+        for sample in rule.samples:
+            print(f"    {sample['id'][:8]}... {str(sample['detail'])[:60]}")
+        if rule.count > len(rule.samples):
+            print(f"    ... and {rule.count - len(rule.samples)} more")
+        if rule.count and rule.advice:
+            print(f"  Fix: {rule.advice}")
+
+
+def report_dict(rules, scanned):
+    return {
+        'rows_scanned': scanned,
+        'rules': {rule.name: {
+            'description': rule.description,
+            'count': rule.count,
+            'samples': rule.samples,
+            'summary': rule.summary(),
+            'advice': rule.advice,
+        } for rule in rules},
+    }
+
+
+def main():
+    names = [rule.name for rule in RULES]
+    parser = argparse.ArgumentParser(description="Single-pass data-quality checks for task_completions")
+    parser.add_argument('--rule', action='append', choices=names,
+                        help="Only run this rule (repeatable; default all)")
+    parser.add_argument('--report', metavar='PATH', help="Also write the report as JSON")
+    parser.add_argument('--plan', metavar='PATH', help="Write the fix plan as JSON")
+    parser.add_argument('--apply', action='store_true', help="Run the fix plan after confirmation")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("DATA QUALITY CHECK")
+    print("=" * 60)
+
+    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    rules = [rule() for rule in RULES if not args.rule or rule.name in args.rule]
+    print(f"Rules: {', '.join(rule.name for rule in rules)}")
+
+    scanned = run_rules(supabase, rules)
+    print_report(rules, scanned)
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report_dict(rules, scanned), f, indent=2, default=str)
+        print(f"\nReport written to {args.report}")
+
+    plan = [action for rule in rules for action in rule.fixes()]
+    print("\n" + "=" * 60)
+    print(f"FIX PLAN ({len(plan)} actions)")
+    print("=" * 60)
+    for action in plan:
+        print(f"  {action.describe()}")
+
+    if args.plan:
+        with open(args.plan, 'w') as f:
+            json.dump([action.as_dict() for action in plan], f, indent=2)
+        print(f"\nPlan written to {args.plan}")
+
+    if not args.apply or not plan:
+        return
+
+    response = input(f"\nApply {len(plan)} fix actions? (y/N): ").strip().lower()
+    if response != 'y':
+        print("Cancelled.")
+        return
+
+    for action in plan:
+        try:
+            changed = action.apply(supabase)
+            print(f"  {action.describe()}: {changed} rows")
+        except Exception as e:
+            print(f"  {action.describe()}: error {e}")
+
+
+if __name__ == "__main__":
+    main()
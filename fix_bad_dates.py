@@ -4,8 +4,9 @@ Find and fix bad dates in task_completions table
 Dates like "Oct 3, 3034" are clearly data entry errors
 """
 
-from supabase import create_client
+from supabase_metrics import create_client
 from datetime import datetime, timedelta
+from table_scan import Where, bulk_update, scan
 
 # Supabase configuration
 SUPABASE_URL = "https://fsubmqjevlfpcirgsbhi.supabase.co"
@@ -13,60 +14,32 @@ SUPABASE_KEY = "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJpc3MiOiJzdXBhYmFzZSIsInJ
 
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+CUTOFF_DATE = datetime(2026, 12, 31)  # Any date after 2026 is suspicious
+MIN_VALID_DATE = datetime(2020, 1, 1)  # Any date before 2020 is also suspicious
+
+
+def bad_date_filter():
+    """completed_at before MIN_VALID_DATE or after CUTOFF_DATE"""
+    return Where().outside('completed_at', MIN_VALID_DATE, CUTOFF_DATE)
+
+
 def find_bad_dates():
-    """Find all task_completions with dates in the future (beyond 2026)"""
+    """Find all task_completions with dates outside 2020-2026"""
     print("=" * 60)
     print("FINDING BAD DATES IN TASK_COMPLETIONS")
     print("=" * 60)
 
-    # Fetch all completions with completed_at dates
-    all_completions = []
-    offset = 0
-    batch_size = 1000
-
-    while True:
-        result = supabase.table('task_completions').select('id, task_name, completed_at, car_id').range(offset, offset + batch_size - 1).execute()
-        if not result.data:
-            break
-        all_completions.extend(result.data)
-        offset += batch_size
-        if offset % 10000 == 0:
-            print(f"  Fetched {len(all_completions)} records...")
-
-    print(f"Total records: {len(all_completions)}")
-
-    # Find bad dates
+    # Only rows outside the valid range are fetched; NULL dates never match
     bad_dates = []
-    cutoff_date = datetime(2026, 12, 31)  # Any date after 2026 is suspicious
-    min_valid_date = datetime(2020, 1, 1)  # Any date before 2020 is also suspicious
-
-    for comp in all_completions:
-        if comp.get('completed_at'):
-            try:
-                date_str = comp['completed_at']
-                # Parse the date
-                if 'T' in date_str:
-                    date_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                else:
-                    date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-
-                # Check if date is invalid
-                if date_obj > cutoff_date or date_obj < min_valid_date:
-                    bad_dates.append({
-                        'id': comp['id'],
-                        'task_name': comp['task_name'],
-                        'completed_at': comp['completed_at'],
-                        'date_obj': date_obj
-                    })
-            except Exception as e:
-                print(f"  Parse error for {comp['id']}: {comp['completed_at']} - {e}")
-                bad_dates.append({
-                    'id': comp['id'],
-                    'task_name': comp['task_name'],
-                    'completed_at': comp['completed_at'],
-                    'date_obj': None
-                })
-
+    for comp in scan(supabase, 'task_completions', 'id, task_name, completed_at, car_id',
+                     where=bad_date_filter()):
+        bad_dates.append({
+            'id': comp['id'],
+            'task_name': comp['task_name'],
+            'completed_at': comp['completed_at'],
+        })
+
+    print(f"Valid range: {MIN_VALID_DATE.date()} to {CUTOFF_DATE.date()}")
     print(f"\nFound {len(bad_dates)} records with bad dates:")
     for bd in bad_dates[:20]:  # Show first 20
         print(f"  ID: {bd['id'][:8]}... | Task: {bd['task_name'][:30]} | Date: {bd['completed_at']}")
@@ -86,23 +59,22 @@ def fix_bad_dates(bad_dates, dry_run=True):
         print("No bad dates to fix!")
         return
 
-    fixed = 0
-    for bd in bad_dates:
-        if dry_run:
+    if dry_run:
+        for bd in bad_dates:
             print(f"  Would set completed_at to NULL for {bd['id'][:8]}... ({bd['task_name'][:30]})")
-        else:
-            try:
-                # Set bad dates to NULL - the task might be completed but we don't know when
-                supabase.table('task_completions').update({
-                    'completed_at': None
-                }).eq('id', bd['id']).execute()
-                fixed += 1
-                if fixed % 100 == 0:
-                    print(f"  Fixed {fixed} records...")
-            except Exception as e:
-                print(f"  Error fixing {bd['id']}: {e}")
-
-    print(f"\n{'Would fix' if dry_run else 'Fixed'} {len(bad_dates)} records")
+        print(f"\nWould fix {len(bad_dates)} records")
+        return
+
+    # Set bad dates to NULL - the task might be completed but we don't know when.
+    # One UPDATE ... WHERE with the same range filter used to find them.
+    try:
+        fixed = bulk_update(supabase, 'task_completions', {'completed_at': None}, bad_date_filter())
+        errors = 0
+    except Exception as e:
+        print(f"  Error fixing dates: {e}")
+        fixed, errors = 0, len(bad_dates)
+
+    print(f"\nFixed {fixed} records, {errors} errors")
 
 if __name__ == "__main__":
     bad_dates = find_bad_dates()
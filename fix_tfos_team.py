@@ -5,7 +5,9 @@ Fix TFOS team assignment:
 2. Move all tasks with TFOS in completed_by to TFOS team
 """
 
-from supabase import create_client
+from people import assign_signed_to_team, signed_by
+from supabase_metrics import create_client
+from table_scan import Where
 
 # Supabase configuration
 SUPABASE_URL = "https://fsubmqjevlfpcirgsbhi.supabase.co"
@@ -13,6 +15,19 @@ SUPABASE_KEY = "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJpc3MiOiJzdXBhYmFzZSIsInJ
 
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+# completed_by keeps whatever spelling the sheets used ('Tfos', ' TFOS', ...),
+# so rows are matched server-side through people.initials instead
+TFOS_INITIALS = ['TFOS']
+
+
+def count_tfos(where=None):
+    """Completions signed by TFOS (in any case or padding) matching `where`"""
+    query = signed_by(supabase, TFOS_INITIALS, count='exact')
+    if where:
+        query = where(query)
+    return query.limit(1).execute().count
+
+
 def fix_tfos():
     print("=" * 60)
     print("FIXING TFOS TEAM ASSIGNMENT")
@@ -38,45 +53,13 @@ def fix_tfos():
         tfos_team_id = new_team.data[0]['id']
         print(f"   Created TFOS team with ID: {tfos_team_id}")
 
-    # Step 2: Find all tasks with TFOS in completed_by
+    # Step 2: Count tasks with TFOS in completed_by (filtered in the database)
     print("\n2. Finding tasks with TFOS in completed_by...")
-    all_completions = []
-    offset = 0
-    batch_size = 1000
-
-    while True:
-        result = supabase.table('task_completions').select(
-            'id, completed_by, team_id'
-        ).range(offset, offset + batch_size - 1).execute()
-
-        if not result.data:
-            break
-        all_completions.extend(result.data)
-        offset += batch_size
-
-    print(f"   Total task completions: {len(all_completions)}")
-
-    # Find tasks with TFOS
-    tfos_tasks = []
-    for c in all_completions:
-        completed_by = c.get('completed_by')
-        if not completed_by:
-            continue
-
-        if isinstance(completed_by, list):
-            initials = [i.upper() for i in completed_by]
-        else:
-            initials = [s.strip().upper() for s in str(completed_by).split(',') if s.strip()]
-
-        if 'TFOS' in initials:
-            tfos_tasks.append(c)
-
-    print(f"   Tasks with TFOS: {len(tfos_tasks)}")
-
-    # Count how many are already correctly assigned
-    already_correct = sum(1 for t in tfos_tasks if t.get('team_id') == tfos_team_id)
-    needs_update = sum(1 for t in tfos_tasks if t.get('team_id') != tfos_team_id)
+    tfos_count = count_tfos()
+    needs_update = count_tfos(Where().distinct_from('team_id', tfos_team_id))
+    already_correct = tfos_count - needs_update
 
+    print(f"   Tasks with TFOS: {tfos_count}")
     print(f"   Already correctly assigned to TFOS: {already_correct}")
     print(f"   Need to update: {needs_update}")
 
@@ -92,38 +75,13 @@ def fix_tfos():
         print("   Cancelled.")
         return
 
-    updated = 0
-    errors = 0
-    batch = []
-
-    for t in tfos_tasks:
-        if t.get('team_id') != tfos_team_id:
-            batch.append(t['id'])
-
-            if len(batch) >= 100:
-                try:
-                    for task_id in batch:
-                        supabase.table('task_completions').update({
-                            'team_id': tfos_team_id
-                        }).eq('id', task_id).execute()
-                    updated += len(batch)
-                    print(f"   Updated {updated} tasks...")
-                except Exception as e:
-                    errors += len(batch)
-                    print(f"   Error: {e}")
-                batch = []
-
-    # Process remaining batch
-    if batch:
-        try:
-            for task_id in batch:
-                supabase.table('task_completions').update({
-                    'team_id': tfos_team_id
-                }).eq('id', task_id).execute()
-            updated += len(batch)
-        except Exception as e:
-            errors += len(batch)
-            print(f"   Error: {e}")
+    # One UPDATE in the database with the same match - no IDs round-trip
+    try:
+        updated = assign_signed_to_team(supabase, TFOS_INITIALS, tfos_team_id)
+        errors = 0
+    except Exception as e:
+        print(f"   Error updating tasks: {e}")
+        updated, errors = 0, needs_update
 
     print(f"\n   Updated: {updated}")
     print(f"   Errors: {errors}")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Persistent ingest manifest - remembers which workbooks have already been
+parsed and uploaded so unchanged files can be skipped on the next run.
+
+Each entry stores the file's size, mtime and SHA-256, plus a hash of the
+rows it produced. A file is unchanged if its size and mtime match (or, if
+they moved, its content hash still matches).
+"""
+
+import hashlib
+import json
+import os
+
+MANIFEST_NAME = ".ingest_manifest.json"
+
+
+def file_sha256(file_path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def rows_sha256(rows):
+    """Stable hash of parsed rows (dates and other values hashed via str)"""
+    payload = json.dumps(rows, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class IngestManifest:
+    """JSON-backed manifest keyed by absolute file path"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"  Warning: could not read manifest {path}: {e}")
+
+    def _key(self, file_path):
+        return os.path.abspath(file_path)
+
+    def is_unchanged(self, file_path):
+        """True if the file matches its manifest entry"""
+        entry = self.entries.get(self._key(file_path))
+        if not entry:
+            return False
+
+        stat = os.stat(file_path)
+        if entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            return True
+
+        # Touched but maybe not modified (e.g. re-downloaded) - compare content
+        if entry['size'] == stat.st_size and entry['sha256'] == file_sha256(file_path):
+            entry['mtime'] = stat.st_mtime
+            return True
+        return False
+
+    def rows_unchanged(self, file_path, rows):
+        """True if the rows parsed from a file match what was last uploaded"""
+        entry = self.entries.get(self._key(file_path))
+        return bool(entry) and entry.get('rows_sha256') == rows_sha256(rows)
+
+    def record(self, file_path, rows):
+        """Record a file as ingested with the rows it produced"""
+        self.record_hash(file_path, rows_sha256(rows))
+
+    def record_hash(self, file_path, rows_hash):
+        """Record a file as ingested, given the hash of its rows"""
+        stat = os.stat(file_path)
+        self.entries[self._key(file_path)] = {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'sha256': file_sha256(file_path),
+            'rows_sha256': rows_hash,
+        }
+
+    def save(self):
+        """Write the manifest atomically"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Checkpoint journal for long-running maintenance jobs.
+
+A job records each unit of work (a row id, a task name, ...) in a local
+SQLite file as soon as it's done. After a crash or network failure the
+rerun asks pending() for what's left and skips the rest, instead of
+re-sending every update. When the job finishes, complete() clears its
+entries so the next run starts fresh.
+
+The journal also prints a progress line with the rate and ETA every few
+seconds.
+
+    journal = JobJournal('update_phases', total=len(names))
+    for name in journal.pending(names):
+        ...
+        journal.record(name)
+    journal.complete()
+"""
+
+import os
+import sqlite3
+import time
+
+JOURNAL_FILE = ".job_journal.sqlite"
+
+# Seconds between progress lines
+REPORT_SECONDS = 5.0
+
+
+def format_duration(seconds):
+    """h:mm:ss or m:ss"""
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+class JobJournal:
+    """Completed work units of one job, persisted in a SQLite file"""
+
+    def __init__(self, job, total=None, path=JOURNAL_FILE, unit_label='units',
+                 report_every=REPORT_SECONDS):
+        self.job = job
+        self.total = total
+        self.path = path
+        self.unit_label = unit_label
+        self.report_every = report_every
+
+        self._db = sqlite3.connect(path)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS completed_units (
+                job TEXT NOT NULL,
+                unit TEXT NOT NULL,
+                done_at REAL NOT NULL,
+                PRIMARY KEY (job, unit)
+            )
+        """)
+        self._db.commit()
+        self.done = {row[0] for row in self._db.execute(
+            "SELECT unit FROM completed_units WHERE job = ?", (job,))}
+        self.resumed = len(self.done)
+
+        self.recorded = 0
+        self.started = time.perf_counter()
+        self._last_report = self.started
+        if self.resumed:
+            print(f"   Resuming {job}: {self.resumed} {unit_label} already done ({path})")
+
+    def __contains__(self, unit):
+        return str(unit) in self.done
+
+    def pending(self, units):
+        """The units not yet recorded as done, in their original order"""
+        return [u for u in units if str(u) not in self.done]
+
+    def record(self, unit):
+        """Mark one unit done"""
+        self.record_many([unit])
+
+    def record_many(self, units):
+        """Mark several units done in one transaction"""
+        keys = [str(u) for u in units if str(u) not in self.done]
+        if not keys:
+            return
+        now = time.time()
+        self._db.executemany(
+            "INSERT OR IGNORE INTO completed_units (job, unit, done_at) VALUES (?, ?, ?)",
+            [(self.job, key, now) for key in keys])
+        self._db.commit()
+        self.done.update(keys)
+        self.recorded += len(keys)
+
+        if self.report_every and time.perf_counter() - self._last_report >= self.report_every:
+            self._last_report = time.perf_counter()
+            print(f"   {self.progress()}")
+
+    def rate(self):
+        """Units recorded per second in this run"""
+        elapsed = time.perf_counter() - self.started
+        return self.recorded / elapsed if elapsed > 0 else 0.0
+
+    def progress(self):
+        """'1200/30000 units (4.0%), 85/s, ETA 5:38'"""
+        rate = self.rate()
+        if not self.total:
+            return f"{len(self.done)} {self.unit_label}, {rate:.0f}/s"
+        done = min(len(self.done), self.total)
+        remaining = self.total - done
+        eta = format_duration(remaining / rate) if rate > 0 else '?'
+        return (f"{done}/{self.total} {self.unit_label} ({done / self.total * 100:.1f}%), "
+                f"{rate:.0f}/s, ETA {eta}")
+
+    def reset(self):
+        """Forget this job's progress"""
+        self._db.execute("DELETE FROM completed_units WHERE job = ?", (self.job,))
+        self._db.commit()
+        self.done = set()
+        self.resumed = 0
+
+    def complete(self):
+        """
+        The job finished: clear its entries so the next run starts from
+        scratch. Returns a summary line.
+        """
+        elapsed = time.perf_counter() - self.started
+        summary = (f"{self.recorded} {self.unit_label} in {format_duration(elapsed)}"
+                   + (f" ({self.resumed} skipped from an earlier run)" if self.resumed else ''))
+        self.reset()
+        self.close()
+        return summary
+
+    def close(self):
+        """Close the file, removing it once no job has entries left"""
+        empty = self._db.execute("SELECT 1 FROM completed_units LIMIT 1").fetchone() is None
+        self._db.close()
+        if empty and os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Compiled index of the Work2Sheets Masters "Master Data" sheet.
+
+The sheet is read once, in a single streaming pass, into
+task name -> {phase, minutes, num_people}. The result is cached next to
+the workbook keyed by the workbook's SHA-256, so later enrichment jobs
+load it in milliseconds instead of re-parsing the xlsx.
+
+Columns used: A Phase, B Task, M Number Of People, N Total Hours.
+"""
+
+import json
+import os
+from datetime import time, datetime
+
+import openpyxl
+
+from ingest_manifest import file_sha256
+
+MASTER_FILE = "/Users/safmy/Desktop/Code_and_Scripts/REPOS/train-task-tracker/Work2Sheets Masters.xlsx"
+MASTER_SHEET = "Master Data"
+CACHE_SUFFIX = ".index.json"
+
+# Bump when the index format or parsing rules change to invalidate caches
+INDEX_VERSION = 1
+
+
+def parse_timing(value):
+    """
+    Parse timing value from Excel.
+    Format is HH:MM:SS where we want total minutes.
+
+    For datetime values (Excel corruption), we try to extract the time part.
+    For values like 1900-02-14 where 45 was entered, we can't recover the original.
+    """
+    if value is None:
+        return None
+
+    if isinstance(value, time):
+        # HH:MM:SS -> convert to minutes
+        # Note: seconds component seems to sometimes contain minutes
+        # e.g., 00:00:45 might mean 45 minutes, not 45 seconds
+        total_mins = value.hour * 60 + value.minute
+        if total_mins == 0 and value.second > 0:
+            total_mins = value.second
+        return total_mins
+
+    if isinstance(value, datetime):
+        # Excel corruption - extract time part
+        total_mins = value.hour * 60 + value.minute
+        if total_mins == 0 and value.second > 0:
+            total_mins = value.second
+        return total_mins if total_mins > 0 else None
+
+    if isinstance(value, str):
+        # Parse HH:MM:SS string
+        try:
+            parts = value.split(':')
+            if len(parts) == 3:
+                h, m, s = int(parts[0]), int(parts[1]), int(parts[2])
+                total_mins = h * 60 + m
+                if total_mins == 0 and s > 0:
+                    total_mins = s
+                return total_mins
+            elif len(parts) == 2:
+                h, m = int(parts[0]), int(parts[1])
+                return h * 60 + m
+        except:
+            pass
+
+    if isinstance(value, (int, float)):
+        # Numeric - could be fraction of a day or direct minutes
+        if value < 1:
+            return round(value * 24 * 60)
+        else:
+            return round(value)
+
+    return None
+
+
+def normalize_task_key(name):
+    """
+    Join key for task names: upper-cased, trimmed, whitespace collapsed.
+    Must match normalize_task_name() in migrations/006_master_enrichment.sql.
+    """
+    return ' '.join(str(name).split()).upper()
+
+
+def normalize_phase(phase):
+    """Tidy a phase name (handles Catch back / Catchback variations)"""
+    phase_str = str(phase).strip()
+    if phase_str.lower() in ['catch back', 'catchback']:
+        phase_str = 'Catchback'
+    return phase_str
+
+
+def parse_num_people(people):
+    """Number of people for a task, defaulting to 1"""
+    if people is None:
+        return 1
+    try:
+        return max(1, int(people))
+    except (ValueError, TypeError):
+        return 1
+
+
+def build_index(master_file):
+    """
+    Read the Master Data sheet in one streaming pass.
+
+    Per task (key: stripped, upper-cased name):
+    - phase: last non-empty phase seen
+    - minutes: first parseable Total Hours value (None if never parseable)
+    - num_people: from the task's first row
+    """
+    wb = openpyxl.load_workbook(master_file, read_only=True, data_only=True, keep_links=False)
+    try:
+        if MASTER_SHEET not in wb.sheetnames:
+            raise KeyError(f"'{MASTER_SHEET}' sheet not found in {master_file}")
+        sheet = wb[MASTER_SHEET]
+        sheet.reset_dimensions()
+
+        tasks = {}
+        timing_issues = {}
+        for row in sheet.iter_rows(min_row=2, max_col=14, values_only=True):
+            phase, task = row[0], row[1]
+            people, timing = row[12], row[13]
+            if not task:
+                continue
+
+            key = str(task).strip().upper()
+            entry = tasks.get(key)
+            if entry is None:
+                entry = tasks[key] = {'phase': None, 'minutes': None,
+                                      'num_people': parse_num_people(people)}
+
+            if phase:
+                entry['phase'] = normalize_phase(phase)
+
+            if entry['minutes'] is None:
+                minutes = parse_timing(timing)
+                if minutes is not None:
+                    entry['minutes'] = minutes
+                elif timing is not None and key not in timing_issues:
+                    timing_issues[key] = (key[:50], str(timing), type(timing).__name__)
+    finally:
+        wb.close()
+
+    # Tasks that later got a valid timing aren't issues
+    timing_issues = [issue for key, issue in timing_issues.items() if tasks[key]['minutes'] is None]
+    return {'tasks': tasks, 'timing_issues': timing_issues}
+
+
+def load_master_index(master_file=MASTER_FILE, use_cache=True):
+    """
+    Load the Master Data index, building and caching it if the workbook
+    changed since the cache was written.
+    """
+    cache_file = master_file + CACHE_SUFFIX
+    sha256 = file_sha256(master_file)
+
+    if use_cache and os.path.exists(cache_file):
+        try:
+            with open(cache_file) as f:
+                cached = json.load(f)
+            if cached.get('sha256') == sha256 and cached.get('version') == INDEX_VERSION:
+                return cached['index']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    index = build_index(master_file)
+
+    if use_cache:
+        tmp_file = cache_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump({'sha256': sha256, 'version': INDEX_VERSION, 'index': index}, f)
+        os.replace(tmp_file, cache_file)
+
+    return index
+
+
+def phases_by_task(index):
+    """task -> phase for tasks that have one"""
+    return {task: e['phase'] for task, e in index['tasks'].items() if e['phase']}
+
+
+def minutes_by_task(index):
+    """task -> minutes for tasks with parseable timing"""
+    return {task: e['minutes'] for task, e in index['tasks'].items() if e['minutes'] is not None}
+
+
+def people_by_task(index):
+    """task -> number of people"""
+    return {task: e['num_people'] for task, e in index['tasks'].items()}
@@ -0,0 +1,83 @@
+-- Replace a unit's cars and task completions from one JSONB snapshot
+-- Called by sync_worksheets.py --replace via supabase.rpc('replace_unit_snapshot', ...)
+--
+-- Snapshot format:
+-- {
+--   "unit_number": "96021",
+--   "train_name": "T33 (Train 021-094)",
+--   "train_number": 33,
+--   "phase": "Phase 3",
+--   "cars": [
+--     {
+--       "car_type_id": "<uuid>",
+--       "car_number": "...",
+--       "tasks": [
+--         {"task_name": "...", "description": "...", "status": "completed",
+--          "completed_by": ["AS", "JT"], "sort_order": 1}
+--       ]
+--     }
+--   ]
+-- }
+--
+-- Runs as a single transaction: either the whole unit is replaced or nothing changes.
+
+CREATE OR REPLACE FUNCTION replace_unit_snapshot(snapshot JSONB)
+RETURNS JSONB AS $$
+DECLARE
+    v_unit_id UUID;
+    v_car JSONB;
+    v_car_id UUID;
+    v_cars INTEGER := 0;
+    v_tasks INTEGER := 0;
+    v_inserted INTEGER;
+BEGIN
+    -- Create or update the unit
+    INSERT INTO train_units (unit_number, train_name, train_number, phase, is_active, last_synced_at)
+    VALUES (
+        snapshot->>'unit_number',
+        snapshot->>'train_name',
+        (snapshot->>'train_number')::INTEGER,
+        snapshot->>'phase',
+        true,
+        NOW()
+    )
+    ON CONFLICT (unit_number) DO UPDATE SET
+        train_name = EXCLUDED.train_name,
+        train_number = EXCLUDED.train_number,
+        phase = EXCLUDED.phase,
+        last_synced_at = EXCLUDED.last_synced_at
+    RETURNING id INTO v_unit_id;
+
+    -- Remove the unit's existing cars and task completions
+    DELETE FROM task_completions
+    WHERE car_id IN (SELECT id FROM cars WHERE unit_id = v_unit_id);
+    DELETE FROM cars WHERE unit_id = v_unit_id;
+
+    -- Recreate cars and their task completions
+    FOR v_car IN SELECT * FROM jsonb_array_elements(COALESCE(snapshot->'cars', '[]'::JSONB))
+    LOOP
+        INSERT INTO cars (unit_id, car_type_id, car_number)
+        VALUES (v_unit_id, (v_car->>'car_type_id')::UUID, v_car->>'car_number')
+        RETURNING id INTO v_car_id;
+        v_cars := v_cars + 1;
+
+        INSERT INTO task_completions (car_id, task_name, description, status, completed_by, sort_order)
+        SELECT
+            v_car_id,
+            t->>'task_name',
+            t->>'description',
+            t->>'status',
+            ARRAY(SELECT jsonb_array_elements_text(COALESCE(t->'completed_by', '[]'::JSONB))),
+            (t->>'sort_order')::INTEGER
+        FROM jsonb_array_elements(COALESCE(v_car->'tasks', '[]'::JSONB)) AS t;
+
+        GET DIAGNOSTICS v_inserted = ROW_COUNT;
+        v_tasks := v_tasks + v_inserted;
+    END LOOP;
+
+    RETURN jsonb_build_object('unit_id', v_unit_id, 'cars', v_cars, 'tasks', v_tasks);
+END;
+$$ LANGUAGE plpgsql;
+
+GRANT EXECUTE ON FUNCTION replace_unit_snapshot(JSONB) TO anon;
+GRANT EXECUTE ON FUNCTION replace_unit_snapshot(JSONB) TO authenticated;
@@ -0,0 +1,20 @@
+-- Natural key for the tasks table so re-running an ingest updates rows instead of duplicating them
+-- parse_and_upload.py upserts with on_conflict=unit_id,car_type_id,task_number,task_name
+
+-- Remove duplicates left by earlier ingests, keeping the most recently created row
+DELETE FROM tasks
+WHERE id IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY unit_id, car_type_id, task_number, task_name
+            ORDER BY created_at DESC, id DESC
+        ) AS rn
+        FROM tasks
+    ) ranked
+    WHERE rn > 1
+);
+
+-- car_type_id can be NULL when a sheet's car type isn't matched, so treat NULLs as equal
+ALTER TABLE tasks DROP CONSTRAINT IF EXISTS tasks_natural_key;
+ALTER TABLE tasks
+ADD CONSTRAINT tasks_natural_key UNIQUE NULLS NOT DISTINCT (unit_id, car_type_id, task_number, task_name);
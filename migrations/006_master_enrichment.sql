@@ -0,0 +1,74 @@
+-- Fused enrichment of task_completions from the Work2Sheets Masters sheet
+-- enrich_from_master.py bulk-loads master_task_enrichment, then calls apply_master_enrichment()
+-- which sets phase, total_minutes and number_of_people with one set-based UPDATE ... FROM
+
+-- Column written by update_number_of_people.py
+ALTER TABLE task_completions ADD COLUMN IF NOT EXISTS number_of_people INTEGER DEFAULT 1;
+
+-- Join key: upper-cased, trimmed, internal whitespace collapsed
+-- (must match master_data.normalize_task_key in Python)
+CREATE OR REPLACE FUNCTION normalize_task_name(name TEXT)
+RETURNS TEXT AS $$
+    SELECT upper(btrim(regexp_replace(name, '\s+', ' ', 'g')));
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Staging table, replaced wholesale on each run
+CREATE TABLE IF NOT EXISTS master_task_enrichment (
+    task_key TEXT PRIMARY KEY,
+    phase VARCHAR(50),
+    total_minutes INTEGER,
+    number_of_people INTEGER,
+    loaded_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE master_task_enrichment ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "Allow all operations" ON master_task_enrichment;
+CREATE POLICY "Allow all operations" ON master_task_enrichment FOR ALL USING (true) WITH CHECK (true);
+GRANT ALL ON master_task_enrichment TO anon;
+GRANT ALL ON master_task_enrichment TO authenticated;
+
+-- Apply all three columns in one pass; NULL staging values leave the column alone.
+-- Returns the number of rows changed per column.
+CREATE OR REPLACE FUNCTION apply_master_enrichment()
+RETURNS JSONB AS $$
+DECLARE
+    v_result JSONB;
+BEGIN
+    WITH candidates AS (
+        SELECT
+            tc.id,
+            m.phase,
+            m.total_minutes,
+            m.number_of_people,
+            (m.phase IS NOT NULL AND tc.phase IS DISTINCT FROM m.phase) AS phase_changed,
+            (m.total_minutes IS NOT NULL AND tc.total_minutes IS DISTINCT FROM m.total_minutes) AS minutes_changed,
+            (m.number_of_people IS NOT NULL AND tc.number_of_people IS DISTINCT FROM m.number_of_people) AS people_changed
+        FROM task_completions tc
+        JOIN master_task_enrichment m ON m.task_key = normalize_task_name(tc.task_name)
+    ),
+    updated AS (
+        UPDATE task_completions tc SET
+            phase = CASE WHEN c.phase_changed THEN c.phase ELSE tc.phase END,
+            total_minutes = CASE WHEN c.minutes_changed THEN c.total_minutes ELSE tc.total_minutes END,
+            number_of_people = CASE WHEN c.people_changed THEN c.number_of_people ELSE tc.number_of_people END
+        FROM candidates c
+        WHERE tc.id = c.id
+          AND (c.phase_changed OR c.minutes_changed OR c.people_changed)
+        RETURNING c.phase_changed, c.minutes_changed, c.people_changed
+    )
+    SELECT jsonb_build_object(
+        'rows_updated', COUNT(*),
+        'phase', COUNT(*) FILTER (WHERE phase_changed),
+        'total_minutes', COUNT(*) FILTER (WHERE minutes_changed),
+        'number_of_people', COUNT(*) FILTER (WHERE people_changed),
+        'rows_matched', (SELECT COUNT(*) FROM candidates)
+    )
+    INTO v_result
+    FROM updated;
+
+    RETURN v_result;
+END;
+$$ LANGUAGE plpgsql;
+
+GRANT EXECUTE ON FUNCTION apply_master_enrichment() TO anon;
+GRANT EXECUTE ON FUNCTION apply_master_enrichment() TO authenticated;
@@ -0,0 +1,32 @@
+-- Pre-aggregated efficiency rollup, rebuilt by rollup_efficiency.py
+-- One row per (work day, team, person initial, phase) for completed tasks, so the
+-- dashboard and reports read a few hundred rows instead of every task_completion.
+--
+-- team:           team assigned in the database ('Night Shift' reported as 'Team D',
+--                 'TFOS' when unassigned but TFOS signed it off, else 'No Team')
+-- task_count:     completed tasks this person signed off
+-- task_minutes:   their share of total_minutes (split evenly between initials)
+-- person_minutes: task_minutes x number_of_people (man-minutes of work)
+-- shift:          'night' for the night shift team, else 'day'
+
+CREATE TABLE IF NOT EXISTS efficiency_daily (
+    work_date DATE NOT NULL,
+    team TEXT NOT NULL,
+    initial TEXT NOT NULL,
+    phase TEXT NOT NULL DEFAULT '',
+    shift TEXT NOT NULL DEFAULT 'day' CHECK (shift IN ('day', 'night')),
+    task_count INTEGER NOT NULL DEFAULT 0,
+    task_minutes NUMERIC NOT NULL DEFAULT 0,
+    person_minutes NUMERIC NOT NULL DEFAULT 0,
+    refreshed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (work_date, team, initial, phase)
+);
+
+-- Dashboard reads by team over a date range
+CREATE INDEX IF NOT EXISTS idx_efficiency_daily_team_date ON efficiency_daily(team, work_date);
+
+ALTER TABLE efficiency_daily ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "Allow all operations" ON efficiency_daily;
+CREATE POLICY "Allow all operations" ON efficiency_daily FOR ALL USING (true) WITH CHECK (true);
+GRANT ALL ON efficiency_daily TO anon;
+GRANT ALL ON efficiency_daily TO authenticated;
@@ -0,0 +1,43 @@
+-- Change notifications for rollup_daemon.py --listen
+-- Every insert/update/delete on task_completions sends a NOTIFY on channel
+-- task_completion_changes with the row id and the completed_at day before and
+-- after the change, so the daemon can recompute exactly the efficiency_daily
+-- days a change touched (including the day a row moved away from, and deletes).
+--
+-- Only needed when the daemon connects to the database directly; in polling
+-- mode it reads updated_at (maintained by update_task_completions_updated_at).
+
+CREATE OR REPLACE FUNCTION notify_task_completion_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_id UUID;
+    v_old_date DATE;
+    v_new_date DATE;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        v_id := OLD.id;
+        v_old_date := OLD.completed_at::DATE;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        v_id := NEW.id;
+        v_new_date := NEW.completed_at::DATE;
+    END IF;
+
+    PERFORM pg_notify('task_completion_changes', json_build_object(
+        'id', v_id,
+        'op', TG_OP,
+        'old_date', v_old_date,
+        'new_date', v_new_date
+    )::TEXT);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS task_completions_notify ON task_completions;
+CREATE TRIGGER task_completions_notify
+    AFTER INSERT OR UPDATE OR DELETE ON task_completions
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_task_completion_change();
+
+-- Polling mode pages through changes ordered by (updated_at, id)
+CREATE INDEX IF NOT EXISTS idx_task_completions_updated_at ON task_completions(updated_at, id);
@@ -0,0 +1,6 @@
+-- Initial -> rows index on task_completions.completed_by (a TEXT[] of initials)
+-- Lets reattribute_teams.py find the completions signed by the initials that
+-- moved team with a containment filter (completed_by @> '{XX}') instead of
+-- scanning the whole table.
+
+CREATE INDEX IF NOT EXISTS idx_task_completions_completed_by ON task_completions USING GIN (completed_by);
@@ -0,0 +1,154 @@
+-- People dimension and task_completion_people junction
+-- completed_by stays on task_completions (the sheets and sync_worksheets.py write it),
+-- but each initial is also stored as one junction row, so per-person and per-team
+-- queries are indexed lookups on (person_id, completed_at) instead of fetching every
+-- completion and unnesting the array in application code.
+--
+-- people:                  one row per initial; team_id is kept in line with
+--                          team_membership.json by people.py, active_from/active_to
+--                          are the first and last days the initial signed a task
+-- task_completion_people:  one row per (completion, person), with the completion's
+--                          completed_at and the person's share of total_minutes
+--
+-- The junction is filled set-based by link_task_completion_people(): statement-level
+-- triggers call it once per INSERT/UPDATE statement with every row that statement
+-- touched, so the batched inserts of migrate_to_cars.py, sync_worksheets.py and
+-- replace_unit_snapshot() populate it in bulk. Deletes cascade.
+
+CREATE TABLE IF NOT EXISTS people (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    initials TEXT NOT NULL UNIQUE,
+    team_id UUID REFERENCES teams(id) ON DELETE SET NULL,
+    active_from DATE,
+    active_to DATE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_people_team_id ON people(team_id);
+
+CREATE TABLE IF NOT EXISTS task_completion_people (
+    task_completion_id UUID NOT NULL REFERENCES task_completions(id) ON DELETE CASCADE,
+    person_id UUID NOT NULL REFERENCES people(id) ON DELETE CASCADE,
+    completed_at TIMESTAMP WITH TIME ZONE,
+    minutes_share NUMERIC NOT NULL DEFAULT 0,
+    PRIMARY KEY (task_completion_id, person_id)
+);
+
+-- Per-person over a date range, and everyone on a date range
+CREATE INDEX IF NOT EXISTS idx_task_completion_people_person_date ON task_completion_people(person_id, completed_at);
+CREATE INDEX IF NOT EXISTS idx_task_completion_people_date ON task_completion_people(completed_at);
+
+ALTER TABLE people ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "Allow all operations" ON people;
+CREATE POLICY "Allow all operations" ON people FOR ALL USING (true) WITH CHECK (true);
+GRANT ALL ON people TO anon;
+GRANT ALL ON people TO authenticated;
+
+ALTER TABLE task_completion_people ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "Allow all operations" ON task_completion_people;
+CREATE POLICY "Allow all operations" ON task_completion_people FOR ALL USING (true) WITH CHECK (true);
+GRANT ALL ON task_completion_people TO anon;
+GRANT ALL ON task_completion_people TO authenticated;
+
+-- Initials of the given completions (all when p_ids is NULL), upper-cased and trimmed
+-- like analyze_team_data.parse_initials, with total_minutes split evenly between them
+CREATE OR REPLACE FUNCTION task_completion_initials(p_ids UUID[])
+RETURNS TABLE (task_completion_id UUID, initials TEXT, completed_at TIMESTAMP WITH TIME ZONE, minutes_share NUMERIC) AS $$
+    SELECT
+        s.id,
+        s.initials,
+        s.completed_at,
+        SUM(s.minutes_share)
+    FROM (
+        SELECT
+            tc.id,
+            upper(btrim(i.initial)) AS initials,
+            tc.completed_at,
+            COALESCE(tc.total_minutes, 0)::NUMERIC
+                / COUNT(*) OVER (PARTITION BY tc.id) AS minutes_share
+        FROM task_completions tc
+        CROSS JOIN LATERAL unnest(tc.completed_by) AS i(initial)
+        WHERE (p_ids IS NULL OR tc.id = ANY(p_ids))
+          AND btrim(i.initial) <> ''
+    ) s
+    GROUP BY s.id, s.initials, s.completed_at;
+$$ LANGUAGE sql STABLE;
+
+-- Rebuild the junction rows of the given completions (all when p_ids is NULL).
+-- Initials seen for the first time get a people row without a team.
+-- Returns the number of junction rows written.
+CREATE OR REPLACE FUNCTION link_task_completion_people(p_ids UUID[] DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    v_linked INTEGER;
+BEGIN
+    DELETE FROM task_completion_people
+    WHERE p_ids IS NULL OR task_completion_id = ANY(p_ids);
+
+    INSERT INTO people (initials, active_from, active_to)
+    SELECT initials, MIN(completed_at)::DATE, MAX(completed_at)::DATE
+    FROM task_completion_initials(p_ids)
+    GROUP BY initials
+    ON CONFLICT (initials) DO UPDATE SET
+        active_from = LEAST(people.active_from, EXCLUDED.active_from),
+        active_to = GREATEST(people.active_to, EXCLUDED.active_to);
+
+    INSERT INTO task_completion_people (task_completion_id, person_id, completed_at, minutes_share)
+    SELECT s.task_completion_id, p.id, s.completed_at, s.minutes_share
+    FROM task_completion_initials(p_ids) s
+    JOIN people p ON p.initials = s.initials;
+
+    GET DIAGNOSTICS v_linked = ROW_COUNT;
+    RETURN v_linked;
+END;
+$$ LANGUAGE plpgsql;
+
+GRANT EXECUTE ON FUNCTION link_task_completion_people(UUID[]) TO anon;
+GRANT EXECUTE ON FUNCTION link_task_completion_people(UUID[]) TO authenticated;
+
+CREATE OR REPLACE FUNCTION link_inserted_task_completions()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM link_task_completion_people(ARRAY(SELECT id FROM new_rows));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Only rows whose initials, date or minutes changed need relinking
+CREATE OR REPLACE FUNCTION link_updated_task_completions()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_ids UUID[];
+BEGIN
+    SELECT ARRAY(
+        SELECT n.id
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        WHERE n.completed_by IS DISTINCT FROM o.completed_by
+           OR n.completed_at IS DISTINCT FROM o.completed_at
+           OR n.total_minutes IS DISTINCT FROM o.total_minutes
+    ) INTO v_ids;
+
+    IF cardinality(v_ids) > 0 THEN
+        PERFORM link_task_completion_people(v_ids);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS task_completions_link_people_insert ON task_completions;
+CREATE TRIGGER task_completions_link_people_insert
+    AFTER INSERT ON task_completions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION link_inserted_task_completions();
+
+DROP TRIGGER IF EXISTS task_completions_link_people_update ON task_completions;
+CREATE TRIGGER task_completions_link_people_update
+    AFTER UPDATE ON task_completions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION link_updated_task_completions();
+
+-- Backfill existing completions
+SELECT link_task_completion_people();
@@ -0,0 +1,98 @@
+-- Set-based tasks -> cars + task_completions migration
+-- Called by migrate_to_cars.py via supabase.rpc('migrate_tasks_to_cars', ...)
+--
+-- p_team_map:  {"AS": "Team A", ...}  initial -> team name (team_membership.json)
+-- p_phase_map: {"TASK NAME": "Phase", ...}  normalize_task_name(task_name) -> phase
+--
+-- Runs as a single transaction: cars and task_completions are replaced from tasks
+-- with three statements (clear, INSERT ... SELECT cars, INSERT ... SELECT completions)
+-- or nothing changes. Rules match the per-unit fallback in migrate_to_cars.py:
+--   - one car per (unit_id, car_type_id); its number is the first task's task_number
+--     (in created_at, id order), else its position within the unit
+--   - sort_order follows created_at, id within the car
+--   - status 'not_started' becomes 'pending'
+--   - completed_by is split on commas; team_id is the team of the first initial
+--     that belongs to a team
+-- Cars whose number collides with another car of the unit are skipped with their tasks.
+
+CREATE OR REPLACE FUNCTION migrate_tasks_to_cars(p_team_map JSONB, p_phase_map JSONB)
+RETURNS JSONB AS $$
+DECLARE
+    v_cars INTEGER;
+    v_tasks INTEGER;
+BEGIN
+    DELETE FROM task_completions WHERE true;
+    DELETE FROM cars WHERE true;
+
+    WITH firsts AS (
+        SELECT DISTINCT ON (unit_id, car_type_id)
+            unit_id,
+            car_type_id,
+            NULLIF(task_number, '') AS task_number,
+            created_at,
+            id
+        FROM tasks
+        WHERE unit_id IS NOT NULL AND car_type_id IS NOT NULL
+        ORDER BY unit_id, car_type_id, created_at, id
+    )
+    INSERT INTO cars (unit_id, car_type_id, car_number)
+    SELECT
+        unit_id,
+        car_type_id,
+        LEFT(COALESCE(task_number,
+                      (ROW_NUMBER() OVER (PARTITION BY unit_id ORDER BY created_at, id))::TEXT), 50)
+    FROM firsts
+    ON CONFLICT (unit_id, car_number) DO NOTHING;
+
+    GET DIAGNOSTICS v_cars = ROW_COUNT;
+
+    WITH source AS (
+        SELECT
+            c.id AS car_id,
+            t.*,
+            ARRAY(
+                SELECT btrim(s)
+                FROM unnest(string_to_array(t.completed_by, ',')) WITH ORDINALITY AS x(s, n)
+                WHERE btrim(s) <> ''
+                ORDER BY n
+            ) AS initials,
+            ROW_NUMBER() OVER (PARTITION BY t.unit_id, t.car_type_id ORDER BY t.created_at, t.id) AS position
+        FROM tasks t
+        JOIN cars c ON c.unit_id = t.unit_id AND c.car_type_id = t.car_type_id
+    )
+    INSERT INTO task_completions (
+        car_id, task_name, description, status, completed_by, completed_at,
+        sort_order, team_id, total_minutes, num_people, phase
+    )
+    SELECT
+        s.car_id,
+        LEFT(COALESCE(s.task_name, ''), 255),
+        LEFT(NULLIF(s.description, ''), 500),
+        CASE WHEN s.status = 'not_started' THEN 'pending' ELSE COALESCE(s.status, 'pending') END,
+        NULLIF(s.initials, '{}'),
+        s.completed_date,
+        s.position,
+        (
+            SELECT tm.id
+            FROM (
+                SELECT p_team_map->>upper(btrim(i.initial)) AS team
+                FROM unnest(s.initials) WITH ORDINALITY AS i(initial, n)
+                WHERE p_team_map ? upper(btrim(i.initial))
+                ORDER BY i.n
+                LIMIT 1
+            ) first_team
+            JOIN teams tm ON tm.name = first_team.team
+        ),
+        COALESCE(s.total_minutes, 0),
+        COALESCE(s.num_people, 1),
+        p_phase_map->>normalize_task_name(s.task_name)
+    FROM source s;
+
+    GET DIAGNOSTICS v_tasks = ROW_COUNT;
+
+    RETURN jsonb_build_object('cars', v_cars, 'tasks', v_tasks);
+END;
+$$ LANGUAGE plpgsql;
+
+GRANT EXECUTE ON FUNCTION migrate_tasks_to_cars(JSONB, JSONB) TO anon;
+GRANT EXECUTE ON FUNCTION migrate_tasks_to_cars(JSONB, JSONB) TO authenticated;
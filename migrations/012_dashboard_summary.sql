@@ -0,0 +1,83 @@
+-- Everything the efficiency dashboard shows without a train filter, server-side
+-- The dashboard used to page through every task_completion; it now reads
+-- efficiency_daily for task hours and person-days, and these views for task counts.
+--
+-- efficiency_daily:        also holds completed tasks without a completed_at date
+--                          (work_date NULL). Their minutes count towards the team, as
+--                          on the dashboard, but they add no person-days.
+--                          person_minutes uses the dashboard's people per task
+--                          (src/data/taskPeople.json) rather than number_of_people.
+-- completion_status_counts: tasks per (train, team, status). team is attributed like
+--                          rollup_efficiency.attribute_team: the database team
+--                          ('Night Shift' reported as 'Team D'), 'TFOS' when unassigned
+--                          but TFOS signed it off, else 'No Team'.
+-- completions_by_day:      tasks of any status per completed_at date
+
+ALTER TABLE efficiency_daily DROP CONSTRAINT IF EXISTS efficiency_daily_pkey;
+ALTER TABLE efficiency_daily ALTER COLUMN work_date DROP NOT NULL;
+ALTER TABLE efficiency_daily DROP CONSTRAINT IF EXISTS efficiency_daily_key;
+ALTER TABLE efficiency_daily
+    ADD CONSTRAINT efficiency_daily_key UNIQUE NULLS NOT DISTINCT (work_date, team, initial, phase);
+
+CREATE OR REPLACE VIEW completion_status_counts AS
+SELECT
+    tu.train_number,
+    COALESCE(
+        CASE WHEN t.name = 'Night Shift' THEN 'Team D' ELSE t.name END,
+        CASE WHEN EXISTS (SELECT 1 FROM unnest(tc.completed_by) AS i WHERE upper(i) LIKE '%TFOS%')
+             THEN 'TFOS' ELSE 'No Team' END
+    ) AS team,
+    t.color,
+    tc.status,
+    COUNT(*) AS task_count
+FROM task_completions tc
+LEFT JOIN teams t ON t.id = tc.team_id
+LEFT JOIN cars c ON c.id = tc.car_id
+LEFT JOIN train_units tu ON tu.id = c.unit_id
+GROUP BY 1, 2, 3, 4;
+
+CREATE OR REPLACE VIEW completions_by_day AS
+SELECT
+    (completed_at AT TIME ZONE 'UTC')::DATE AS work_date,
+    COUNT(*) AS task_count
+FROM task_completions
+WHERE completed_at IS NOT NULL
+GROUP BY 1;
+
+GRANT SELECT ON completion_status_counts TO anon;
+GRANT SELECT ON completion_status_counts TO authenticated;
+GRANT SELECT ON completions_by_day TO anon;
+GRANT SELECT ON completions_by_day TO authenticated;
+
+-- rollup_daemon.py --listen: old_date/new_date are now the efficiency_daily day a row
+-- counts towards - its completed_at day, 'undated' when completed without a date, and
+-- NULL when it isn't completed (it isn't in the rollup)
+CREATE OR REPLACE FUNCTION notify_task_completion_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_id UUID;
+    v_old_date TEXT;
+    v_new_date TEXT;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        v_id := OLD.id;
+        IF OLD.status = 'completed' THEN
+            v_old_date := COALESCE(OLD.completed_at::DATE::TEXT, 'undated');
+        END IF;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        v_id := NEW.id;
+        IF NEW.status = 'completed' THEN
+            v_new_date := COALESCE(NEW.completed_at::DATE::TEXT, 'undated');
+        END IF;
+    END IF;
+
+    PERFORM pg_notify('task_completion_changes', json_build_object(
+        'id', v_id,
+        'op', TG_OP,
+        'old_date', v_old_date,
+        'new_date', v_new_date
+    )::TEXT);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
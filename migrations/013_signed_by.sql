@@ -0,0 +1,43 @@
+-- Completions signed by given initials, whatever case or padding the sheets used
+-- completed_by keeps the spelling typed in the sheets ('TFOS', 'Tfos', ' tfos', ...) and
+-- array containment is case-sensitive, so tools can't match an initial with completed_by
+-- filters. The task_completion_people junction (010_task_completion_people.sql) links
+-- every completion to people.initials, which are trimmed and upper-cased, so matching
+-- goes through it instead.
+--
+-- task_completions_signed_by(p_initials): the completions, as rows of task_completions -
+--     callable with supabase.rpc(...) and filterable/selectable/countable like the table
+-- assign_signed_to_team(p_initials, p_team_id): set team_id on those completions in one
+--     UPDATE (rows already on the team are left alone); returns the rows changed
+
+CREATE OR REPLACE FUNCTION task_completions_signed_by(p_initials TEXT[])
+RETURNS SETOF task_completions AS $$
+    SELECT tc.*
+    FROM task_completions tc
+    WHERE tc.id IN (
+        SELECT tcp.task_completion_id
+        FROM task_completion_people tcp
+        JOIN people p ON p.id = tcp.person_id
+        WHERE p.initials IN (SELECT upper(btrim(i)) FROM unnest(p_initials) AS i)
+    );
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION assign_signed_to_team(p_initials TEXT[], p_team_id UUID)
+RETURNS INTEGER AS $$
+DECLARE
+    v_updated INTEGER;
+BEGIN
+    UPDATE task_completions
+    SET team_id = p_team_id
+    WHERE id IN (SELECT id FROM task_completions_signed_by(p_initials))
+      AND team_id IS DISTINCT FROM p_team_id;
+
+    GET DIAGNOSTICS v_updated = ROW_COUNT;
+    RETURN v_updated;
+END;
+$$ LANGUAGE plpgsql;
+
+GRANT EXECUTE ON FUNCTION task_completions_signed_by(TEXT[]) TO anon;
+GRANT EXECUTE ON FUNCTION task_completions_signed_by(TEXT[]) TO authenticated;
+GRANT EXECUTE ON FUNCTION assign_signed_to_team(TEXT[], UUID) TO anon;
+GRANT EXECUTE ON FUNCTION assign_signed_to_team(TEXT[], UUID) TO authenticated;
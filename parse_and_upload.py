@@ -3,11 +3,27 @@
 Parse all WorktoSheets Excel files and upload tasks to Supabase
 """
 
+import argparse
+import asyncio
+import httpx
+import io
+import json
 import openpyxl
 import os
+import queue
+import random
 import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 from datetime import datetime, time as dt_time
-from supabase import create_client
+from functools import partial
+from supabase_metrics import create_client, instrument_http
+from ingest_manifest import IngestManifest, MANIFEST_NAME, rows_sha256
+from batching import AdaptiveBatcher, post_rows
+from team_mapping import INITIAL_TO_TEAM
 
 # Supabase configuration
 SUPABASE_URL = "https://fsubmqjevlfpcirgsbhi.supabase.co"
@@ -64,22 +80,23 @@ SHEET_TO_CATEGORY = {
     "DE-Icer UNDM": "3 CAR",
 }
 
-# Team mapping - assign initials to teams
-# Based on observed patterns, distribute initials across 4 teams
-INITIAL_TO_TEAM = {
-    # Team A - general group
-    "AS": "Team A", "JT": "Team A", "CB": "Team A", "JD": "Team A",
-    "KM": "Team A", "CP": "Team A", "KA": "Team A", "TFOS": "Team A",
-    # Team B
-    "LN": "Team B", "NA": "Team B", "PS": "Team B", "AOO": "Team B",
-    "JN": "Team B", "DK": "Team B", "DH": "Team B", "JL": "Team B",
-    # Team C
-    "SC": "Team C", "MA": "Team C", "CC": "Team C", "OM": "Team C",
-    "AL": "Team C", "VN": "Team C", "RN": "Team C", "LVN": "Team C",
-    # Team D / Night Shift
-    "SA": "Night Shift", "MR": "Night Shift", "AR": "Night Shift", "DB": "Night Shift",
-    "GT": "Night Shift", "UQ": "Night Shift", "BP": "Night Shift", "RB": "Night Shift",
-}
+# Car sheets only use columns A-O (task number through total hours)
+CAR_SHEET_MAX_COL = 15
+
+# Natural key of the tasks table (migrations/005_tasks_natural_key.sql)
+TASK_NATURAL_KEY = ('unit_id', 'car_type_id', 'task_number', 'task_name')
+
+# Retry rate limiting and server errors with jittered exponential backoff
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 6
+BACKOFF_BASE = 0.5  # seconds
+BACKOFF_CAP = 30
+
+# Rows the server rejects are written here for replay (--replay)
+DEAD_LETTER_FILE = "failed_task_rows.jsonl"
+
+# How often a producer blocked on the upload queue checks the uploader is alive
+QUEUE_POLL_SECONDS = 1.0
 
 # Train to unit mapping (fallback for when filename parsing fails)
 TRAIN_UNITS = {
@@ -176,23 +193,56 @@ def get_car_type_id(car_type_name):
     return None
 
 
-def parse_worksheet(file_path):
-    """Parse a single worksheet and extract all tasks"""
+def open_workbook(file_path, streaming=True):
+    """
+    Open a worksheet workbook for reading.
+    Streaming mode uses openpyxl read-only mode: only the car sheets we
+    touch are parsed, row by row, and the VBA project is never loaded.
+    """
+    if streaming:
+        return openpyxl.load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    return openpyxl.load_workbook(file_path, data_only=True)
+
+
+def iter_task_rows(ws, min_row=3):
+    """Yield row values from a car sheet, stopping at the last row actually stored"""
+    if getattr(ws, 'reset_dimensions', None):
+        # The stored dimension is often inflated (e.g. A1:XFD1048576), and
+        # read-only mode pads out to it with empty rows. Drop it so iteration
+        # stops at the last <row> in the sheet XML. Rows are padded to a fixed
+        # width so short rows index the same as in full mode.
+        ws.reset_dimensions()
+        return ws.iter_rows(min_row=min_row, max_col=CAR_SHEET_MAX_COL, values_only=True)
+    return ws.iter_rows(min_row=min_row, values_only=True)
+
+
+class ParseError(Exception):
+    """A worksheet file that couldn't be parsed"""
+
+
+def parse_worksheet(file_path, streaming=True):
+    """Parse a single worksheet and extract all tasks. Raises ParseError if it can't be read."""
     filename = os.path.basename(file_path)
     train_id, unit1, unit2 = get_train_info_from_filename(filename)
 
     if not train_id:
-        print(f"  Could not parse train info from: {filename}")
-        return []
+        raise ParseError(f"Could not parse train info from: {filename}")
 
     print(f"\n  Parsing {train_id} (Units: {unit1}, {unit2})")
 
     try:
-        wb = openpyxl.load_workbook(file_path, data_only=True)
+        wb = open_workbook(file_path, streaming=streaming)
     except Exception as e:
-        print(f"  Error loading {filename}: {e}")
-        return []
+        raise ParseError(f"Error loading {filename}: {e}") from e
 
+    try:
+        return parse_car_sheets(wb, train_id, unit1, unit2)
+    finally:
+        wb.close()
+
+
+def parse_car_sheets(wb, train_id, unit1, unit2):
+    """Tasks from the car sheets of an open workbook"""
     all_tasks = []
 
     for sheet_name in CAR_SHEETS:
@@ -218,7 +268,7 @@ def parse_worksheet(file_path):
 
         # Parse tasks starting from row 3
         task_count = 0
-        for row_idx, row in enumerate(ws.iter_rows(min_row=3, values_only=True), start=3):
+        for row_idx, row in enumerate(iter_task_rows(ws, min_row=3), start=3):
             # Skip empty rows
             if not row or not any(row[:5]):
                 continue
@@ -305,21 +355,14 @@ def parse_worksheet(file_path):
         if task_count > 0:
             print(f"    {sheet_name}: {task_count} tasks")
 
-    wb.close()
     return all_tasks
 
 
-def upload_to_supabase(all_tasks):
-    """Upload all tasks to Supabase"""
-    print(f"\n{'='*60}")
-    print(f"UPLOADING {len(all_tasks)} TASKS TO SUPABASE")
-    print(f"{'='*60}")
-
-    # Get unit IDs mapping
+def load_id_maps():
+    """Fetch unit_number -> id and car type name -> id lookups"""
     units_result = supabase.table('train_units').select('id, unit_number').execute()
     unit_id_map = {u['unit_number']: u['id'] for u in units_result.data}
 
-    # Get car type IDs mapping
     car_types_result = supabase.table('car_types').select('id, name').execute()
     car_type_id_map = {}
     for ct in car_types_result.data:
@@ -328,101 +371,523 @@ def upload_to_supabase(all_tasks):
         normalized = ct['name'].upper().replace(' ', '')
         car_type_id_map[normalized] = ct['id']
 
+    return unit_id_map, car_type_id_map
+
+
+def to_upload_row(task, unit_id_map, car_type_id_map):
+    """Convert a parsed task into a tasks table row (None if its unit is unknown)"""
+    unit_id = unit_id_map.get(task['unit_number'])
+    if not unit_id:
+        return None
+
+    # Match car type
+    car_type_key = task['car_type'].upper()
+    car_type_id = car_type_id_map.get(car_type_key)
+    if not car_type_id:
+        car_type_key = car_type_key.replace(' ', '')
+        car_type_id = car_type_id_map.get(car_type_key)
+
+    return {
+        "unit_id": unit_id,
+        "car_type_id": car_type_id,
+        "task_number": task['task_number'],
+        "phase": task['phase'],
+        "task_name": task['task_name'],
+        "description": task['description'],
+        "status": task['status'],
+        "completed_by": task['completed_by'] or None,
+        "completed_date": task['completed_date'],
+        "overhaul_iroc": task['overhaul_iroc'] or None,
+        "position": task['position'] or None,
+        "scope_delayed": task['scope_delayed'],
+        "wi_reference": task['wi_reference'] or None,
+        "total_minutes": task.get('total_minutes', 0),
+        "num_people": task.get('num_people', 1),
+    }
+
+
+def dedupe_rows(rows):
+    """
+    Collapse rows sharing a natural key, keeping the last one (later rows
+    in a sheet win). Postgres rejects an upsert that touches the same row
+    twice, so each batch must be unique on the conflict target.
+    """
+    deduped = {}
+    for row in rows:
+        deduped[tuple(row[k] for k in TASK_NATURAL_KEY)] = row
+    return list(deduped.values())
+
+
+def is_retryable(error):
+    """
+    True for rate limiting, server errors and dropped connections, judged by
+    the HTTP status. An APIError's code is the PostgREST/SQLSTATE code
+    (PGRST..., 23505); only for a non-JSON response is it the HTTP status.
+    """
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRY_STATUS_CODES
+    status = getattr(error, 'status', None)
+    if status is None:
+        code = str(getattr(error, 'code', '') or '')
+        status = int(code) if code.isdigit() else None
+    return status in RETRY_STATUS_CODES
+
+
+async def upsert_with_backoff(write, rows, stats, batcher):
+    """Upsert one batch, retrying retryable errors with full-jitter exponential backoff"""
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            with batcher.timed():
+                await write(rows)
+            return
+        except Exception as e:
+            if attempt == MAX_RETRIES or not is_retryable(e):
+                raise
+            stats['retries'] += 1
+            await asyncio.sleep(random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)))
+
+
+def error_details(error):
+    """Pull the PostgREST error fields out of an exception for logging"""
+    details = {'message': str(error)}
+    for field in ('status', 'code', 'message', 'details', 'hint'):
+        value = getattr(error, field, None)
+        if value:
+            details[field] = value
+    return details
+
+
+class DeadLetterFile:
+    """Append-only JSONL file of rows the server rejected, with its error"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+
+    def write(self, row, error):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps({
+                'table': 'tasks',
+                'row': row,
+                'error': error_details(error),
+                'failed_at': datetime.now().isoformat(),
+            }, default=str) + '\n')
+        self.count += 1
+
+
+async def upsert_bisecting(write, rows, stats, batcher, dead_letters):
+    """
+    Upsert rows, returning how many were committed. If the server rejects
+    the batch it is split in half and each half retried, recursively,
+    until the bad rows are isolated and dead-lettered on their own.
+    """
+    try:
+        await upsert_with_backoff(write, rows, stats, batcher)
+        return len(rows)
+    except Exception as e:
+        # Splitting can't help if the server is down or we ran out of retries
+        if len(rows) == 1 or is_retryable(e):
+            for row in rows:
+                dead_letters.write(row, e)
+            return 0
+
+    stats['splits'] += 1
+    mid = len(rows) // 2
+    halves = await asyncio.gather(
+        upsert_bisecting(write, rows[:mid], stats, batcher, dead_letters),
+        upsert_bisecting(write, rows[mid:], stats, batcher, dead_letters),
+    )
+    return sum(halves)
+
+
+async def drain_batches_async(batches, in_flight, stats, failed_files, dead_letters, batcher, compress):
+    # Post to PostgREST directly: the supabase client can't compress bodies, and
+    # its APIError drops the HTTP status that decides whether a write is retried
+    http = instrument_http(httpx.AsyncClient(timeout=120))
+
+    async def write(rows):
+        await post_rows(http, SUPABASE_URL, SUPABASE_KEY, 'tasks', rows, upsert=True,
+                        on_conflict=','.join(TASK_NATURAL_KEY), compress=compress)
+
+    async def worker():
+        while True:
+            item = await asyncio.to_thread(batches.get)
+            if item is None:
+                return
+            rows, sources = item
+            unique_rows = dedupe_rows(rows)
+            stats['duplicates'] += len(rows) - len(unique_rows)
+            rows = unique_rows
+            committed = await upsert_bisecting(write, rows, stats, batcher, dead_letters)
+            rejected = len(rows) - committed
+            stats['uploaded'] += committed
+            stats['errors'] += rejected
+            stats['batches'] += 1
+            if rejected:
+                failed_files.update(sources)
+                print(f"  Batch {stats['batches']}: {committed} uploaded, "
+                      f"{rejected} rejected -> {dead_letters.path}")
+            else:
+                print(f"  Uploaded batch {stats['batches']}: {len(rows)} tasks")
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(in_flight)))
+    finally:
+        await http.aclose()
+
+
+def drain_batches(batches, in_flight, stats, failed_files, dead_letter_path=DEAD_LETTER_FILE,
+                  batcher=None, compress=False):
+    """
+    Upload (rows, source_files) items from a queue with up to `in_flight`
+    upserts outstanding at once. Each upload slot stops when it takes a
+    None off the queue, so put one None per slot to finish. Rejected rows
+    are appended to dead_letter_path. Request latencies are fed back to
+    `batcher` so the producer can resize the next batches.
+    """
+    start = time.perf_counter()
+    dead_letters = DeadLetterFile(dead_letter_path)
+    batcher = batcher or AdaptiveBatcher()
+    asyncio.run(drain_batches_async(batches, in_flight, stats, failed_files, dead_letters,
+                                    batcher, compress))
+    stats['seconds'] = time.perf_counter() - start
+    stats['batcher'] = batcher.summary()
+
+
+def new_upload_stats():
+    return {'uploaded': 0, 'errors': 0, 'batches': 0, 'retries': 0, 'splits': 0, 'duplicates': 0, 'seconds': 0.0}
+
+
+def print_upload_summary(stats, in_flight):
+    rate = stats['uploaded'] / stats['seconds'] if stats['seconds'] else 0
+    print(f"\nUpload complete: {stats['uploaded']} success, {stats['errors']} errors")
+    if stats['duplicates']:
+        print(f"  {stats['duplicates']} duplicate rows collapsed within batches")
+    print(f"  {stats['batches']} batches, {stats['retries']} retries, "
+          f"{stats['splits']} splits, {in_flight} in flight")
+    print(f"  Throughput: {rate:.0f} rows/s over {stats['seconds']:.2f}s")
+    if stats.get('batcher'):
+        print(f"  Batching: {stats['batcher']}")
+
+
+def upload_to_supabase(all_tasks, in_flight=4, dead_letter_path=DEAD_LETTER_FILE, compress=False):
+    """Upload all tasks to Supabase"""
+    print(f"\n{'='*60}")
+    print(f"UPLOADING {len(all_tasks)} TASKS TO SUPABASE")
+    print(f"{'='*60}")
+
+    unit_id_map, car_type_id_map = load_id_maps()
+
     # Prepare tasks for upload
     tasks_to_upload = []
     skipped = 0
 
     for task in all_tasks:
-        unit_id = unit_id_map.get(task['unit_number'])
-        if not unit_id:
+        upload_task = to_upload_row(task, unit_id_map, car_type_id_map)
+        if not upload_task:
             skipped += 1
             continue
-
-        # Match car type
-        car_type_key = task['car_type'].upper()
-        car_type_id = car_type_id_map.get(car_type_key)
-        if not car_type_id:
-            car_type_key = car_type_key.replace(' ', '')
-            car_type_id = car_type_id_map.get(car_type_key)
-
-        upload_task = {
-            "unit_id": unit_id,
-            "car_type_id": car_type_id,
-            "task_number": task['task_number'],
-            "phase": task['phase'],
-            "task_name": task['task_name'],
-            "description": task['description'],
-            "status": task['status'],
-            "completed_by": task['completed_by'] or None,
-            "completed_date": task['completed_date'],
-            "overhaul_iroc": task['overhaul_iroc'] or None,
-            "position": task['position'] or None,
-            "scope_delayed": task['scope_delayed'],
-            "wi_reference": task['wi_reference'] or None,
-            "total_minutes": task.get('total_minutes', 0),
-            "num_people": task.get('num_people', 1),
-        }
         tasks_to_upload.append(upload_task)
 
     print(f"Tasks ready for upload: {len(tasks_to_upload)}")
     print(f"Skipped (no unit match): {skipped}")
 
-    # Upload in batches
-    batch_size = 500
-    uploaded = 0
-    errors = 0
+    # Upload in size-based batches, several at a time
+    batcher = AdaptiveBatcher()
+    batches = queue.Queue()
+    for batch in batcher.split(tasks_to_upload):
+        batches.put((batch, set()))
+    for _ in range(in_flight):
+        batches.put(None)
+
+    stats = new_upload_stats()
+    drain_batches(batches, in_flight, stats, set(), dead_letter_path, batcher, compress)
+    print_upload_summary(stats, in_flight)
+    return stats['uploaded'], stats['errors']
+
+
+def replay_dead_letters(dead_letter_path=DEAD_LETTER_FILE, in_flight=4, compress=False):
+    """
+    Resubmit rows from the dead-letter file (e.g. after fixing the data or
+    schema). Rows that are still rejected are written to a fresh
+    dead-letter file at the same path.
+    """
+    print("="*60)
+    print("REPLAYING DEAD-LETTERED ROWS")
+    print("="*60)
 
-    for i in range(0, len(tasks_to_upload), batch_size):
-        batch = tasks_to_upload[i:i+batch_size]
+    # Move the file aside first so new rejections don't mix with the old ones.
+    # A .replaying file left over from an interrupted replay is picked up too.
+    replay_path = dead_letter_path + '.replaying'
+    if os.path.exists(dead_letter_path):
+        with open(dead_letter_path) as src, open(replay_path, 'a') as dst:
+            dst.write(src.read())
+        os.remove(dead_letter_path)
+
+    if not os.path.exists(replay_path):
+        print(f"\nNo dead-lettered rows in {dead_letter_path}")
+        return 0, 0
+
+    with open(replay_path) as f:
+        rows = [json.loads(line)['row'] for line in f if line.strip()]
+    print(f"\nReplaying {len(rows)} rows from {dead_letter_path}")
+
+    batcher = AdaptiveBatcher()
+    batches = queue.Queue()
+    for batch in batcher.split(rows):
+        batches.put((batch, set()))
+    for _ in range(in_flight):
+        batches.put(None)
+
+    stats = new_upload_stats()
+    drain_batches(batches, in_flight, stats, set(), dead_letter_path, batcher, compress)
+    os.remove(replay_path)
+    print_upload_summary(stats, in_flight)
+    return stats['uploaded'], stats['errors']
+
+
+def parse_worksheet_job(file_path, streaming=True):
+    """
+    Parse one worksheet in a worker process, capturing its log and timing.
+    Returns (tasks, error, log, seconds); error is None when it parsed.
+    """
+    log = io.StringIO()
+    start = time.perf_counter()
+    tasks, error = [], None
+    with redirect_stdout(log):
         try:
-            result = supabase.table('tasks').upsert(batch).execute()
-            uploaded += len(batch)
-            print(f"  Uploaded batch {i//batch_size + 1}: {len(batch)} tasks")
+            tasks = parse_worksheet(file_path, streaming=streaming)
         except Exception as e:
-            errors += len(batch)
-            print(f"  Error uploading batch: {e}")
+            error = str(e) if isinstance(e, ParseError) else f"{type(e).__name__}: {e}"
+            print(f"  {error}")
+    return tasks, error, log.getvalue(), time.perf_counter() - start
+
+
+def bounded_map(executor, fn, items, window):
+    """Like executor.map, but with at most `window` items submitted at once"""
+    pending = deque()
+    for item in items:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(executor.submit(fn, item))
+    while pending:
+        yield pending.popleft().result()
+
+
+def iter_parsed(file_paths, workers=1, streaming=True):
+    """
+    Parse worksheet files, optionally across a process pool, yielding
+    (file_path, tasks, error) in file order; error is None unless the file
+    couldn't be parsed. Per-file logs are printed in the
+    same order, so the output matches a serial run exactly. At most
+    2 x workers files are parsed ahead of the consumer.
+    """
+    job = partial(parse_worksheet_job, streaming=streaming)
+    start = time.perf_counter()
+
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = bounded_map(executor, job, file_paths, window=workers * 2)
+    else:
+        executor = None
+        results = map(job, file_paths)
 
-    print(f"\nUpload complete: {uploaded} success, {errors} errors")
-    return uploaded, errors
+    timings = []
+    try:
+        for idx, (file_path, (tasks, error, log, elapsed)) in enumerate(zip(file_paths, results), 1):
+            filename = os.path.basename(file_path)
+            print(f"\n[{idx}/{len(file_paths)}] {filename}")
+            print(log, end='')
+            timings.append((filename, elapsed, len(tasks)))
+            yield file_path, tasks, error
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+    wall_clock = time.perf_counter() - start
 
+    print(f"\n{'='*60}")
+    print(f"PARSE TIMINGS ({workers} worker{'s' if workers != 1 else ''})")
+    print(f"{'='*60}")
+    for filename, elapsed, count in timings:
+        print(f"  {elapsed:6.2f}s  {count:>5} tasks  {filename}")
+    cpu_total = sum(t[1] for t in timings)
+    print(f"\n  Wall clock (parse + upload overlap): {wall_clock:.2f}s")
+    print(f"  Sum of per-file parse times: {cpu_total:.2f}s")
+
+
+def put_while_alive(batches, item, thread):
+    """
+    put() on a bounded queue that gives up once `thread` (its consumer) has
+    stopped, instead of blocking forever. Returns False if it gave up.
+    """
+    while thread.is_alive():
+        try:
+            batches.put(item, timeout=QUEUE_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
 
-def main():
-    print("="*60)
-    print("PARSING WORKTOSHEETS AND UPLOADING TO SUPABASE")
-    print("="*60)
 
-    # Get all Excel files
-    files = [f for f in os.listdir(WORKSHEETS_FOLDER) if f.endswith('.xlsm')]
-    files.sort()
+def run_pipeline(file_paths, manifest, force=False, workers=1, streaming=True,
+                 in_flight=4, queue_size=4, dead_letter_path=DEAD_LETTER_FILE, compress=False):
+    """
+    Parse and upload at the same time.
 
-    print(f"\nFound {len(files)} worksheet files")
+    Parsed rows are cut into size-based batches (see batching.py) and put on a
+    bounded queue that an asyncio uploader drains with up to `in_flight`
+    upserts outstanding. When uploads fall behind the queue fills, put()
+    blocks and parsing pauses, so memory is bounded by queue_size batches
+    plus the files in flight - not by fleet size.
+    """
+    unit_id_map, car_type_id_map = load_id_maps()
 
-    # Parse all files
-    all_tasks = []
-    for idx, filename in enumerate(files, 1):
-        file_path = os.path.join(WORKSHEETS_FOLDER, filename)
-        print(f"\n[{idx}/{len(files)}] {filename}")
-        tasks = parse_worksheet(file_path)
-        all_tasks.extend(tasks)
+    batches = queue.Queue(maxsize=queue_size)
+    stats = new_upload_stats()
+    failed_files = set()
 
-    print(f"\n{'='*60}")
-    print(f"TOTAL TASKS EXTRACTED: {len(all_tasks)}")
-    print(f"{'='*60}")
+    batcher = AdaptiveBatcher()
+    uploader_errors = []
+
+    def upload():
+        try:
+            drain_batches(batches, in_flight, stats, failed_files, dead_letter_path, batcher, compress)
+        except BaseException as e:
+            uploader_errors.append(e)
+
+    def put(item):
+        if not put_while_alive(batches, item, uploader):
+            raise uploader_errors[0] if uploader_errors else RuntimeError("Uploader stopped")
+
+    uploader = threading.Thread(target=upload)
+    uploader.start()
 
-    # Summary by status
+    total_tasks = 0
+    skipped = 0
     status_counts = {}
-    for task in all_tasks:
-        status = task['status']
-        status_counts[status] = status_counts.get(status, 0) + 1
+    changed = []
+    parse_failures = []
+    sources = set()
+
+    try:
+        for file_path, tasks, error in iter_parsed(file_paths, workers=workers, streaming=streaming):
+            # Not recorded in the manifest, so the file is tried again next run
+            if error:
+                parse_failures.append((file_path, error))
+                continue
+
+            # Files that were touched but still produce the same rows don't need uploading
+            if not force and manifest.rows_unchanged(file_path, tasks):
+                print(f"  Rows unchanged, skipping upload: {os.path.basename(file_path)}")
+                manifest.record(file_path, tasks)
+                continue
+            changed.append((file_path, rows_sha256(tasks)))
+
+            for task in tasks:
+                total_tasks += 1
+                status_counts[task['status']] = status_counts.get(task['status'], 0) + 1
+
+                row = to_upload_row(task, unit_id_map, car_type_id_map)
+                if not row:
+                    skipped += 1
+                    continue
+                sources.add(file_path)
+                batch = batcher.add(row)
+                if batch:
+                    put((batch, sources))
+                    sources = set()
+
+        batch = batcher.flush()
+        if batch:
+            put((batch, sources))
+    finally:
+        for _ in range(in_flight):
+            if not put_while_alive(batches, None, uploader):
+                break
+        uploader.join()
+
+    if uploader_errors:
+        raise uploader_errors[0]
+
+    print(f"\n{'='*60}")
+    print(f"TOTAL TASKS EXTRACTED: {total_tasks}")
+    print(f"{'='*60}")
 
     print("\nStatus breakdown:")
     for status, count in sorted(status_counts.items()):
         print(f"  {status}: {count}")
 
-    # Upload to Supabase
-    uploaded, errors = upload_to_supabase(all_tasks)
+    print(f"\nSkipped (no unit match): {skipped}")
+    print_upload_summary(stats, in_flight)
 
-    return all_tasks
+    if parse_failures:
+        print(f"\nFailed to parse {len(parse_failures)} files (not recorded, retried next run):")
+        for file_path, error in parse_failures:
+            print(f"  {os.path.basename(file_path)}: {error}")
+
+    # Only remember files once all of their rows are safely in the database
+    for file_path, rows_hash in changed:
+        if file_path not in failed_files:
+            manifest.record_hash(file_path, rows_hash)
+    manifest.save()
+
+    return stats['uploaded'], stats['errors']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse WorktoSheets and upload tasks to Supabase")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of parser processes (1 = serial)")
+    parser.add_argument('--in-flight', type=int, default=4,
+                        help="Maximum concurrent batch upserts")
+    parser.add_argument('--queue-size', type=int, default=4,
+                        help="Maximum parsed batches waiting for upload")
+    parser.add_argument('--full-reader', action='store_true',
+                        help="Load workbooks in full openpyxl mode instead of streaming")
+    parser.add_argument('--force', action='store_true',
+                        help="Re-parse and re-upload files even if the manifest says they are unchanged")
+    parser.add_argument('--dead-letter', default=DEAD_LETTER_FILE,
+                        help="JSONL file that collects rows the server rejects")
+    parser.add_argument('--replay', action='store_true',
+                        help="Resubmit rows from the dead-letter file instead of parsing")
+    parser.add_argument('--gzip', action='store_true',
+                        help="Gzip request bodies (endpoint must accept Content-Encoding: gzip)")
+    args = parser.parse_args()
+
+    if args.replay:
+        return replay_dead_letters(args.dead_letter, in_flight=max(1, args.in_flight), compress=args.gzip)
+
+    print("="*60)
+    print("PARSING WORKTOSHEETS AND UPLOADING TO SUPABASE")
+    print("="*60)
+
+    # Get all Excel files
+    files = [f for f in os.listdir(WORKSHEETS_FOLDER) if f.endswith('.xlsm')]
+    files.sort()
+
+    print(f"\nFound {len(files)} worksheet files")
+
+    # Skip files that haven't changed since the last successful ingest
+    manifest = IngestManifest(os.path.join(WORKSHEETS_FOLDER, MANIFEST_NAME))
+    if not args.force:
+        files = [f for f in files if not manifest.is_unchanged(os.path.join(WORKSHEETS_FOLDER, f))]
+        print(f"Changed since last ingest: {len(files)}")
+
+    file_paths = [os.path.join(WORKSHEETS_FOLDER, f) for f in files]
+    return run_pipeline(
+        file_paths,
+        manifest,
+        force=args.force,
+        workers=max(1, args.workers),
+        streaming=not args.full_reader,
+        in_flight=max(1, args.in_flight),
+        queue_size=max(1, args.queue_size),
+        dead_letter_path=args.dead_letter,
+        compress=args.gzip,
+    )
 
 
 if __name__ == "__main__":
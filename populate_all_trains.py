@@ -5,7 +5,7 @@ Creates train_units entries with proper phase and unit pairings
 """
 
 import json
-from supabase import create_client
+from supabase_metrics import create_client
 from datetime import datetime
 
 # Supabase configuration
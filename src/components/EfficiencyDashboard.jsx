@@ -1,87 +1,15 @@
 import { useState, useEffect } from 'react'
 import { supabase } from '../lib/supabase'
+import TASK_PEOPLE_MAP from '../data/taskPeople.json'
 import {
   BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer,
   PieChart, Pie, Cell, Legend, LineChart, Line
 } from 'recharts'
 import { TrendingUp, Users, CheckCircle, Clock, Target, Award, Filter, ArrowUpDown, ChevronDown, ChevronUp } from 'lucide-react'
 
-const DB_NAME = 'TrainTrackerDB'
-const DB_VERSION = 1
-const STORE_NAME = 'dashboardCache'
-
-// IndexedDB helpers - provides ~50MB+ storage instead of localStorage's 5MB limit
-const openDB = () => {
-  return new Promise((resolve, reject) => {
-    const request = indexedDB.open(DB_NAME, DB_VERSION)
-    request.onerror = () => reject(request.error)
-    request.onsuccess = () => resolve(request.result)
-    request.onupgradeneeded = (event) => {
-      const db = event.target.result
-      if (!db.objectStoreNames.contains(STORE_NAME)) {
-        db.createObjectStore(STORE_NAME, { keyPath: 'id' })
-      }
-    }
-  })
-}
-
-const getCacheFromDB = async () => {
-  try {
-    const db = await openDB()
-    return new Promise((resolve, reject) => {
-      const tx = db.transaction(STORE_NAME, 'readonly')
-      const store = tx.objectStore(STORE_NAME)
-      const request = store.get('dashboardData')
-      request.onerror = () => reject(request.error)
-      request.onsuccess = () => resolve(request.result)
-    })
-  } catch (e) {
-    console.error('Error reading from IndexedDB:', e)
-    return null
-  }
-}
-
-const saveCacheToDB = async (cars, completions) => {
-  try {
-    const db = await openDB()
-    return new Promise((resolve, reject) => {
-      const tx = db.transaction(STORE_NAME, 'readwrite')
-      const store = tx.objectStore(STORE_NAME)
-      const data = {
-        id: 'dashboardData',
-        cars,
-        completions,
-        timestamp: new Date().toISOString()
-      }
-      const request = store.put(data)
-      request.onerror = () => reject(request.error)
-      request.onsuccess = () => {
-        console.log('Cache saved to IndexedDB, records:', {
-          cars: cars.length,
-          completions: completions.length
-        })
-        resolve()
-      }
-    })
-  } catch (e) {
-    console.error('Error saving to IndexedDB:', e)
-  }
-}
-
-const clearCacheFromDB = async () => {
-  try {
-    const db = await openDB()
-    return new Promise((resolve, reject) => {
-      const tx = db.transaction(STORE_NAME, 'readwrite')
-      const store = tx.objectStore(STORE_NAME)
-      const request = store.delete('dashboardData')
-      request.onerror = () => reject(request.error)
-      request.onsuccess = () => resolve()
-    })
-  } catch (e) {
-    console.error('Error clearing IndexedDB:', e)
-  }
-}
+// Old IndexedDB cache of every car and completion. The dashboard now reads the
+// server-side summary instead, so the database is deleted on load to free the space
+const LEGACY_CACHE_DB = 'TrainTrackerDB'
 
 // Team roster - who belongs to each team
 const TEAM_ROSTER = {
@@ -92,355 +20,92 @@ const TEAM_ROSTER = {
   'TFOS': ['TFOS'] // Unknown person - needs manual identification
 }
 
-// Task name -> Number of people mapping (from Excel column M)
-// This multiplier is needed for accurate efficiency calculation
-// A 7-hour job with 2 people = 14 man-hours of work
-const TASK_PEOPLE_MAP = {
-  "DM UNDERFRAME REMOVE/REFIT MORS SMITT RELAYS": 1,
-  "DM CAB DRIVERS SIDE REMOVE/REFIT EMERGENCY LIGHT INVERTER": 1,
-  "DM CAB NON DRIVERS SIDE REMOVE/REFIT EMERGENCY LIGHT INVERTER": 1,
-  "DM  SALOON REMOVE/REFIT EMERGENCY LIGHT INVERTERS": 1,
-  "DM CAB NON DRIVERS SIDE REMOVE/REFIT SIEMENS RELAYS": 1,
-  "DM CAB DRIVERS SIDE REMOVE/REFIT SIEMENS RELAYS": 1,
-  "DM CAR REMOVE/REFIT 4 POLE CIRCUIT BREAKER": 2,
-  "DM CAB DRIVERS SIDE REMOVE/REFIT ROTARY SWITCHES": 1,
-  "DM CAB NON DRIVERS SIDE REMOVE/REFIT ROTARY SWITCHES": 1,
-  "DM CAR REMOVE/REFIT AUXILIARY SUPPLY BREAKER (ASB)": 1,
-  "DM CAB NON DRIVERS SIDE REMOVE/REFIT MCBS": 1,
-  "DM  SALOON REMOVE/REFIT MCBS": 1,
-  "DM CAB DRIVERS SIDE REMOVE/REFIT MORS SMITT RELAY": 1,
-  "DM CAB NON DRIVERS SIDE REMOVE/REFIT MORS SMITT RELAYS": 1,
-  "DM  SALOON REMOVE/REFIT MORS SMITT RELAYS": 1,
-  "DM - TRACTION CUT-OUT SWITCH": 1,
-  "DM - SHED SUPPLY SWITCH AND RECEPTACLE ASSEMBLY": 1,
-  "DM - CAR REMOVE/REFIT SHOEGEAR VOLTAGE & REVERSE VOLTAGE RELAY": 2,
-  "DM - REMOVE/REFIT CURRENT LIMITING INDUCTOR": 2,
-  "DM - CURRENT LINK FILTER INDUCTOR (AUXILIARY LINK FILTER INDUCTOR)": 2,
-  "DM - CAR REMOVE/REFIT LINE FILTER INDUCTOR": 1,
-  "DM - CONTROL SUPPLY RESISTOR (CSZ)": 2,
-  "DM - AUXILIARY STEP-DOWN CHOPPER SNUBBER RESISTOR": 1,
-  "DM CAR REMOVE BOGIE A": 4,
-  "DM CAR REFIT BOGIE A": 4,
-  "DM CAR REMOVE BOGIE D": 4,
-  "DM CAR REFIT BOGIE D": 4,
-  "DM UNDERFRAME REMOVE/REFIT LINE BREAKER CONTACTOR 1 AND 3": 2,
-  "DM UNDERFRAME REMOVE/REFIT LINE BREAKER CONTACTOR 2 AND 4": 2,
-  "DM CAR REMOVE/REFIT FILTER HARD CROWBAR THYRISTOR ASSEMBLY": 1,
-  "DM CAR REMOVE/REFIT POWER SUPPLY UNIT": 2,
-  "DM UNDERFRAME LOCATION 412 REMOVE/REFIT AUXILIARY CONVERTER ELECTRONIC MODULE": 2,
-  "DM CAR REMOVE/REFIT SERVICE BRAKE DROP HOSE A": 2,
-  "DM CAR REMOVE/REFIT PARKING BRAKE DROP HOSE A": 2,
-  "DM CAR REMOVE/REFIT SLEETBRUSH DROP HOSE (POSITIVE)": 1,
-  "DM CAR REMOVE/REFIT SLEETBRUSH DROP HOSE (NEGATIVE)": 1,
-  "DM CAR REMOVE/REFIT SLEETBRUSH CYLINDER HOSE (POSITIVE)": 1,
-  "DM CAR REMOVE/REFIT SERVICE BRAKE DROP HOSE D": 2,
-  "DM CAR REMOVE/REFIT PARKING BRAKE DROP HOSE D": 2,
-  "DM - WHEEL SPEED PROBE - MOTOR": 1,
-  "DM -  REMOVE/REFIT LINE CONTACTOR AIR SUPPLY": 2,
-  "DM CAR REMOVE/REFIT UNCOUPLER SWITCH DM": 2,
-  "DM CAR REMOVE/REFIT PROPULSION INVERTER MODULE": 2,
-  "DM CAR REMOVE/REFIT LINE FILTER CAPACITOR TRAY 10 CAP": 2,
-  "DM CAR REMOVE/REFIT LINE FILTER CAPACITOR TRAY 7 CAP - ALFK": 2,
-  "DM CAR REMOVE/REFIT AUXILIARY INVERTER AND RHEOSTATIC BRAKE MODULE": 2,
-  "DM CAB REMOVE/REFIT TRACTION BRAKE CONTROLLER": 2,
-  "DM SALOON REMOVE/REFIT BRAKE CYLINDER PRESSURE SWITCH 1 (FOR ALL CARS)": 1,
-  "DM CAR REMOVE/REFIT BRAKE CYLINDER PRESSURE SWITCH 2 (FOR DM/UNDM)": 1,
-  "DM CAR REMOVE/REFIT ½\u00a0VENTED BALL VALVE (VLCV / SYSTEM DRAIN / AUTO DRAIN / WHISLTE)": 1,
-  "DM UNDERFRAME REMOVE/REFIT VARIABLE LOAD VALVE - DM/UNDM CAR": 1,
-  "DM UNDERFRAME CAR REMOVE/REFIT BRAKE RELEASE VALVE": 2,
-  "DM SALOON REMOVE/REFIT BRAKE CYLINDER SALOON GAUGES": 1,
-  "DM CAR REMOVE/REFIT CLOSED LOOP ANALOGUE UNIT (CLAU) - DM/UNDM CAR": 1,
-  "DM CAR REMOVE/REFIT PNEUMATIC BRAKE DRIVER": 1,
-  "DM CAR REMOVE/REFIT ¾\" GANGED VENTED COCKS (BCIC/PBIC)": 2,
-  "DM CAR REMOVE/REFIT ENCODER UNIT": 2,
-  "DM UNDERFRAME REMOVE/REFIT WSP DUMP VALVE": 1,
-  "DM CAR REMOVE/REFIT WHISTLE - TYPE 3C (ENHANCED)": 1,
-  "DM CAR REMOVE/REFIT 5/3 WHISTLE SPOOL VALVE DM": 1,
-  "DM CAR REMOVE/REFIT WHISTLE CONTROL LEVER VALVE DM DRIVER'S SIDE/INSTRUCTOR SIDE (X 2)": 2,
-  "DM CAR REMOVE/REFIT WHISTLE-OPERATED PRESSURE SWITCH DM": 1,
-  "DM CAR REMOVE/REFIT TRACTION SUPPLY PRESSURE REGULATOR": 1,
-  "DM CAR REMOVE/REFIT DOOR AIR SUPPLY PRESSURE REGULATOR (SUPPLIED WITH O-RINGS)": 1,
-  "DM CAR REMOVE/REFIT LOW MAIN LINE PRESSURE SWITCH": 1,
-  "DM CAR REMOVE/REFIT COUPLING-TEST POINT-QUICK RELEASE": 1,
-  "DM CAR REMOVE/REFIT MAINLINE CAB GAUGE": 1,
-  "DM CAR REMOVE/REFIT PRESSURE GAUGE (DOOR/TRACTION SUPP)": 1,
-  "DM CAR REMOVE/REFIT AIR FILTER WITH AUTOMATIC DRAIN": 1,
-  "DM CAR REMOVE/REFIT BSR CHECK VALVE (SUPPLIED WITH O-RINGS)": 1,
-  "DM CAR REMOVE/REFIT MAINLINE PRESSURE SWITCH EP TEST VALVE": 1,
-  "DM CAR REMOVE/REFIT ½\" CHECK VALVE (SHOEGEAR AND LINEBREAKER AUX), SUPPLIED WITH O-RINGS": 1,
-  "DM CAR REMOVE/REFIT ½\" CHECK VALVE (SHOEGEAR MANUAL CONTROL VALVE), SUPPLIED WITH O-RINGS": 1,
-  "DM CAR REMOVE/REFIT ½\" CHECK VALVE (EXTERNAL AIR SUPPLY), SUPPLIED WITH O-RINGS": 1,
-  "DM CAR REMOVE/REFIT DOUBLE CHECK VALVE": 1,
-  "DM CAR REMOVE/REFIT ½\u00a0VENTED BALL VALVE (VLCV / SYSTEM DRAIN / WHISTLE)": 1,
-  "DM CAR REMOVE/REFIT ½\u00a0VENTED BALL VALVE (FLANGE MOUNTED)": 1,
-  "DM CAR REMOVE/REFIT AIR FLOW CUT-OFF VALVE BOGIE A": 1,
-  "DM CAR REMOVE/REFIT SLEET BRUSH CONTROL VALVE": 1,
-  "DM CAR REMOVE/REFIT AIR FLOW CUT-OFF VALVE BOGIE D": 1,
-  "DM CAR REMOVE/REFIT CURRENT BALANCE DETECTOR RELAY (CBR)": 1,
-  "DM - CAR REMOVE/REFIT RHEOSTATIC BRAKE RESISTOR FAN ASSEMBLY": 2,
-  "DM - CAR REMOVE/REFIT REVERSE VOLTAGE RELAY FUSE": 3,
-  "DM - CAR REMOVE/REFIT SHOE VOLTAGE RELAY FUSE 1 & 2 (SVRF 1 & 2)": 4,
-  "DM CAR REMOVE/REFIT 5/3 WHISTLE CONTROL LEVER VALVE DM NON DRIVER'S SIDE": 2,
-  "DM CAR REMOVE/REFIT AUTOCOUPLER, DRAWGEAR, RADIAL SUPPORT BAR, LEFT AND RIGHT HAND CONTACT BOXES": 4,
-  "DM CAR REMOVE/REFIT SEMI PERMANENT COUPLER BAR AND DRAWGEAR INTERMEDIATE A": 4,
-  "DM CAR REMOVE/REFIT ANTI-CLIMB BUFFER ASSEMBLY": 2,
-  "DM CAR REMOVE/REFIT ANTI-CLIMB BUFFER ASSEMBLY INTERMEDIATE": 2,
-  "DM CAR REMOVE/REFIT LINE CURRENT MONITORING DEVICE": 2,
-  "DM CAB REMOVE/REFIT CAB DESK HEATER": 1,
-  "DM CAB REMOVE/REFIT CAB REFRIGERATION UNIT (CHILLER MODULE)": 2,
-  "DM CAB REMOVE/REFIT CAB AIR HANDLING UNIT (AHU)": 2,
-  "DM CAR REMOVE/REFIT BRAKE SUPPLY RESERVOIR": 2,
-  "DM CAR REMOVE/REFIT COUPLER HOSE / SEMI-PERM COUPLER HOSE": 2,
-  "DM UNDERFRAME REMOVE/REFIT DM COUPLER HOSES": 1,
-  "DM CAR REMOVE/REFIT 20 KHZ DISTRIBUTION PANEL": 1,
-  "DM CAR REMOVE/REFIT POWER SUPPLY UNIT ISOLATION SWITCH": 1,
-  "DM CAR REMOVE/REFIT SCREENWASH STAINLESS PIPE ASSY": 1,
-  "DM CAR REMOVE/REFIT WASHER NOZZLE LH AND RH": 1,
-  "DM CAR REMOVE/REFIT AUXILIARY ISOLATION SWITCH": 2,
-  "DM - CAR REMOVE/REFIT AUXILIARY SUPPLY ISOLATION TRANSFORMER": 2,
-  "DM - CAR REMOVE/REFIT FILTER VOLTAGE MONITORING DEVICES VMD1, FVMD2, FVMD1, ALVMD.": 1,
-  "DM - CAR REMOVE/REFIT CAPACITOR PANEL ASSEMBLY": 2,
-  "DM - SHED SUPPLY FUSE": 2,
-  "DM - REMOVE AND REFIT CURRENT MONITORING DEVICES (CMDA, CMDB, CMDC)": 2,
-  "DM  - REMOVE/REFIT SALOON MODULAR SEATING - CATCH PLATE, GAS STRUT, SEAL, PINS, SPACE COVER AND INSULATION BLANKET": 4,
-  "DM - CAR REPLACE CAB BACK WALL FASTNERS": 2,
-  "DM - REMOVE/REFIT AUXLIARY LINK CURRENT MONITORING DEVICE (ALCMD)": 2,
-  "DM - WIPER MOTOR": 2,
-  "DM  - REMOVE/REFIT SALOON MODULAR SEATING - SEAT LOCK SPRING AND PIN SPRINGS": 2,
-  "DM CAR REMOVE/REFIT TMCU - TRAIN MANAGEMENT CONTROL UNIT": 1,
-  "DM CAR REMOVE/REFIT CAB AUDIO VISUAL UNIT (CAVU)": 1,
-  "DM CAR REMOVE/REFIT SALOON AUDIO VISUAL UNIT (SAVU)": 1,
-  "DM CAR REMOVE/REFIT TMCC - TRAIN MANAGEMENT CAR CONTROLLER": 1,
-  "DM CAR REMOVE/REFIT TMWD - TRAIN MANAGEMENT WALL DISPLAY": 1,
-  "DM  REMOVE/REFIT TMRT - TRAIN MANAGEMENT REMOTE TERMINAL": 1,
-  "DM - CAR REMOVE/REFIT SIGNAL RESISTOR PANEL": 1,
-  "DM - CAR REMOVE/REFIT EQUIPMENT GOVERNOR": 2,
-  "DM - CAR REMOVE/REFIT TRAIN OPERATOR DISPLAY-CONTROL UNIT (TOD-CU)": 1,
-  "DM - CAR REMOVE/REFIT MASTER CONTROL SWITCH (MCS)": 1,
-  "DM - CAR REMOVE/REFIT OUTPUT FILTER PANELS": 2,
-  "DM - REMOVE/REFITCAR SCREEN WASH TANK & PUMP": 3,
-  "DM - ASK CAPAICTOR REPLACE": 2,
-  "DM - CAR REMOVE/REFIT AUXLIARY SUPPLY CONTACTOR (ASC)": 2,
-  "DM - CHECK MAINLINE PRESSURE SWITCH EP TEST VALVE, LOW MAINLINE PRESSURE SWITCH, DRIVER SIDE WHISTLE CONTROL LEVER AND DOUBLE CHECK VALVE FITTINGS AND REPLACE ALL UNITS THAT HAVE THE UNAPPROVED PNEUMATIC BLUE SEAL FITTED WITH THE NORGREN SEALS": 2,
-  "TRIALER  UNDERFRAME REMOVE/REFIT CONTACTORS SA80": 2,
-  "TRAILER  SALOON REMOVE/REFIT EMERGENCY LIGHT INVERTERS": 1,
-  "TRAILER  SALOON REMOVE/REFIT MCBS": 1,
-  "TRAILER SALOON REMOVE/REFIT MORS SMITT RELAYS": 1,
-  "TRAILER CAR REMOVE BOGIE A": 4,
-  "TRAILER CAR REFIT BOGIE A": 4,
-  "TRAILER CAR REMOVE BOGIE D": 4,
-  "TRAILER CAR REFIT BOGIE D": 4,
-  "TRAILER CAR REMOVE/REFIT WSP CONTROL UNIT": 1,
-  "TRAILER CAR REMOVE/REFIT SERVICE BRAKE DROP HOSE BOGIE A": 2,
-  "TRAILER CAR REMOVE/REFIT SERVICE BRAKE DROP HOSE BOGIE D": 2,
-  "TRAILER - AXLE-END SPEED PROBE HOUSING (WSP)": 1,
-  "TRAILER CAR REMOVE/REFIT BRAKE CYLINDER PRESSURE SWITCH 1 (ALL CARS)": 1,
-  "TRAILER CAR REMOVE/REFIT BRAKE CYLINDER PRESSURE SWITCH 2 (FOR TR CARS)": 1,
-  "TRAILER CAR REMOVE/REFIT ½\u00a0VENTED BALL VALVE (VLCV / SYSTEM DRAIN / AUTO DRAIN / WHISTLE)": 1,
-  "TRAILER CAR REMOVE/REFIT VARIABLE LOAD VALVE - T/DIT CAR": 1,
-  "TRAILER CAR REMOVE/REFIT BRAKE RELEASE VALVE": 2,
-  "TRAILER CAR REMOVE/REFIT BRAKE CYLINDER SALOON GAUGES": 1,
-  "TRAILER CAR REMOVE/REFIT CLOSED LOOP ANALOGUE UNIT (CLAU) - T/ DIT CAR": 1,
-  "TRAILER CAR REMOVE/REFIT PNEUMATIC BRAKE DRIVER": 1,
-  "TRAILER CAR REMOVE/REFIT ¾\" VENTED BALL VALVE (BCIC)": 1,
-  "TRAILER CAR REMOVE/REFIT WSP DUMP VALVE - TRAILER": 1,
-  "TRAILER CAR REMOVE/REFIT DOOR AIR SUPPLY PRESSURE REGULATOR (SUPPLIED WITH O-RINGS)": 1,
-  "TRAILER CAR REMOVE/REFIT COMPRESSOR DELIVERY HOSE": 2,
-  "TRAILER CAR REMOVE/REFIT 1/2\" SILENCER (EXHAUST)": 1,
-  "TRAILER CAR REMOVE/REFIT LOW COMPRESSOR DELIVERY PRESSURE SWITCH": 1,
-  "TRAILER CAR REMOVE/REFIT COMPRESSOR GOVERNOR": 1,
-  "TRAILER CAR REMOVE/REFIT COUPLING-TEST POINT-QUICK RELEASE": 1,
-  "TRAILER CAR REMOVE/REFIT PRESSURE GAUGE (DOOR/TRACTION SUPP)": 1,
-  "TRAILER CAR REMOVE/REFIT AIR FILTER WITH AUTOMATIC DRAIN": 1,
-  "TRAILER CAR REMOVE/REFIT MAINLINE RESERVOIR SAFETY VALVE": 1,
-  "TRAILER CAR REMOVE/REFIT COMPRESSOR NON-RETURN VALVE": 1,
-  "TRAILER CAR REMOVE/REFIT BSR CHECK VALVE (SUPPLIED WITH O-RINGS)": 1,
-  "TRAILER CAR REMOVE/REFIT ½\u00a0VENTED BALL VALVE (FLANGE MOUNTED)": 1,
-  "TRAILER CAR REMOVE/REFIT AIR FLOW CUT-OFF VALVE BOGIE A": 1,
-  "TRAILER CAR REMOVE/REFIT AIR FLOW CUT-OFF VALVE BOGIE D": 1,
-  "TRAILER CAR REMOVE/REFIT FUSES (PERMANENT LOAD PROTECTION, BARE ESSENTIALS PROTECTION, EMERGENCY 1 PROTECTION & EMERGENCY 2 PROTECTION)": 2,
-  "TRAILER CAR REMOVE/REFIT ANTI-CLIMB BUFFER ASSEMBLY INTERMEDIATE A END": 2,
-  "DO NOT FILL - DUPLICATE - TRAILER CAR REMOVE/REFIT DRAWGEAR INTERMEDIATE A END & SEMI PERMANENT COUPLER BAR": 4,
-  "TRAILER CAR REMOVE/REFIT ANTI-CLIMB BUFFER ASSEMBLY INTERMEDIATE D END": 2,
-  "DO NOT FILL - DUPLICATE - TRAILER CAR REMOVE/REFIT DRAWGEAR INTERMEDIATE D END & SEMI-PERMANENT COUPLER BAR": 4,
-  "TRAILER CAR REMOVE/REFIT MAIN RESERVOIR": 2,
-  "TRAILER CAR REMOVE/REFIT BRAKE SUPPLY RESERVOIR": 2,
-  "TRAILER CAR REMOVE/REFIT UNDM COUPLER HOSE / SEMI-PERM COUPLER HOSE": 2,
-  "TRAILER CAR REMOVE/REFIT AUTOMATIC DRAIN VALVE (G 1/2\")": 1,
-  "TRAILER CAR REMOVE/REFIT 3-WAY BALL VALVE": 1,
-  "TRAILER CAR REMOVE/REFIT ½\u00a0VENTED BALL VALVE (MAIN RESERVOIR MANUAL DRAIN VALVE)": 1,
-  "TRAILER REMOVE/REFIT BATTERY SUPPLY CAPACITORS (BSK 1, 2, 3)  NON ELECTROLYTIC CAPACITOR": 2,
-  "TRAILER CAR REMOVE/REFIT BATTERY RECTIFIER CAPACITOR (BRK)  NON ELECTROLYTIC CAPACITOR": 2,
-  "TRAILER - CAR - REMOVE/REFIT BATTERY ISOLATION CONTACTORS N(C-BIC1 AND C-BIC 2)": 2,
-  "TRAILER -  REMOVE/REFIT BATTERY CURRENT MONITORING DEVICE": 2,
-  "TRAILER -REMOVE/REFIT SALOON MODULAR SEATING - CATCH PLATE, GAS STRUT, SEAL, PINS, SPACE COVER AND INSULATION BLANKET": 4,
-  "TRAILER - REMOVE/REFIT SALOON MODULAR SEATING - SEAT LOCK SPRING AND PIN SPRINGS": 2,
-  "TRAILER CAR REMOVE/REFIT SALOON AUDIO VISUAL UNIT (SAVU)": 1,
-  "TRAILER CAR REMOVE/REFIT 5 X TRAIN MANAGEMENT REMOTE TERMINALS.": 1,
-  "TRAILER - REPLACE 5 X RELAY TIMERS WITH 5 X ARTECHE RELAYS, INCULDING WIRING MODIFICATION.": 1,
-  "UNDM UNDERFRAME REMOVE/REFIT CONTACTOR  SA80": 2,
-  "UNDM UNDERFRAME REMOVE/REFIT MORS SMITT RELAYS": 1,
-  "UNDM SALOON  REMOVE/REFIT EMERGENCY LIGHT INVERTERS": 1,
-  "UNDM SALOON REMOVE/REFIT SIEMENS RELAYS": 1,
-  "UNDM SALOON REMOVE/REFIT MCBS": 1,
-  "UNDM SALOON REMOVE/REFIT MORS SMITT RELAYS": 1,
-  "UNDM - TRACTION CUT-OUT SWITCH": 1,
-  "UNDM - SHED SUPPLY SWITCH AND RECEPTACLE ASSEMBLY": 1,
-  "UNDM - CURRENT LINK FILTER INDUCTOR (AUXILIARY LINK FILTER INDUCTOR)": 2,
-  "UNDM - REMOVE/REFIT CURRENT LIMITING INDUCTOR": 2,
-  "UNDM -CAR REMOVE/REFIT LINE FILTER INDUCTOR": 1,
-  "UNDM - CONTROL SUPPLY RESISTOR (CSZ)": 2,
-  "UNDM CAR REMOVE BOGIE A": 4,
-  "UNDM CAR REFIT BOGIE A": 4,
-  "UNDM CAR REMOVE BOGIE D": 4,
-  "UNDM CAR REFIT BOGIE D": 4,
-  "UNDM CAR REMOVE/REFIT LINE BREAKER CONTACTOR 1 AND 3": 2,
-  "UNDM CAR REMOVE/REFIT LINE BREAKER CONTACTOR 2 AND 4": 2,
-  "UNDM CAR REMOVE/REFIT FILTER HARD CROWBAR THYRISTOR ASSEMBLY": 1,
-  "UNDM CAR REMOVE/REFIT POWER SUPPLY UNIT": 2,
-  "UNDM CAR REMOVE/REFIT SERVICE BRAKE DROP HOSE BOGIE A": 2,
-  "UNDM CAR REMOVE/REFIT PARKING BRAKE DROP HOSE BOGIE A": 2,
-  "UNDM CAR REMOVE/REFIT SERVICE BRAKE DROP HOSE BOGIE D": 2,
-  "UNDM CAR REMOVE/REFIT PARKING BRAKE DROP HOSE BOGIE D": 2,
-  "UNDM - REMOVE/REFIT LINE CONTACTOR AIR SUPPLY": 2,
-  "UNDM - WHEEL SPEED PROBE - MOTOR": 1,
-  "UNDM CAR REMOVE/REFIT UNCOUPLER SWITCH UNDM": 2,
-  "UNDM CAR REMOVE/REFIT PROPULSION INVERTER MODULE": 2,
-  "UNDM CAR REMOVE/REFIT RHEOSTATIC BRAKE MODULE": 2,
-  "UNDM CAR REMOVE/REFIT LINE FILTER CAPACITOR TRAY 6 CAP - KF": 2,
-  "UNDM CAR REMOVE/REFIT LINE FILTER CAPACITOR TRAY 10 CAP": 2,
-  "UNDM CAR REMOVE/REFIT BRAKE CYLINDER PRESSURE SWITCH 1 (FOR ALL CARS)": 1,
-  "UNDM CAR REMOVE/REFIT BRAKE CYLINDER PRESSURE SWITCH 2 (FOR DM/UNDM)": 1,
-  "UNDM CAR REMOVE/REFIT ½\u00a0VENTED BALL VALVE (VLCV / SYSTEM DRAIN / WHISTLE)": 1,
-  "UNDM CAR REMOVE/REFIT VARIABLE LOAD VALVE - UNDM CAR": 1,
-  "UNDM CAR REMOVE/REFIT BRAKE RELEASE VALVE": 2,
-  "UNDM CAR REMOVE/REFIT BRAKE CYLINDER SALOON GAUGES": 1,
-  "UNDM CAR REMOVE/REFIT CLOSED LOOP ANALOGUE UNIT (CLAU) - UNDM CAR": 1,
-  "UNDM CAR REMOVE/REFIT PNEUMATIC BRAKE DRIVER": 1,
-  "UNDM CAR REMOVE/REFIT ¾\" GANGED VENTED COCKS (BCIC/PBIC)": 2,
-  "UNDM CAR REMOVE/REFIT WSP DUMP VALVE - MOTOR": 1,
-  "UNDM CAR REMOVE/REFIT WHISTLE - TYPE 3C (ENHANCED)": 1,
-  "UNDM CAR REMOVE/REFIT WHISTLE CONTROL VALVE & BUTTON ASSY UNDM": 2,
-  "UNDM CAR REMOVE/REFIT TRACTION SUPPLY PRESSURE REGULATOR": 1,
-  "UNDM CAR REMOVE/REFIT DOOR AIR SUPPLY PRESSURE REGULATOR (SUPPLIED WITH O-RINGS)": 1,
-  "UNDM CAR REMOVE/REFIT LOW MAIN LINE PRESSURE SWITCH": 1,
-  "UNDM CAR REMOVE/REFIT COUPLING-TEST POINT-QUICK RELEASE": 1,
-  "UNDM CAR REMOVE/REFIT MAINLINE CAB GAUGE": 1,
-  "UNDM CAR REMOVE/REFIT PRESSURE GAUGE (DOOR/TRACTION SUPP)": 1,
-  "UNDM CAR REMOVE/REFIT AIR FILTER WITH AUTOMATIC DRAIN": 1,
-  "UNDM CAR REMOVE/REFIT BSR CHECK VALVE (SUPPLIED WITH O-RINGS)": 1,
-  "UNDM CAR REMOVE/REFIT ½\" CHECK VALVE (SHOEGEAR AND LINEBREAKER AUX), SUPPLIED WITH O-RINGS": 1,
-  "UNDM CAR REMOVE/REFIT ½\" CHECK VALVE (SHOEGEAR MANUAL CONTROL VALVE), SUPPLIED WITH O-RINGS": 1,
-  "UNDM CAR REMOVE/REFIT ½\u00a0VENTED BALL VALVE (FLANGE MOUNTED)": 1,
-  "UNDM CAR REMOVE/REFIT AIR FLOW CUT-OFF VALVE BOGIE A": 1,
-  "UNDM CAR REMOVE/REFIT AIR FLOW CUT-OFF VALVE BOGIE D": 1,
-  "UNDM CAR REMOVE/REFIT RELAY PANEL 3": 1,
-  "UNDM CAR REMOVE/REFIT CURRENT BALANCE DETECTOR RELAY (CBR)": 1,
-  "UNDM -CAR REMOVE/REFIT RHEOSTATIC BRAKE RESISTOR FAN ASSEMBLY": 2,
-  "UNDM -  CAR REMOVE/REFIT REVERSE VOLTAGE RELAY FUSE": 3,
-  "UNDM -  CAR REMOVE/REFIT SHOE VOLTAGE RELAY FUSE 1 & 2 (SVRF 1 & 2)": 4,
-  "UNDM CAR REMOVE/REFIT AUTOCOUPLER UNDM RH 3-CAR, DRAWGEAR, RADIAL SUPPORT BAR, CONTACT BOX ASSY L/H & CONTACT BOX ASSY R/H": 4,
-  "UNDM CAR REMOVE/REFIT SEMI PERMANENT COUPLER BAR & DRAWGEAR INTERMEDIATE A": 4,
-  "UNDM CAR REMOVE/REFIT ANTI-CLIMB BUFFER ASSEMBLY UNDM": 2,
-  "UNDM CAR REMOVE/REFIT ANTI-CLIMB BUFFER ASSEMBLY INTERMEDIATE": 2,
-  "UNDM CAR REMOVE/REFIT LINE CURRENT MONITORING DEVICE": 2,
-  "UNDM CAR REMOVE/REFIT BRAKE SUPPLY RESERVOIR": 2,
-  "UNDM CAR REMOVE/REFIT UNCOUPLER CYLINDER HOSE UNDM": 1,
-  "UNDM CAR REMOVE/REFIT UNDM COUPLER HOSE & SEMI-PERM COUPLER HOSE": 2,
-  "UNDM CAR REMOVE/REFIT 20 KHZ DISTRIBUTION PANEL": 1,
-  "UNDM CAR REMOVE/REFIT POWER SUPPLY UNIT ISOLATION SWITCH": 1,
-  "UNDM - CAR REMOVE/REFIT CAPACITOR PANEL ASSEMBLY": 2,
-  "UNDM - SHED SUPPLY FUSE": 2,
-  "UNDM - WIPER MOTOR": 2,
-  "DM - CAR REMOVE/REFIT FILTER VOLTAGE MONITORING DEVICES VMD1, FVMD1": 1,
-  "UNDM - REMOVE/REFIT SALOON MODULAR SEATING - CATCH PLATE, GAS STRUT, SEAL, PINS, SPACE COVER AND INSULATION BLANKET": 4,
-  "UNDM  -  REMOVE/REFIT SALOON MODULAR SEATING - SEAT LOCK SPRING AND PIN SPRINGS": 2,
-  "UNDM  REMOVE/REFIT TMRT - TRAIN MANAGEMENT REMOTE TERMINAL": 1,
-  "UNDM CAR REMOVE/REFIT TMCC - TRAIN MANAGEMENT CAR CONTROLLER": 1,
-  "UNDM CAR REMOVE/REFIT SALOON AUDIO VISUAL UNIT (SAVU)": 1,
-  "UNDM -CAR REMOVE/REFIT SIGNAL RESISTOR PANEL": 1,
-  "UNDM -CAR REMOVE/REFIT EQUIPMENT GOVERNOR": 2,
-  "UNDM -  AUXILIARY ISOLATION CONTACTOR (AIC)": 2,
-  "UNDM - CAR REMOVE/REFIT OUTPUT FILTER PANELS": 2,
-  "UNDM - CHECK WHISTLE, CONTROL LEVER VALVE AND LOW MAINLINE PRESSURE SWITCH FITTINGS AND REPLACE ALL UNITS THAT HAVE THE UNAPPROVED PNEUMATIC BLUE SEAL FITTED WITH THE NORGREN SEALS": 2,
-  "UNDM CAR REMOVE/REFIT AUTOCOUPLER UNDM RH 4-CAR, DRAWGEAR, RADIAL SUPPORT BAR, CONTACT BOX ASSY L/H & CONTACT BOX ASSY R/H": 4,
-  "SPECIAL TRAILER  SALOON REMOVE/REFIT EMERGENCY LIGHT INVERTERS": 1,
-  "SPECIAL TRAILER  SALOON REMOVE/REFIT MCBS": 1,
-  "SPECIAL TRAILER SALOON REMOVE/REFIT MORS SMITT RELAYS": 1,
-  "SPECIAL TRAILER CAR REMOVE BOGIE A": 4,
-  "SPECIAL TRAILER CAR REFIT BOGIE A": 4,
-  "SPECIAL TRAILER CAR REMOVE BOGIE D": 4,
-  "SPECIAL TRAILER CAR REFIT BOGIE D": 4,
-  "SPECIAL TRAILER CAR REMOVE/REFIT WSP CONTROL UNIT": 1,
-  "SPECIAL TRAILER CAR REMOVE/REFIT SERVICE BRAKE DROP HOSE BOGIE A": 2,
-  "SPECIAL TRAILER CAR REMOVE/REFIT SERVICE BRAKE DROP HOSE BOGIE D": 2,
-  "SPECIAL TRAILER - AXLE-END SPEED PROBE HOUSING (WSP)": 1,
-  "SPECIAL TRAILER CAR REMOVE/REFIT BRAKE CYLINDER PRESSURE SWITCH 1 (FOR ALL CARS)": 1,
-  "SPECIAL TRAILER CAR REMOVE/REFIT BRAKE CYLINDER PRESSURE SWITCH 2 (FOR TR CARS)": 1,
-  "SPECIAL TRAILER CAR REMOVE/REFIT ½\u00a0VENTED BALL VALVE (VLCV / SYSTEM DRAIN / WHISTLE)": 1,
-  "SPECIAL TRAILER CAR REMOVE/REFIT VARIABLE LOAD VALVE - T/DIT CAR": 1,
-  "SPECIAL TRAILER CAR REMOVE/REFIT BRAKE RELEASE VALVE": 2,
-  "SPECIAL TRAILER CAR REMOVE/REFIT BRAKE CYLINDER SALOON GAUGES": 1,
-  "SPECIAL TRAILER CAR REMOVE/REFIT CLOSED LOOP ANALOGUE UNIT (CLAU) - T/ DIT CAR": 1,
-  "SPECIAL TRAILER CAR REMOVE/REFIT PNEUMATIC BRAKE DRIVER": 1,
-  "SPECIAL TRAILER CAR REMOVE/REFIT ¾\" VENTED BALL VALVE (BCIC)": 1,
-  "SPECIAL TRAILER CAR REMOVE/REFIT WSP DUMP VALVE - TRAILER": 1,
-  "SPECIAL TRAILER CAR REMOVE/REFIT DOOR AIR SUPPLY PRESSURE REGULATOR (SUPPLIED WITH O-RINGS)": 1,
-  "SPECIAL TRAILER CAR REMOVE/REFIT COUPLING-TEST POINT-QUICK RELEASE": 1,
-  "SPECIAL TRAILER CAR REMOVE/REFIT PRESSURE GAUGE (DOOR/TRACTION SUPP)": 1,
-  "SPECIAL TRAILER CAR REMOVE/REFIT AIR FILTER WITH AUTOMATIC DRAIN": 1,
-  "SPECIAL TRAILER CAR REMOVE/REFIT BSR CHECK VALVE (SUPPLIED WITH O-RINGS)": 1,
-  "SPECIAL TRAILER CAR REMOVE/REFIT ½\u00a0VENTED BALL VALVE (FLANGE MOUNTED)": 1,
-  "SPECIAL TRAILER CAR REMOVE/REFIT AIR FLOW CUT-OFF VALVE BOGIE A": 1,
-  "SPECIAL TRAILER CAR REMOVE/REFIT AIR FLOW CUT-OFF VALVE BOGIE D": 1,
-  "SPECIAL TRAILER CAR REMOVE/REFIT ANTI-CLIMB BUFFER ASSEMBLY INTERMEDIATE A END": 2,
-  "SPECIAL TRAILER CAR REMOVE/REFIT ANTI-CLIMB BUFFER ASSEMBLY INTERMEDIATE D END": 2,
-  "DO NOT FILL - DUPLICATE -SPECIAL TRAILER CAR REMOVE/REFIT DRAWGEAR INTERMEDIATE D END & SEMI-PERMANENT COUPLER BAR": 4,
-  "DO NOT FILL - DUPLICATE - SPECIAL TRAILER CAR REMOVE/REFIT DRAWGEAR INTERMEDIATE A END & SEMI-PERMANENT COUPLER BAR": 4,
-  "SPECIAL TRAILER CAR REMOVE/REFIT BRAKE SUPPLY RESERVOIR": 2,
-  "SPECIAL TRAILER CAR REMOVE/REFIT UNDM & TC CARS COUPLER HOSES/SEMI-PERM HOSES": 2,
-  "SPECIAL TRAILER - REMOVE/REFIT SALOON MODULAR SEATING - CATCH PLATE, GAS STRUT, SEAL, PINS, SPACE COVER AND INSULATION BLANKET": 4,
-  "SPECIAL TRAILER - REMOVE/REFIT SALOON MODULAR SEATING - SEAT LOCK SPRING AND PIN SPRINGS": 2,
-  "SPECIAL TRAILER CAR REMOVE/REFIT SALOON AUDIO VISUAL UNIT (SAVU)": 1,
-  "TRAILER CAR REMOVE/REFIT 4 X TRAIN MANAGEMENT REMOTE TERMINALS.": 1,
-  "TRAILER CAR REMOVE/REFIT BRAKE CYLINDER PRESSURE SWITCH 1 (FOR ALL CARS)": 1,
-  "TRAILER CAR REMOVE/REFIT ½\u00a0VENTED BALL VALVE (VLCV / SYSTEM DRAIN / WHISTLE)": 1,
-  "DO NOT FILL - DUPLICATE - TRAILER CAR REMOVE/REFIT DRAWGEAR INTERMEDIATE A END & SEMI-PERMANENT COUPLER BAR": 4,
-  "TRAILER CAR REMOVE/REFIT DRAWGEAR INTERMEDIATE D END & SEMI-PERMANENT COUPLER BAR": 4,
-  "TRAILER CAR REMOVE/REFIT BATTERY SUPPLY CAPACITORS (BSK 1, 2, 3)  NON ELECTROLYTIC CAPACITOR": 2,
-  "TRAILER - REMOVE/REFIT BATTERY ISOLATION CONTACTORS N(C-BIC1 AND C-BIC 2)": 2,
-  "TRAILER - REMOVE/REFIT SALOON MODULAR SEATING - CATCH PLATE, GAS STRUT, SEAL, PINS, SPACE COVER AND INSULATION BLANKET": 4,
-  "TRAILER -  REMOVE/REFIT SALOON MODULAR SEATING - SEAT LOCK SPRING AND PIN SPRINGS": 2,
-  "UNDM CAR REMOVE/REFIT CURRENT BALANCE RELAY PANEL": 1,
-  "TRAILER - REPLACE DE-ICING HOSE POSITIVE (TO NOZZLE)": 2,
-  "TRAILER - REPLACE DE-ICING HOSE NEGATIVE (TO NOZZLE)": 2,
-  "TRAILER - REPLACE DE-ICING HOSE 1 FROM TANK": 2,
-  "TRAILER - REPLACE DE-ICING HOSE 2 FROM TANK": 2,
-  "TRAILER - REPLACE DE-ICING HOSE 3 FROM TANK": 2,
-  "TRAILER - REPLACE - DE-ICING ANTI-VIBRATION MOUNTS": 2,
-  "TRAILER - REPLACE DE-ICER TANK": 2,
-  "DM CAR REMOVE/REFIT WHISTLE CONTROL LEVER VALVE (DM DRIVER'S SIDE)": 2,
-  "DM - ASK CAPACITOR REPLACE": 2,
-  "DM CAR REMOVE/REFIT WHISTLE CONTROL LEVER VALVE DM DRIVER'S SIDE)": 2,
-  "DM - CAR REMOVE/REFIT MASTER CONTROL SWITCH (MSC)": 1,
-  "DM CAR REMOVE/REFIT SEMI PERMANENT COUPLER BAR AND DRAWGEAR INTERMEDIATE D": 4,
-  "TRAILER - WSP SPEED PROBE ASSEMBLY REPLACEMEND FOR NEW MODIFIED DESIGN BRACKET.": 1,
-  "TRAILER CAR REMOVE/REFIT DRAWGEAR INTERMEDIATE A END & SEMI PERMANENT COUPLER BAR": 4,
-  "SPECIAL TRAILER CAR REMOVE/REFIT DRAWGEAR INTERMEDIATE D END & SEMI-PERMANENT COUPLER BAR": 4,
-  "SPECIAL TRAILER CAR REMOVE/REFIT DRAWGEAR INTERMEDIATE A END & SEMI-PERMANENT COUPLER BAR": 4,
-  "TRAILER CAR REMOVE/REFIT DRAWGEAR INTERMEDIATE A END & SEMI-PERMANENT COUPLER BAR": 4,
-  "DO NOT FILL - DUPLICATE  -TRAILER CAR REMOVE/REFIT DRAWGEAR INTERMEDIATE A END & SEMI PERMANENT COUPLER BAR": 4,
-  "DM CAR REMOVE/REFIT WHISTLE CONTROL LEVER VALVE DM DRIVER'S SIDE.": 2,
-  "DM CAR REMOVE/REFIT WHISTLE CONTROL LEVER VALVE DM INSTRUCTOR  SIDE": 1
-}
-
-// Helper function to get number of people for a task
+// Task name -> Number of people mapping (from Excel column M) is in
+// src/data/taskPeople.json, shared with rollup_efficiency.py so the rollup and
+// this page use the same multiplier. A 7-hour job with 2 people = 14 man-hours of work
 const getTaskPeopleCount = (taskName) => {
   if (!taskName) return 1
   const upperName = taskName.toString().trim().toUpperCase()
   return TASK_PEOPLE_MAP[upperName] || 1
 }
 
+const completedByList = (completedBy) => {
+  if (!completedBy) return []
+  return Array.isArray(completedBy) ? completedBy : [completedBy]
+}
+
+// Team a completion counts towards - same rules as rollup_efficiency.attribute_team
+// and the completion_status_counts view (migrations/012_dashboard_summary.sql)
+const attributeTeam = (c) => {
+  if (c.teams) {
+    // Rename "Night Shift" to "Team D"
+    return c.teams.name === 'Night Shift' ? 'Team D' : c.teams.name
+  }
+  const hasTFOS = completedByList(c.completed_by).some(name =>
+    name && name.toString().toUpperCase().includes('TFOS')
+  )
+  return hasTFOS ? 'TFOS' : 'No Team'
+}
+
+// Summarize efficiency_daily rollup rows (see rollup_efficiency.py) per team:
+// person-days = unique (initial, date) pairs, person-minutes = man-minutes of completed
+// work. Completions without a date (work_date null) add minutes but no person-days.
+const summarizeRollup = (rows) => {
+  const teams = {}
+  rows.forEach(r => {
+    if (!teams[r.team]) {
+      teams[r.team] = { personDaySet: new Set(), personMinutes: 0 }
+    }
+    teams[r.team].personMinutes += Number(r.person_minutes) || 0
+    if (r.initial && r.work_date) teams[r.team].personDaySet.add(`${r.initial}|${r.work_date}`)
+  })
+  return Object.fromEntries(Object.entries(teams).map(([name, t]) => [
+    name, { personDays: t.personDaySet.size, personMinutes: t.personMinutes }
+  ]))
+}
+
+// Reduce raw completions to the rows the summary views and the rollup return, so the
+// filtered and unfiltered dashboards go through the same calculation
+const summarizeCompletions = (completions) => {
+  const counts = {}
+  const rollupRows = []
+  const days = {}
+
+  completions.forEach(c => {
+    const team = attributeTeam(c)
+    const trainNumber = c.cars?.train_units?.train_number ?? null
+    const key = `${trainNumber}|${team}|${c.status}`
+    if (!counts[key]) {
+      counts[key] = { train_number: trainNumber, team, color: c.teams?.color ?? null, status: c.status, task_count: 0 }
+    }
+    counts[key].task_count++
+
+    const workDate = c.completed_at ? c.completed_at.split('T')[0] : null
+    if (workDate) days[workDate] = (days[workDate] || 0) + 1
+
+    if (c.status === 'completed') {
+      // Multiply by number of people required for this task
+      rollupRows.push({
+        work_date: workDate,
+        team,
+        initial: '',
+        person_minutes: (c.total_minutes || 0) * getTaskPeopleCount(c.task_name)
+      })
+      completedByList(c.completed_by).forEach(person => {
+        if (person) {
+          rollupRows.push({ work_date: workDate, team, initial: person.toString().trim().toUpperCase(), person_minutes: 0 })
+        }
+      })
+    }
+  })
+
+  return {
+    counts: Object.values(counts),
+    teamEfficiency: summarizeRollup(rollupRows),
+    days: Object.entries(days).map(([work_date, task_count]) => ({ work_date, task_count }))
+  }
+}
+
 function EfficiencyDashboard() {
   const [loading, setLoading] = useState(true)
   const [loadingProgress, setLoadingProgress] = useState('')
@@ -461,58 +126,23 @@ function EfficiencyDashboard() {
   const [sortBy, setSortBy] = useState('train') // 'train' or 'completion'
   const [showTeamRoster, setShowTeamRoster] = useState(false)
   const [isRefreshing, setIsRefreshing] = useState(false)
-  const [cacheTimestamp, setCacheTimestamp] = useState(null)
-  const [cachedData, setCachedData] = useState(null)
+  const [loadedAt, setLoadedAt] = useState(null)
 
   useEffect(() => {
     loadTrains()
+    window.indexedDB?.deleteDatabase(LEGACY_CACHE_DB)
+  }, [])
 
-    // Check for cached data in IndexedDB on initial load
-    const initFromCache = async () => {
-      try {
-        const cached = await getCacheFromDB()
-        console.log('IndexedDB cache check:', {
-          hasCached: !!cached,
-          cars: cached?.cars?.length || 0,
-          completions: cached?.completions?.length || 0
-        })
-
-        if (cached?.cars?.length > 0 && cached?.completions?.length > 0) {
-          setCachedData({ cars: cached.cars, completions: cached.completions })
-          setCacheTimestamp(new Date(cached.timestamp))
-
-          // Load dashboard with cached data immediately - NO server fetch
-          console.log('Loading from IndexedDB cache - NO server fetch')
-          loadDashboardDataWithCache({ cars: cached.cars, completions: cached.completions })
-          return true
-        }
-      } catch (e) {
-        console.error('Error reading IndexedDB cache:', e)
-      }
-      return false
-    }
-
-    initFromCache().then(hadCache => {
-      if (!hadCache) {
-        // No valid cache - must load from server
-        console.log('No valid cache found, loading from server...')
-        loadDashboardData(true)
-      }
-    })
+  useEffect(() => {
+    loadDashboardData(selectedTrains)
 
     // Listen for refresh events from navbar
     const handleRefreshEvent = () => {
-      handleRefresh()
+      setIsRefreshing(true)
+      loadDashboardData(selectedTrains)
     }
     window.addEventListener('refreshDashboardData', handleRefreshEvent)
     return () => window.removeEventListener('refreshDashboardData', handleRefreshEvent)
-  }, [])
-
-  useEffect(() => {
-    // Only reload when filters change (not on initial mount)
-    if (cachedData) {
-      loadDashboardDataWithCache(cachedData)
-    }
   }, [selectedTimeRange, selectedTrains])
 
   const loadTrains = async () => {
@@ -533,16 +163,17 @@ function EfficiencyDashboard() {
   }
 
   // Fetch all data with pagination (Supabase has 1000 row limit)
-  const fetchAllData = async (table, select, filterFn = null) => {
+  // applyFilter adds server-side filters/ordering to each page's query
+  const fetchAllData = async (table, select, applyFilter = query => query) => {
     const allData = []
     const batchSize = 1000
     let offset = 0
     let hasMore = true
 
     while (hasMore) {
-      const { data, error } = await supabase
+      const { data, error } = await applyFilter(supabase
         .from(table)
-        .select(select)
+        .select(select))
         .range(offset, offset + batchSize - 1)
 
       if (error) {
@@ -560,143 +191,92 @@ function EfficiencyDashboard() {
       }
     }
 
-    return filterFn ? allData.filter(filterFn) : allData
+    return allData
   }
 
-  // Process cached data without fetching from server
-  const loadDashboardDataWithCache = (cache) => {
-    setLoading(true)
-    setLoadingProgress('Loading from cache...')
-
-    try {
-      const allCars = cache.cars || []
-      const allCompletions = cache.completions || []
-
-      // Filter cars by selected trains (multi-select)
-      let filteredCarIds = []
-      let filteredCars = allCars
-
-      if (selectedTrains.length > 0) {
-        // Filter by multiple selected trains
-        filteredCars = allCars.filter(car => selectedTrains.includes(car.train_units?.train_number))
-        filteredCarIds = filteredCars.map(c => c.id)
-      } else {
-        // No filter = all trains
-        filteredCarIds = allCars.map(c => c.id)
-      }
-
-      // Filter completions by selected trains
-      let completions = allCompletions
-      if (selectedTrains.length > 0) {
-        completions = allCompletions.filter(c => filteredCarIds.includes(c.car_id))
-      }
-
-      processCompletionsData(completions)
-    } catch (error) {
-      console.error('Error processing cached data:', error)
-    }
-    setLoading(false)
+  // All trains: the efficiency_daily rollup and the summary views
+  // (migrations/012_dashboard_summary.sql) - a few hundred rows instead of every completion
+  const loadSummary = async () => {
+    const [rollupRows, counts, days] = await Promise.all([
+      fetchAllData('efficiency_daily', 'work_date, team, initial, person_minutes'),
+      fetchAllData('completion_status_counts', 'train_number, team, color, status, task_count'),
+      fetchAllData('completions_by_day', 'work_date, task_count')
+    ])
+    return { counts, teamEfficiency: summarizeRollup(rollupRows), days }
   }
 
-  // Shared function to process completions data
-  const processCompletionsData = (completions) => {
-    if (!completions) return
-
-    // Calculate stats from actual task_completions data
-    const totalTasks = completions.length
-    const completed = completions.filter(c => c.status === 'completed').length
-    const inProgress = completions.filter(c => c.status === 'in_progress').length
-    const pending = completions.filter(c => c.status === 'pending').length
-
-    setStats({
-      totalTasks,
-      completedTasks: completed,
-      inProgressTasks: inProgress,
-      pendingTasks: pending,
-      overallEfficiency: totalTasks > 0 ? Math.round((completed / totalTasks) * 100) : 0
-    })
+  // Selected trains: the rollup and views cover all trains, so fetch only these
+  // trains' completions and summarize them the same way
+  const loadTrainCompletions = async (trainNumbers) => {
+    const completions = await fetchAllData(
+      'task_completions',
+      'id, status, task_name, total_minutes, completed_by, completed_at, teams(name, color), cars!inner(train_units!inner(train_number))',
+      query => query.in('cars.train_units.train_number', trainNumbers).order('id')
+    )
+    return summarizeCompletions(completions)
+  }
 
-    // Calculate team performance with person-days tracking
-    // Efficiency = task_hours / (8h × person-days)
-    // Where person-days = unique (person, date) combinations
+  // Set every widget from task counts per (train, team, status), per-team
+  // person-days/minutes and task counts per completed_at date
+  const applySummary = ({ counts, teamEfficiency, days }) => {
+    const statusTotals = {}
     const teamStats = {}
-    const personDaysTracker = {} // { teamKey: Set of "person|date" strings }
+    const trainStats = {}
 
-    completions.forEach(c => {
-      let teamKey = null
-      let teamName = null
-      let teamColor = null
+    counts.forEach(r => {
+      const count = Number(r.task_count) || 0
+      statusTotals[r.status] = (statusTotals[r.status] || 0) + count
 
-      if (c.teams) {
-        // Has a team assigned in database
-        teamKey = c.teams.id
-        // Rename "Night Shift" to "Team D"
-        teamName = c.teams.name === 'Night Shift' ? 'Team D' : c.teams.name
-        teamColor = c.teams.color
-      } else if (c.completed_by) {
-        // No team assigned - check if TFOS is in completed_by
-        const completedByArr = Array.isArray(c.completed_by) ? c.completed_by : [c.completed_by]
-        const hasTFOS = completedByArr.some(name =>
-          name && name.toString().toUpperCase().includes('TFOS')
-        )
-        if (hasTFOS) {
-          teamKey = 'TFOS'
-          teamName = 'TFOS'
-          teamColor = '#EF4444' // Red color for TFOS
+      // Exclude TFOS from efficiency ranking - it's a location, not a team
+      if (r.team !== 'TFOS' && r.team !== 'No Team') {
+        if (!teamStats[r.team]) {
+          teamStats[r.team] = { name: r.team, color: r.color, completed: 0, inProgress: 0, total: 0 }
         }
+        const team = teamStats[r.team]
+        team.color = team.color || r.color
+        team.total += count
+        if (r.status === 'completed') team.completed += count
+        if (r.status === 'in_progress') team.inProgress += count
       }
 
-      if (teamKey) {
-        if (!teamStats[teamKey]) {
-          teamStats[teamKey] = {
-            name: teamName,
-            color: teamColor,
-            completed: 0,
-            inProgress: 0,
-            total: 0,
-            totalMinutes: 0,
-            completedMinutes: 0
+      // Train progress (aggregate by train number T01-T62)
+      if (r.train_number) {
+        const trainKey = `T${String(r.train_number).padStart(2, '0')}`
+        if (!trainStats[trainKey]) {
+          trainStats[trainKey] = {
+            name: trainKey,
+            trainNumber: r.train_number,
+            totalTasks: 0,
+            completedTasks: 0,
+            inProgressTasks: 0
           }
-          personDaysTracker[teamKey] = new Set()
         }
-        teamStats[teamKey].total++
-        const taskMinutes = c.total_minutes || 0
-        // Multiply by number of people required for this task
-        // A 7-hour job with 2 people = 14 man-hours of work
-        const numPeople = getTaskPeopleCount(c.task_name)
-        const adjustedMinutes = taskMinutes * numPeople
-        teamStats[teamKey].totalMinutes += adjustedMinutes
-
-        if (c.status === 'completed') {
-          teamStats[teamKey].completed++
-          teamStats[teamKey].completedMinutes += adjustedMinutes
-
-          // Track person-days for efficiency calculation
-          // Each unique (person, date) combination = 12 hours available (12-hour shifts)
-          if (c.completed_at && c.completed_by) {
-            const dateStr = c.completed_at.split('T')[0]
-            const completedByArr = Array.isArray(c.completed_by) ? c.completed_by : [c.completed_by]
-            completedByArr.forEach(person => {
-              if (person) {
-                const personDay = `${person.toString().trim().toUpperCase()}|${dateStr}`
-                personDaysTracker[teamKey].add(personDay)
-              }
-            })
-          }
+        trainStats[trainKey].totalTasks += count
+        if (r.status === 'completed') {
+          trainStats[trainKey].completedTasks += count
+        } else if (r.status === 'in_progress') {
+          trainStats[trainKey].inProgressTasks += count
         }
-        if (c.status === 'in_progress') teamStats[teamKey].inProgress++
       }
     })
 
+    const totalTasks = Object.values(statusTotals).reduce((sum, n) => sum + n, 0)
+    const completed = statusTotals.completed || 0
+    setStats({
+      totalTasks,
+      completedTasks: completed,
+      inProgressTasks: statusTotals.in_progress || 0,
+      pendingTasks: statusTotals.pending || 0,
+      overallEfficiency: totalTasks > 0 ? Math.round((completed / totalTasks) * 100) : 0
+    })
+
     // Sort by number of completed tasks (descending) for ranking
-    // Calculate efficiency: task_hours / (8h × person-days)
-    // Exclude TFOS from efficiency ranking - it's a location, not a team
-    const teamData = Object.entries(teamStats)
-      .filter(([teamKey, team]) => team.name !== 'TFOS') // Exclude TFOS
-      .map(([teamKey, team]) => {
-        const personDays = personDaysTracker[teamKey]?.size || 0
+    // Efficiency = task_hours (x people) / (12h × person-days)
+    const teamData = Object.values(teamStats)
+      .map(team => {
+        const { personDays = 0, personMinutes = 0 } = teamEfficiency[team.name] || {}
         const availableHours = personDays * 12  // 12-hour shifts
-        const taskHours = team.completedMinutes / 60
+        const taskHours = personMinutes / 60
         // Real efficiency = work hours / available hours (12h per person per shift)
         const realEfficiency = availableHours > 0 ? Math.round((taskHours / availableHours) * 100) : 0
 
@@ -705,74 +285,36 @@ function EfficiencyDashboard() {
           personDays,
           availableHours: Math.round(availableHours * 10) / 10,
           efficiency: team.total > 0 ? Math.round((team.completed / team.total) * 100) : 0, // Task completion %
-          totalHours: Math.round(team.totalMinutes / 60 * 10) / 10, // 1 decimal
-          completedHours: Math.round(team.completedMinutes / 60 * 10) / 10,
-          timeEfficiency: realEfficiency // Real efficiency based on 8h/person/day
+          completedHours: Math.round(taskHours * 10) / 10,
+          timeEfficiency: realEfficiency
         }
       }).sort((a, b) => b.completed - a.completed)
 
     setTeamPerformance(teamData)
 
-    // Calculate train progress (aggregate by train number T01-T62)
-    const trainStats = {}
-    completions.forEach(c => {
-      const trainNumber = c.cars?.train_units?.train_number
-      if (trainNumber) {
-        const trainKey = `T${String(trainNumber).padStart(2, '0')}`
-        if (!trainStats[trainKey]) {
-          trainStats[trainKey] = {
-            name: trainKey,
-            trainNumber,
-            totalTasks: 0,
-            completedTasks: 0,
-            inProgressTasks: 0
-          }
-        }
-        trainStats[trainKey].totalTasks++
-        if (c.status === 'completed') {
-          trainStats[trainKey].completedTasks++
-        } else if (c.status === 'in_progress') {
-          trainStats[trainKey].inProgressTasks++
-        }
-      }
-    })
-
-    const trainData = Object.values(trainStats).map(train => ({
+    setUnitProgress(Object.values(trainStats).map(train => ({
       ...train,
       percent: train.totalTasks > 0 ? Math.round((train.completedTasks / train.totalTasks) * 100) : 0
-    }))
-
-    setUnitProgress(trainData)
+    })))
 
-    // Calculate completions by day (from actual data, not just last 14 days)
-    const dailyStats = {}
+    // Completions by day (from actual data, not just last 14 days)
     const now = new Date()
     const maxValidYear = now.getFullYear() + 1 // Allow up to next year
     const minValidYear = 2020 // No dates before 2020
 
-    completions.forEach(c => {
-      if (c.completed_at) {
-        const dateStr = c.completed_at.split('T')[0]
-        // Validate date - must be a valid format YYYY-MM-DD
-        if (dateStr && dateStr.match(/^\d{4}-\d{2}-\d{2}$/)) {
-          // Additional validation: check year is reasonable
-          const year = parseInt(dateStr.substring(0, 4))
-          if (year >= minValidYear && year <= maxValidYear) {
-            if (!dailyStats[dateStr]) {
-              dailyStats[dateStr] = { date: dateStr, count: 0 }
-            }
-            dailyStats[dateStr].count++
-          }
-        }
-      }
-    })
-
     // Sort by actual date (not string comparison) and take last 30 entries
-    const sortedDays = Object.values(dailyStats)
+    const sortedDays = days
+      .filter(d => {
+        // Validate date - must be a valid format YYYY-MM-DD with a reasonable year
+        if (!d.work_date || !d.work_date.match(/^\d{4}-\d{2}-\d{2}$/)) return false
+        const year = parseInt(d.work_date.substring(0, 4))
+        return year >= minValidYear && year <= maxValidYear
+      })
       .map(d => ({
-        ...d,
-        dateObj: new Date(d.date + 'T00:00:00'), // Parse as local time
-        displayDate: new Date(d.date + 'T00:00:00').toLocaleDateString('en-US', {
+        date: d.work_date,
+        count: Number(d.task_count) || 0,
+        dateObj: new Date(d.work_date + 'T00:00:00'), // Parse as local time
+        displayDate: new Date(d.work_date + 'T00:00:00').toLocaleDateString('en-US', {
           month: 'short',
           day: 'numeric',
           year: 'numeric'
@@ -785,58 +327,16 @@ function EfficiencyDashboard() {
     setCompletionsByDay(sortedDays)
   }
 
-  const handleRefresh = async () => {
-    setIsRefreshing(true)
-    setCachedData(null)
-    await clearCacheFromDB()
-    loadDashboardData(true)
-  }
-
-  const loadDashboardData = async (forceRefresh = false) => {
+  const loadDashboardData = async (trainNumbers) => {
     setLoading(true)
     setLoadingProgress('Starting data load...')
     try {
-      // Get all cars with their train unit info (with pagination)
-      setLoadingProgress('Loading cars from server...')
-      const allCars = await fetchAllData('cars', '*, train_units(*), car_types(*)')
-
-      // Get all completions with pagination
-      setLoadingProgress('Loading task completions from server...')
-      const allCompletions = await fetchAllData('task_completions', `
-        *,
-        teams(*),
-        cars(*, train_units(*), car_types(*))
-      `)
-
-      // Cache the data to IndexedDB (no size limit like localStorage)
-      try {
-        await saveCacheToDB(allCars, allCompletions)
-        // Store in state for filter changes
-        setCachedData({ cars: allCars, completions: allCompletions })
-        setCacheTimestamp(new Date())
-      } catch (e) {
-        console.error('Could not cache data to IndexedDB:', e)
-      }
-
-      // Filter cars by selected trains (multi-select)
-      let filteredCarIds = []
-      let filteredCars = allCars || []
-
-      if (selectedTrains.length > 0 && allCars) {
-        filteredCars = allCars.filter(car => selectedTrains.includes(car.train_units?.train_number))
-        filteredCarIds = filteredCars.map(c => c.id)
-      } else if (allCars) {
-        filteredCarIds = allCars.map(c => c.id)
-      }
-
-      // Filter completions by selected trains
-      let completions = allCompletions || []
-      if (selectedTrains.length > 0 && allCompletions) {
-        completions = allCompletions.filter(c => filteredCarIds.includes(c.car_id))
-      }
-
+      const summary = trainNumbers.length > 0
+        ? await loadTrainCompletions(trainNumbers)
+        : await loadSummary()
       setLoadingProgress('Processing data...')
-      processCompletionsData(completions)
+      applySummary(summary)
+      setLoadedAt(new Date())
     } catch (error) {
       console.error('Error loading dashboard data:', error)
     }
@@ -918,9 +418,9 @@ function EfficiencyDashboard() {
       <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', marginBottom: '1.5rem', flexWrap: 'wrap', gap: '1rem' }}>
         <div>
           <h1 style={{ margin: 0 }}>Efficiency Dashboard</h1>
-          {cacheTimestamp && (
+          {loadedAt && (
             <div style={{ fontSize: '0.75rem', color: 'var(--text-muted)', marginTop: '0.25rem' }}>
-              Data cached: {cacheTimestamp.toLocaleString()}
+              Data loaded: {loadedAt.toLocaleString()}
             </div>
           )}
         </div>
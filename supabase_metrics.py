@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Drop-in Supabase client that records every PostgREST request.
+
+    from supabase_metrics import create_client
+
+Each request is recorded with its table (or rpc function), operation,
+row count, bytes sent/received and latency. At exit a summary per table
+and operation is printed: requests, rows, bytes, p50/p95 latency, and
+how much of the run was spent waiting on requests - a job whose request
+time is close to its wall time is bound by round trips.
+
+Environment:
+    SUPABASE_METRICS=0              turn recording and the summary off
+    SUPABASE_METRICS_JSON=path      also write every request and the summary as JSON
+
+Recording uses httpx event hooks on the client's PostgREST session, so the
+query builders (.select/.update/.execute, table_scan, bulk_update, ...) are
+unchanged. instrument_http() adds the same hooks to a bare httpx client,
+e.g. the one batching.post_rows() writes through.
+"""
+
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+
+import httpx
+from supabase import acreate_client as _acreate_client
+from supabase import create_client as _create_client
+
+REST_PREFIX = "/rest/v1/"
+
+_START = "supabase_metrics_start"
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def format_bytes(n):
+    """1.2 MB style"""
+    for unit in ('B', 'KB', 'MB'):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == 'B' else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+def describe(request):
+    """(table, operation) of a PostgREST request"""
+    path = request.url.path
+    target = path.split(REST_PREFIX, 1)[1] if REST_PREFIX in path else path.strip('/')
+    if target.startswith('rpc/'):
+        return target[4:], 'rpc'
+    method = request.method
+    if method == 'GET':
+        return target, 'select'
+    if method == 'HEAD':
+        return target, 'count'
+    if method == 'POST':
+        return target, 'upsert' if 'resolution=' in request.headers.get('prefer', '') else 'insert'
+    if method == 'PATCH':
+        return target, 'update'
+    return target, method.lower()
+
+
+def request_bytes(request):
+    """Size of the request body (0 for a streamed body)"""
+    try:
+        return len(request.content)
+    except httpx.RequestNotRead:
+        return 0
+
+
+def row_count(request, response):
+    """
+    Rows read or written, from Content-Range ('0-999/*', '*/1234') when
+    PostgREST sends one, else from a JSON request body. None if unknown.
+    """
+    content_range = response.headers.get('content-range', '')
+    if '/' in content_range:
+        span, total = content_range.split('/', 1)
+        if '-' in span:
+            first, last = span.split('-', 1)
+            if first.isdigit() and last.isdigit():
+                return int(last) - int(first) + 1
+        if total.isdigit():
+            return int(total)
+        if span == '*':
+            return 0
+    if request.method in ('POST', 'PATCH') and request.headers.get('content-type', '').startswith('application/json'):
+        try:
+            body = json.loads(request.content)
+        except (httpx.RequestNotRead, ValueError):
+            return None
+        if isinstance(body, list):
+            return len(body)
+        if describe(request)[1] in ('insert', 'upsert'):
+            return 1
+    return None
+
+
+class RequestMetrics:
+    """Thread-safe log of requests made through instrumented clients"""
+
+    def __init__(self):
+        self.requests = []
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    # httpx event hooks (sync and async clients)
+
+    def on_request(self, request):
+        request.extensions[_START] = time.perf_counter()
+
+    def on_response(self, response):
+        response.read()
+        self.record(response)
+
+    async def aon_request(self, request):
+        self.on_request(request)
+
+    async def aon_response(self, response):
+        await response.aread()
+        self.record(response)
+
+    def record(self, response):
+        request = response.request
+        start = request.extensions.get(_START)
+        if start is None:
+            return
+        table, operation = describe(request)
+        entry = {
+            'table': table,
+            'operation': operation,
+            'status': response.status_code,
+            'rows': row_count(request, response),
+            'bytes_sent': request_bytes(request),
+            'bytes_received': len(response.content),
+            'seconds': time.perf_counter() - start,
+        }
+        with self._lock:
+            self.requests.append(entry)
+
+    def summary(self):
+        """One dict per (table, operation), busiest first, plus totals"""
+        with self._lock:
+            requests = list(self.requests)
+        groups = defaultdict(list)
+        for r in requests:
+            groups[(r['table'], r['operation'])].append(r)
+
+        rows = []
+        for (table, operation), entries in groups.items():
+            latencies = [e['seconds'] for e in entries]
+            rows.append({
+                'table': table,
+                'operation': operation,
+                'requests': len(entries),
+                'errors': sum(1 for e in entries if e['status'] >= 400),
+                'rows': sum(e['rows'] or 0 for e in entries),
+                'bytes_sent': sum(e['bytes_sent'] for e in entries),
+                'bytes_received': sum(e['bytes_received'] for e in entries),
+                'seconds': sum(latencies),
+                'p50_ms': percentile(latencies, 50) * 1000,
+                'p95_ms': percentile(latencies, 95) * 1000,
+            })
+        rows.sort(key=lambda r: -r['seconds'])
+
+        return {
+            'wall_seconds': time.perf_counter() - self.started,
+            'requests': len(requests),
+            'request_seconds': sum(r['seconds'] for r in requests),
+            'bytes_sent': sum(r['bytes_sent'] for r in requests),
+            'bytes_received': sum(r['bytes_received'] for r in requests),
+            'by_table': rows,
+        }
+
+    def print_summary(self):
+        summary = self.summary()
+        if not summary['requests']:
+            return
+        print("\n" + "=" * 70)
+        print("SUPABASE REQUESTS")
+        print("=" * 70)
+        print(f"  {'table':<28} {'op':<7} {'reqs':>6} {'rows':>8} {'sent':>9} "
+              f"{'p50':>7} {'p95':>7}")
+        for r in summary['by_table']:
+            errors = f"  ({r['errors']} failed)" if r['errors'] else ''
+            print(f"  {r['table'][:28]:<28} {r['operation']:<7} {r['requests']:>6} {r['rows']:>8} "
+                  f"{format_bytes(r['bytes_sent']):>9} {r['p50_ms']:>5.0f}ms {r['p95_ms']:>5.0f}ms{errors}")
+
+        wall = summary['wall_seconds']
+        waiting = summary['request_seconds']
+        print(f"\n  {summary['requests']} requests, {format_bytes(summary['bytes_sent'])} sent, "
+              f"{format_bytes(summary['bytes_received'])} received")
+        print(f"  Time in requests (summed over threads): {waiting:.1f}s of {wall:.1f}s wall"
+              + (f" ({waiting / wall * 100:.0f}%)" if wall > 0 else ''))
+
+    def write_json(self, path):
+        """Write the summary and every request to path (atomically)"""
+        with self._lock:
+            requests = list(self.requests)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'summary': self.summary(), 'requests': requests}, f, indent=2)
+        os.replace(tmp, path)
+
+    def report(self):
+        """atexit handler"""
+        self.print_summary()
+        path = os.environ.get('SUPABASE_METRICS_JSON')
+        if path and self.requests:
+            self.write_json(path)
+            print(f"  Request metrics written to {path}")
+
+
+METRICS = RequestMetrics()
+ENABLED = os.environ.get('SUPABASE_METRICS', '1') not in ('0', 'false', 'no', '')
+
+_report_registered = False
+
+
+def _register_report():
+    global _report_registered
+    if not _report_registered:
+        _report_registered = True
+        atexit.register(METRICS.report)
+
+
+def instrument_http(session, metrics=METRICS):
+    """Add the recording hooks to an httpx Client/AsyncClient (idempotent)"""
+    if not ENABLED:
+        return session
+    if isinstance(session, httpx.AsyncClient):
+        on_request, on_response = metrics.aon_request, metrics.aon_response
+    else:
+        on_request, on_response = metrics.on_request, metrics.on_response
+    hooks = session.event_hooks
+    if on_request not in hooks['request']:
+        session.event_hooks = {
+            'request': hooks['request'] + [on_request],
+            'response': hooks['response'] + [on_response],
+        }
+    _register_report()
+    return session
+
+
+class InstrumentedClient:
+    """
+    Wraps a supabase Client/AsyncClient. The PostgREST session is created
+    lazily and replaced on auth events, so it's (re)instrumented each time
+    a query is started; everything else is passed through.
+    """
+
+    def __init__(self, client, metrics=METRICS):
+        self._client = client
+        self._metrics = metrics
+
+    @property
+    def postgrest(self):
+        postgrest = self._client.postgrest
+        instrument_http(postgrest.session, self._metrics)
+        return postgrest
+
+    def table(self, table_name):
+        return self.postgrest.from_(table_name)
+
+    def from_(self, table_name):
+        return self.postgrest.from_(table_name)
+
+    def rpc(self, fn, params=None, *args, **kwargs):
+        self.postgrest  # instrument the current session
+        return self._client.rpc(fn, params, *args, **kwargs)
+
+    def schema(self, schema):
+        # A new PostgREST client with its own session
+        postgrest = self._client.schema(schema)
+        instrument_http(postgrest.session, self._metrics)
+        return postgrest
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def create_client(supabase_url, supabase_key, options=None):
+    """supabase.create_client, with request metrics unless SUPABASE_METRICS=0"""
+    client = _create_client(supabase_url, supabase_key, options)
+    return InstrumentedClient(client) if ENABLED else client
+
+
+async def acreate_client(supabase_url, supabase_key, options=None):
+    """supabase.acreate_client, with request metrics unless SUPABASE_METRICS=0"""
+    client = await _acreate_client(supabase_url, supabase_key, options)
+    return InstrumentedClient(client) if ENABLED else client
@@ -5,12 +5,14 @@ Supports both .xlsx and .xlsm formats (V3.x WorktoSheets)
 """
 
 import pandas as pd
-from supabase import create_client
+from supabase_metrics import create_client
 import os
 import re
 import sys
 from pathlib import Path
 from datetime import datetime
+from ingest_manifest import IngestManifest, MANIFEST_NAME
+from batching import AdaptiveBatcher
 
 # Supabase configuration
 SUPABASE_URL = "https://fsubmqjevlfpcirgsbhi.supabase.co"
@@ -30,6 +32,11 @@ SHEET_TO_CAR_TYPE = {
     'UNDM 4 Car': 'UNDM 4 Car'
 }
 
+# Size-based batching for bulk writes, shared across units so the
+# targets keep adapting over a whole folder sync
+row_batcher = AdaptiveBatcher()
+id_batcher = AdaptiveBatcher.for_ids()
+
 def get_car_types():
     """Fetch all car types from database"""
     response = supabase.table('car_types').select('*').execute()
@@ -180,8 +187,193 @@ def parse_worktosheet(file_path):
         'units_data': units_data
     }
 
-def upload_to_supabase(parsed_data, car_types):
-    """Upload parsed data to Supabase"""
+def build_unit_snapshot(unit_number, unit_cars, car_types, train_name, train_number, phase):
+    """Build the JSONB document consumed by the replace_unit_snapshot() SQL function"""
+    cars = []
+    for car_type_name, car_data in unit_cars.items():
+        car_type_id = car_types.get(car_type_name)
+        if not car_type_id:
+            print(f"    WARNING: Car type '{car_type_name}' not found!")
+            continue
+
+        cars.append({
+            'car_type_id': car_type_id,
+            'car_number': car_data['car_number'],
+            'tasks': [
+                {
+                    'task_name': task['task_name'],
+                    'description': task['description'],
+                    'status': task['status'],
+                    'completed_by': task['completed_by'],
+                    'sort_order': idx + 1
+                }
+                for idx, task in enumerate(car_data['tasks'])
+            ]
+        })
+
+    return {
+        'unit_number': unit_number,
+        'train_name': train_name,
+        'train_number': train_number,
+        'phase': phase,
+        'cars': cars
+    }
+
+
+def fetch_unit_completions(car_ids):
+    """Fetch the sheet-owned columns of every task completion for the given cars"""
+    rows = []
+    offset = 0
+    while car_ids:
+        result = supabase.table('task_completions').select(
+            'id, car_id, task_name, description, status, completed_by, sort_order'
+        ).in_('car_id', car_ids).order('id').range(offset, offset + 999).execute()
+        if not result.data:
+            break
+        rows.extend(result.data)
+        offset += 1000
+    return rows
+
+
+def diff_sync_unit_cars(unit_id, unit_cars, car_types):
+    """
+    Bring a unit's cars and task completions in line with the sheet by
+    sending only the rows that changed.
+
+    Tasks are matched by (car type, sort_order, task_name). Only the
+    columns the sheet owns (description, status, completed_by) are
+    compared and written, so columns filled in by the web app or the
+    enrichment jobs (team, dates, minutes, phase, notes) are preserved.
+    """
+    # Load the unit's current state in two requests
+    existing_cars = supabase.table('cars').select('id, car_type_id, car_number').eq('unit_id', unit_id).execute().data
+    cars_by_type = {}
+    car_deletes = []
+    for car in existing_cars:
+        if car['car_type_id'] in cars_by_type:
+            car_deletes.append(car['id'])
+        else:
+            cars_by_type[car['car_type_id']] = car
+
+    existing_tasks = fetch_unit_completions([c['id'] for c in cars_by_type.values()])
+    car_type_by_car = {c['id']: c['car_type_id'] for c in cars_by_type.values()}
+    tasks_by_key = {}
+    task_deletes = []
+    for row in existing_tasks:
+        key = (car_type_by_car[row['car_id']], row['sort_order'], row['task_name'])
+        if key in tasks_by_key:
+            task_deletes.append(row['id'])
+        else:
+            tasks_by_key[key] = row
+
+    # Cars: drop stale types, fix car numbers, then create missing ones.
+    # cars has UNIQUE(unit_id, car_number), so numbers are freed before
+    # they're reused
+    wanted_types = {}
+    for car_type_name, car_data in unit_cars.items():
+        car_type_id = car_types.get(car_type_name)
+        if not car_type_id:
+            print(f"    WARNING: Car type '{car_type_name}' not found!")
+            continue
+        wanted_types[car_type_id] = car_data
+
+    renumbered = []
+    for car_type_id, car in list(cars_by_type.items()):
+        if car_type_id not in wanted_types:
+            car_deletes.append(car['id'])
+            del cars_by_type[car_type_id]
+        elif car['car_number'] != wanted_types[car_type_id]['car_number']:
+            renumbered.append(car)
+
+    for batch in id_batcher.split(car_deletes):
+        with id_batcher.timed():
+            supabase.table('cars').delete().in_('id', batch).execute()
+
+    if renumbered:
+        # Postgres checks the constraint row by row, so when cars swap
+        # numbers park them on a unique placeholder first
+        targets = [wanted_types[c['car_type_id']]['car_number'] for c in renumbered]
+        if set(targets) & {c['car_number'] for c in renumbered}:
+            supabase.table('cars').upsert([
+                {'id': c['id'], 'unit_id': unit_id, 'car_type_id': c['car_type_id'], 'car_number': f"~{c['id']}"}
+                for c in renumbered
+            ]).execute()
+        supabase.table('cars').upsert([
+            {'id': c['id'], 'unit_id': unit_id, 'car_type_id': c['car_type_id'], 'car_number': number}
+            for c, number in zip(renumbered, targets)
+        ]).execute()
+
+    new_cars = [
+        {'unit_id': unit_id, 'car_type_id': car_type_id, 'car_number': car_data['car_number']}
+        for car_type_id, car_data in wanted_types.items()
+        if car_type_id not in cars_by_type
+    ]
+    if new_cars:
+        result = supabase.table('cars').insert(new_cars).execute()
+        for car in result.data:
+            cars_by_type[car['car_type_id']] = car
+
+    # Tasks: diff the sheet against what is stored
+    inserts = []
+    updates = []
+    seen = set()
+    for car_type_id, car_data in wanted_types.items():
+        car_id = cars_by_type[car_type_id]['id']
+        for idx, task in enumerate(car_data['tasks']):
+            key = (car_type_id, idx + 1, task['task_name'])
+            row = tasks_by_key.get(key)
+            if row is None:
+                inserts.append({
+                    'car_id': car_id,
+                    'task_name': task['task_name'],
+                    'description': task['description'],
+                    'status': task['status'],
+                    'completed_by': task['completed_by'],
+                    'sort_order': idx + 1
+                })
+                continue
+
+            seen.add(key)
+            if (row['description'] or '') != task['description'] or row['status'] != task['status'] \
+                    or (row['completed_by'] or []) != task['completed_by']:
+                updates.append({
+                    'id': row['id'],
+                    'car_id': car_id,
+                    'task_name': task['task_name'],
+                    'sort_order': idx + 1,
+                    'description': task['description'],
+                    'status': task['status'],
+                    'completed_by': task['completed_by'],
+                })
+
+    for key, row in tasks_by_key.items():
+        if key not in seen and key[0] in wanted_types:
+            task_deletes.append(row['id'])
+
+    # Apply in bulk
+    for batch in id_batcher.split(task_deletes):
+        with id_batcher.timed():
+            supabase.table('task_completions').delete().in_('id', batch).execute()
+    for batch in row_batcher.split(updates):
+        with row_batcher.timed():
+            supabase.table('task_completions').upsert(batch).execute()
+    for batch in row_batcher.split(inserts):
+        with row_batcher.timed():
+            supabase.table('task_completions').insert(batch).execute()
+
+    unchanged = len(seen) - len(updates)
+    print(f"    Cars: {len(new_cars)} created, {len(car_deletes)} deleted")
+    print(f"    Tasks: {len(inserts)} inserted, {len(updates)} updated, "
+          f"{len(task_deletes)} deleted, {unchanged} unchanged")
+
+
+def upload_to_supabase(parsed_data, car_types, replace=False):
+    """
+    Upload parsed data to Supabase.
+    By default only changed rows are written; replace=True atomically
+    replaces each unit's cars and task completions with a single
+    replace_unit_snapshot() call (migrations/004_replace_unit_snapshot.sql).
+    """
     if not parsed_data or not parsed_data['units_data']:
         print("  No data to upload")
         return
@@ -201,6 +393,13 @@ def upload_to_supabase(parsed_data, car_types):
     print(f"  Units: {unit_numbers}")
 
     for unit_number in unit_numbers:
+        if replace:
+            snapshot = build_unit_snapshot(unit_number, units_data[unit_number], car_types,
+                                           train_name, train_number, phase)
+            result = supabase.rpc('replace_unit_snapshot', {'snapshot': snapshot}).execute()
+            print(f"    Replaced unit: {unit_number} - {result.data['cars']} cars, {result.data['tasks']} tasks")
+            continue
+
         # Check if unit exists
         existing = supabase.table('train_units').select('id').eq('unit_number', unit_number).execute()
 
@@ -214,12 +413,6 @@ def upload_to_supabase(parsed_data, car_types):
                 'last_synced_at': datetime.now().isoformat()
             }).eq('id', unit_id).execute()
             print(f"    Updated unit: {unit_number}")
-
-            # Delete existing cars and task completions for this unit
-            cars = supabase.table('cars').select('id').eq('unit_id', unit_id).execute()
-            for car in cars.data:
-                supabase.table('task_completions').delete().eq('car_id', car['id']).execute()
-            supabase.table('cars').delete().eq('unit_id', unit_id).execute()
         else:
             # Create new unit
             result = supabase.table('train_units').insert({
@@ -233,37 +426,11 @@ def upload_to_supabase(parsed_data, car_types):
             unit_id = result.data[0]['id']
             print(f"    Created unit: {unit_number}")
 
-        # Create cars and tasks for this unit
-        for car_type_name, car_data in units_data[unit_number].items():
-            car_type_id = car_types.get(car_type_name)
-            if not car_type_id:
-                print(f"    WARNING: Car type '{car_type_name}' not found!")
-                continue
-
-            # Create car
-            car_result = supabase.table('cars').insert({
-                'unit_id': unit_id,
-                'car_type_id': car_type_id,
-                'car_number': car_data['car_number']
-            }).execute()
-            car_id = car_result.data[0]['id']
-
-            # Create task completions
-            for idx, task in enumerate(car_data['tasks']):
-                supabase.table('task_completions').insert({
-                    'car_id': car_id,
-                    'task_name': task['task_name'],
-                    'description': task['description'],
-                    'status': task['status'],
-                    'completed_by': task['completed_by'],
-                    'sort_order': idx + 1
-                }).execute()
-
-            print(f"    Created car: {car_type_name} (#{car_data['car_number']}) - {len(car_data['tasks'])} tasks")
+        diff_sync_unit_cars(unit_id, units_data[unit_number], car_types)
 
     print(f"\n  Upload complete!")
 
-def process_file(file_path):
+def process_file(file_path, replace=False):
     """Process a single WorktoSheets file"""
     # Get car types
     car_types = get_car_types()
@@ -274,38 +441,56 @@ def process_file(file_path):
 
     if parsed_data:
         # Upload to Supabase
-        upload_to_supabase(parsed_data, car_types)
+        upload_to_supabase(parsed_data, car_types, replace=replace)
     else:
         print("Failed to parse file")
 
-def process_folder(folder_path):
-    """Process all WorktoSheets files in a folder"""
+def process_folder(folder_path, force=False, replace=False):
+    """Process all WorktoSheets files in a folder, skipping unchanged files"""
     folder = Path(folder_path)
     files = list(folder.glob('**/*ork*heet*.xls*'))
 
     print(f"Found {len(files)} WorktoSheets file(s)")
 
+    manifest = IngestManifest(str(folder / MANIFEST_NAME))
+    if not force:
+        files = [f for f in files if not manifest.is_unchanged(str(f))]
+        print(f"Changed since last sync: {len(files)}")
+
     car_types = get_car_types()
 
     for file_path in files:
         parsed_data = parse_worktosheet(str(file_path))
-        if parsed_data:
-            upload_to_supabase(parsed_data, car_types)
+        if not parsed_data:
+            continue
+        if not force and manifest.rows_unchanged(str(file_path), parsed_data):
+            print("  Rows unchanged, skipping upload")
+        else:
+            upload_to_supabase(parsed_data, car_types, replace=replace)
+        manifest.record(str(file_path), parsed_data)
+        manifest.save()
 
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print("Usage: python sync_worksheets.py <file_or_folder_path>")
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    force = '--force' in sys.argv[1:]
+    replace = '--replace' in sys.argv[1:]
+
+    if len(args) < 1:
+        print("Usage: python sync_worksheets.py <file_or_folder_path> [--force] [--replace]")
         print("\nExamples:")
         print("  python sync_worksheets.py 'WorktosheetsV3.1 T1 - 067&122.xlsm'")
         print("  python sync_worksheets.py /path/to/downloads/")
+        print("  python sync_worksheets.py /path/to/downloads/ --force")
+        print("\n  --force    re-sync files even if unchanged since the last run")
+        print("  --replace  atomically replace each unit's cars in one RPC instead of diffing")
         sys.exit(1)
 
-    path = sys.argv[1]
+    path = args[0]
 
     if os.path.isfile(path):
-        process_file(path)
+        process_file(path, replace=replace)
     elif os.path.isdir(path):
-        process_folder(path)
+        process_folder(path, force=force, replace=replace)
     else:
         print(f"Error: Path not found: {path}")
         sys.exit(1)
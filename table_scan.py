@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Keyset-paginated streaming reads of whole Supabase tables.
+
+scan() pages through a table ordered by its primary key, asking for the
+rows after the last key it saw (WHERE id > last ORDER BY id LIMIT n)
+instead of .range(offset, ...). Every page costs the same however deep the
+scan is, and rows inserted or deleted mid-scan can't shift the pages and
+cause rows to be skipped or read twice. Rows are yielded as they arrive,
+so callers can stream without holding the whole table in memory.
+
+scan_parallel() splits the UUID key space into disjoint ranges and scans
+them from a few threads at once. Rows come back in no particular order.
+
+Where builds server-side filters once and applies them to any PostgREST
+request - a scan, a count, or a bulk update()/delete() - so tools fetch
+and change only the rows that match instead of filtering in Python.
+"""
+
+import queue
+import threading
+import uuid
+
+from postgrest.types import ReturnMethod
+
+PAGE_SIZE = 1000
+UUID_SPACE = 2 ** 128
+
+
+def format_value(value):
+    """Render a value for a PostgREST filter string (arrays as {a,b})"""
+    if value is None:
+        return 'null'
+    if isinstance(value, (list, tuple, set)):
+        return '{' + ','.join(str(v) for v in value) + '}'
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def condition(column, operator, value):
+    """One 'column.operator.value' condition for Where.any_of()"""
+    return f"{column}.{operator}.{format_value(value)}"
+
+
+class Where:
+    """
+    Composable server-side filters. Calling an instance applies them to a
+    query builder, so the same filters serve scan(where=...), count_rows()
+    and update()/delete() requests.
+    """
+
+    def __init__(self):
+        self._filters = []
+
+    def _add(self, method, *args):
+        self._filters.append((method, args))
+        return self
+
+    def eq(self, column, value):
+        return self._add('eq', column, value)
+
+    def neq(self, column, value):
+        return self._add('neq', column, value)
+
+    def gt(self, column, value):
+        return self._add('gt', column, format_value(value))
+
+    def gte(self, column, value):
+        return self._add('gte', column, format_value(value))
+
+    def lt(self, column, value):
+        return self._add('lt', column, format_value(value))
+
+    def lte(self, column, value):
+        return self._add('lte', column, format_value(value))
+
+    def in_(self, column, values):
+        return self._add('in_', column, list(values))
+
+    def contains(self, column, values):
+        """Array column contains all of `values` (cs)"""
+        return self._add('contains', column, list(values))
+
+    def is_null(self, column):
+        return self._add('is_', column, 'null')
+
+    def any_of(self, *conditions):
+        """OR of condition() strings"""
+        return self._add('or_', ','.join(conditions))
+
+    def outside(self, column, low, high):
+        """column < low OR column > high (NULLs don't match)"""
+        return self.any_of(condition(column, 'lt', low), condition(column, 'gt', high))
+
+    def distinct_from(self, column, value):
+        """column IS DISTINCT FROM value - unlike neq, NULLs match"""
+        return self.any_of(condition(column, 'is', None), condition(column, 'neq', value))
+
+    def __call__(self, query):
+        for method, args in self._filters:
+            query = getattr(query, method)(*args)
+        return query
+
+
+def count_rows(client, table, where=None, key='id'):
+    """Exact row count matching `where`, without fetching the rows"""
+    query = client.table(table).select(key, count='exact')
+    if where:
+        query = where(query)
+    return query.limit(1).execute().count
+
+
+def bulk_update(client, table, values, where):
+    """
+    Apply `values` to every row matching `where` in a single
+    UPDATE ... WHERE request. Returns the number of rows changed.
+    """
+    query = client.table(table).update(values, count='exact', returning=ReturnMethod.minimal)
+    return where(query).execute().count or 0
+
+
+def select_columns(columns, key):
+    """Column projection for a scan, making sure the key column is included"""
+    if columns.strip() == '*':
+        return columns
+    names = [c.strip() for c in columns.split(',')]
+    if key not in names:
+        return f"{key}, {columns}"
+    return columns
+
+
+def scan(client, table, columns='*', key='id', page_size=PAGE_SIZE,
+         where=None, lower=None, upper=None, progress_every=0, source=None):
+    """
+    Yield rows of `table` in key order, one page at a time.
+
+    columns: PostgREST select string, e.g. 'id, task_name, total_minutes'
+    where: a Where, or any function taking and returning the query builder,
+           for server-side filters (e.g. Where().eq('status', 'completed'))
+    lower / upper: only scan keys >= lower and < upper
+    progress_every: print a progress line every N rows (0 = quiet)
+    source: function taking the select string and returning a fresh query
+            builder to page through, e.g. the rpc() of a set-returning
+            function (default: client.table(table).select)
+    """
+    select = select_columns(columns, key)
+    source = source or (lambda select: client.table(table).select(select))
+    last_key = None
+    fetched = 0
+
+    while True:
+        query = source(select)
+        if where:
+            query = where(query)
+        if last_key is not None:
+            query = query.gt(key, last_key)
+        elif lower is not None:
+            query = query.gte(key, lower)
+        if upper is not None:
+            query = query.lt(key, upper)
+
+        rows = query.order(key).limit(page_size).execute().data
+        if not rows:
+            return
+
+        for row in rows:
+            yield row
+        fetched += len(rows)
+        last_key = rows[-1][key]
+
+        if progress_every and fetched // progress_every != (fetched - len(rows)) // progress_every:
+            print(f"  Fetched {fetched} {table} rows...")
+        if len(rows) < page_size:
+            return
+
+
+def uuid_ranges(parts):
+    """Split the UUID key space into `parts` disjoint (lower, upper) ranges"""
+    bounds = [str(uuid.UUID(int=i * UUID_SPACE // parts)) for i in range(parts)]
+    return [(bounds[i], bounds[i + 1] if i + 1 < parts else None) for i in range(parts)]
+
+
+def scan_parallel(client, table, columns='*', key='id', page_size=PAGE_SIZE,
+                  where=None, workers=4, progress_every=0):
+    """
+    Yield rows of a UUID-keyed table, scanning `workers` disjoint key ranges
+    concurrently. Rows arrive in no particular order; the buffer between
+    the threads and the caller is bounded, so memory stays flat.
+    """
+    if workers <= 1:
+        yield from scan(client, table, columns, key, page_size, where,
+                        progress_every=progress_every)
+        return
+
+    rows_queue = queue.Queue(maxsize=workers * 2)
+    done = object()
+    stop = threading.Event()
+    errors = []
+
+    def worker(lower, upper):
+        try:
+            page = []
+            for row in scan(client, table, columns, key, page_size, where, lower, upper):
+                if stop.is_set():
+                    return
+                page.append(row)
+                if len(page) >= page_size:
+                    rows_queue.put(page)
+                    page = []
+            if page:
+                rows_queue.put(page)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            rows_queue.put(done)
+
+    threads = [threading.Thread(target=worker, args=bounds, daemon=True)
+               for bounds in uuid_ranges(workers)]
+    for t in threads:
+        t.start()
+
+    finished = 0
+    fetched = 0
+    try:
+        while finished < len(threads):
+            item = rows_queue.get()
+            if item is done:
+                finished += 1
+                continue
+            yield from item
+            fetched += len(item)
+            if progress_every and fetched // progress_every != (fetched - len(item)) // progress_every:
+                print(f"  Fetched {fetched} {table} rows...")
+    finally:
+        # Caller stopped early (or a worker failed): let the workers exit
+        stop.set()
+        while any(t.is_alive() for t in threads):
+            try:
+                rows_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+    if errors:
+        raise errors[0]
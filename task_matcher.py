@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Fuzzy matching of database task names to Master Data task names.
+
+Names are normalized (case, punctuation, whitespace, common abbreviations)
+and the master names are put in a token inverted index. A lookup only
+scores the master names that share tokens with the query, so matching
+every distinct DB task name costs roughly O(n x candidates) instead of
+comparing every pair of names.
+"""
+
+import re
+from collections import Counter
+from difflib import SequenceMatcher
+
+# Expanded before matching, on whole tokens
+ABBREVIATIONS = {
+    "&": "AND",
+    "ASSY": "ASSEMBLY",
+    "CHK": "CHECK",
+    "CHKS": "CHECKS",
+    "COMP": "COMPARTMENT",
+    "CPT": "COMPARTMENT",
+    "EQUIP": "EQUIPMENT",
+    "EQPT": "EQUIPMENT",
+    "INSP": "INSPECT",
+    "INSPN": "INSPECTION",
+    "L/H": "LH",
+    "R/H": "RH",
+    "REPL": "REPLACE",
+    "RMV": "REMOVE",
+    "INST": "INSTALL",
+    "U/F": "UNDERFRAME",
+    "UF": "UNDERFRAME",
+    "W/I": "WI",
+}
+
+# Too common to tell tasks apart
+STOPWORDS = {"AND", "THE", "OF", "TO", "A", "ON", "IN", "FOR", "WITH"}
+
+DEFAULT_THRESHOLD = 0.85
+MAX_CANDIDATES = 25
+
+_SPLIT = re.compile(r"[^A-Z0-9&/]+")
+_PUNCT = re.compile(r"[^A-Z0-9 ]+")
+
+
+def normalize_name(name):
+    """Upper-case, expand abbreviations, drop punctuation, collapse whitespace"""
+    tokens = []
+    for token in _SPLIT.split(str(name).upper()):
+        if not token:
+            continue
+        token = ABBREVIATIONS.get(token, token)
+        token = _PUNCT.sub(' ', token)
+        tokens.extend(token.split())
+    return ' '.join(tokens)
+
+
+def name_tokens(normalized):
+    return {t for t in normalized.split() if t not in STOPWORDS}
+
+
+def score_names(a, b, tokens_a, tokens_b):
+    """Average of character similarity and token overlap (0..1)"""
+    if a == b:
+        return 1.0
+    union = tokens_a | tokens_b
+    jaccard = len(tokens_a & tokens_b) / len(union) if union else 0.0
+    return (SequenceMatcher(None, a, b).ratio() + jaccard) / 2
+
+
+class TaskMatcher:
+    """Matches arbitrary task names against a fixed set of master names"""
+
+    def __init__(self, master_names, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self._entries = []  # (original name, normalized, tokens)
+        self._by_normalized = {}
+        self._index = {}
+
+        for name in master_names:
+            normalized = normalize_name(name)
+            tokens = name_tokens(normalized)
+            idx = len(self._entries)
+            self._entries.append((name, normalized, tokens))
+            self._by_normalized.setdefault(normalized, name)
+            for token in tokens:
+                self._index.setdefault(token, []).append(idx)
+
+    def candidates(self, tokens):
+        """Master entries sharing the most tokens with the query"""
+        shared = Counter()
+        for token in tokens:
+            shared.update(self._index.get(token, ()))
+        return [idx for idx, _ in shared.most_common(MAX_CANDIDATES)]
+
+    def best_match(self, name):
+        """(master name, score) for the best candidate, or (None, 0.0)"""
+        normalized = normalize_name(name)
+        if normalized in self._by_normalized:
+            return self._by_normalized[normalized], 1.0
+
+        tokens = name_tokens(normalized)
+        best_name, best_score = None, 0.0
+        for idx in self.candidates(tokens):
+            master_name, master_normalized, master_tokens = self._entries[idx]
+            score = score_names(normalized, master_normalized, tokens, master_tokens)
+            if score > best_score:
+                best_name, best_score = master_name, score
+        return best_name, best_score
+
+    def match(self, name):
+        """Master name if the best candidate clears the threshold, else None"""
+        master_name, score = self.best_match(name)
+        return master_name if score >= self.threshold else None
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Team membership: which team each person's initials belong to.
+
+The mapping lives in team_membership.json as a list of numbered versions,
+each a full snapshot of team -> initials. The last version is current.
+To move someone, append a new version and run reattribute_teams.py, which
+updates team_id only for completions signed by the initials that moved.
+
+Team names are the database team names ('Night Shift', not 'Team D');
+display_team() gives the name used in reports and the dashboard.
+"""
+
+import json
+import os
+
+MAPPING_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'team_membership.json')
+
+
+def load_versions(path=MAPPING_FILE):
+    """All mapping versions, oldest first"""
+    with open(path) as f:
+        return sorted(json.load(f)['versions'], key=lambda v: v['version'])
+
+
+def mapping_for(version, path=MAPPING_FILE):
+    """Initial -> team name for one version (None = current)"""
+    versions = load_versions(path)
+    if version is None:
+        chosen = versions[-1]
+    else:
+        matches = [v for v in versions if v['version'] == version]
+        if not matches:
+            raise KeyError(f"No team mapping version {version} in {path}")
+        chosen = matches[0]
+    return {initial.upper(): team for team, initials in chosen['teams'].items() for initial in initials}
+
+
+def display_team(team):
+    """Team name as shown in reports ('Night Shift' is Team D)"""
+    return 'Team D' if team == 'Night Shift' else team
+
+
+def team_for(initials, initial_to_team=None):
+    """Team of the first initial that belongs to a team, else None"""
+    initial_to_team = INITIAL_TO_TEAM if initial_to_team is None else initial_to_team
+    for initial in initials:
+        team = initial_to_team.get(initial.strip().upper())
+        if team:
+            return team
+    return None
+
+
+def diff_mappings(old, new):
+    """Initials whose team changed, was added or was removed: {initial: (old_team, new_team)}"""
+    return {initial: (old.get(initial), new.get(initial))
+            for initial in sorted(set(old) | set(new))
+            if old.get(initial) != new.get(initial)}
+
+
+CURRENT_VERSION = load_versions()[-1]['version']
+INITIAL_TO_TEAM = mapping_for(CURRENT_VERSION)
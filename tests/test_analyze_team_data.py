@@ -0,0 +1,69 @@
+"""Regression tests for the pandas report in analyze_team_data.py"""
+
+import os
+import sys
+from collections import defaultdict
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyze_team_data import categorical, day_categorical, team_frames  # noqa: E402
+
+
+def completions_frame(rows):
+    """A frame shaped like load_completions() output (Categorical columns)"""
+    completed_at = [r['completed_at'] for r in rows]
+    return pd.DataFrame({
+        'status': categorical([r['status'] for r in rows]),
+        'completed_by': categorical([tuple(r['completed_by']) for r in rows]),
+        'completed_at': completed_at,
+        'day': day_categorical(pd.Series(completed_at)),
+        'total_minutes': [float(r['total_minutes']) for r in rows],
+        'db_team': categorical([r['db_team'] for r in rows]),
+    })
+
+
+def expected_days(rows):
+    days = defaultdict(set)
+    for r in rows:
+        if r['status'] == 'completed' and r['completed_at']:
+            for initial in r['completed_by']:
+                days[initial].add(r['completed_at'][:10])
+    return {initial: len(d) for initial, d in days.items()}
+
+
+def test_person_days_with_small_category_codes():
+    # 20 days (int8 day codes) x 200 initials: the grid size overflows int8
+    rows = []
+    for i in range(3000):
+        rows.append({
+            'status': 'completed' if i % 4 else 'pending',
+            'completed_by': [f"I{i % 200:03d}", f"I{(i * 7) % 200:03d}"] if i % 9 else [],
+            'completed_at': f"2025-03-{i % 20 + 1:02d}T08:00:00+00:00" if i % 11 else None,
+            'total_minutes': 30,
+            'db_team': 'Team A' if i % 3 else None,
+        })
+
+    frames = team_frames(completions_frame(rows))
+
+    days = frames['initials']['days'].to_dict()
+    assert days == expected_days(rows)
+    assert (frames['initials']['days'] >= 0).all()
+
+
+def test_person_days_few_rows():
+    rows = [
+        {'status': 'completed', 'completed_by': ['AS'], 'completed_at': '2025-01-02T08:00:00+00:00',
+         'total_minutes': 60, 'db_team': 'Team A'},
+        {'status': 'completed', 'completed_by': ['AS', 'TFOS'], 'completed_at': '2025-01-02T09:00:00+00:00',
+         'total_minutes': 60, 'db_team': 'Team A'},
+        {'status': 'completed', 'completed_by': ['AS'], 'completed_at': '2025-01-03T08:00:00+00:00',
+         'total_minutes': 60, 'db_team': None},
+    ]
+
+    frames = team_frames(completions_frame(rows))
+
+    assert frames['initials'].loc['AS', 'days'] == 2
+    assert frames['initials'].loc['TFOS', 'days'] == 1
+    assert frames['tfos'].iloc[0]['in_team_a'] == 1
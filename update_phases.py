@@ -3,9 +3,13 @@
 Update existing task_completions with phase information from Master Data
 """
 
-from supabase import create_client
-import openpyxl
+from supabase_metrics import create_client
+import argparse
 import os
+from master_data import load_master_index, phases_by_task
+from batching import AdaptiveBatcher
+from table_scan import scan
+from job_journal import JobJournal
 
 # Supabase configuration
 SUPABASE_URL = "https://fsubmqjevlfpcirgsbhi.supabase.co"
@@ -21,23 +25,12 @@ def load_phase_mapping():
         return {}
 
     print(f"Loading phase mapping from {master_file}...")
-    wb = openpyxl.load_workbook(master_file, data_only=True)
-
-    if 'Master Data' not in wb.sheetnames:
+    try:
+        task_phases = phases_by_task(load_master_index(master_file))
+    except KeyError:
         print("Error: 'Master Data' sheet not found")
         return {}
 
-    sheet = wb['Master Data']
-    task_phases = {}
-
-    for row in sheet.iter_rows(min_row=2, max_col=2, values_only=True):
-        phase, task = row
-        if phase and task:
-            phase_str = str(phase).strip()
-            if phase_str.lower() in ['catch back', 'catchback']:
-                phase_str = 'Catchback'
-            task_phases[str(task).strip().upper()] = phase_str
-
     print(f"Loaded {len(task_phases)} task->phase mappings")
 
     # Print phase distribution
@@ -49,7 +42,7 @@ def load_phase_mapping():
     return task_phases
 
 
-def update_phases():
+def update_phases(restart=False):
     print("=" * 60)
     print("UPDATING TASK_COMPLETIONS WITH PHASES")
     print("=" * 60)
@@ -61,60 +54,63 @@ def update_phases():
 
     # Get all unique task names from task_completions
     print("\nFetching unique task names...")
-    all_tasks = []
-    offset = 0
-    batch_size = 1000
-
-    while True:
-        result = supabase.table('task_completions').select('id, task_name').range(offset, offset + batch_size - 1).execute()
-        if not result.data:
-            break
-        all_tasks.extend(result.data)
-        offset += batch_size
-        if offset % 10000 == 0:
-            print(f"  Fetched {len(all_tasks)} tasks...")
-
-    print(f"Total task_completions: {len(all_tasks)}")
-
-    # Group by task_name for efficiency
+    # Group IDs by task_name as rows stream in
     tasks_by_name = {}
-    for task in all_tasks:
+    total = 0
+    for task in scan(supabase, 'task_completions', 'id, task_name', progress_every=10000):
         name = task['task_name'].strip().upper()
         if name not in tasks_by_name:
             tasks_by_name[name] = []
         tasks_by_name[name].append(task['id'])
+        total += 1
 
+    print(f"Total task_completions: {total}")
     print(f"Unique task names: {len(tasks_by_name)}")
 
-    # Update phases in batches
+    # Update phases in batches, one task name per journal unit
     updated = 0
     matched = 0
-    unmatched_names = set()
-
-    for task_name, task_ids in tasks_by_name.items():
-        phase = task_phases.get(task_name)
-
-        if phase:
-            matched += len(task_ids)
-            # Update in batches of 100 IDs
-            for i in range(0, len(task_ids), 100):
-                batch_ids = task_ids[i:i+100]
-                try:
+    failed = 0
+    unmatched_names = {name[:50] for name in tasks_by_name if name not in task_phases}
+    batcher = AdaptiveBatcher.for_ids()
+
+    names = [name for name in tasks_by_name if name in task_phases]
+    journal = JobJournal('update_phases', total=len(names), unit_label='task names')
+    if restart:
+        journal.reset()
+
+    for task_name in journal.pending(names):
+        task_ids = tasks_by_name[task_name]
+        phase = task_phases[task_name]
+        matched += len(task_ids)
+        errors = 0
+        # Update in ID batches sized to fit the URL
+        for batch_ids in batcher.split(task_ids):
+            try:
+                with batcher.timed():
                     supabase.table('task_completions').update({'phase': phase}).in_('id', batch_ids).execute()
-                    updated += len(batch_ids)
-                except Exception as e:
-                    print(f"  Error updating batch: {e}")
+                updated += len(batch_ids)
+            except Exception as e:
+                print(f"  Error updating batch: {e}")
+                errors += 1
+
+        # Names with a failed batch are retried on the next run
+        if errors:
+            failed += 1
         else:
-            unmatched_names.add(task_name[:50])
-
-        if updated > 0 and updated % 5000 == 0:
-            print(f"  Progress: {updated} tasks updated...")
+            journal.record(task_name)
 
     print("\n" + "=" * 60)
     print("UPDATE COMPLETE")
     print(f"  Tasks matched with phases: {matched}")
     print(f"  Tasks updated: {updated}")
     print(f"  Unmatched task names: {len(unmatched_names)}")
+    print(f"  Update batches: {batcher.summary()}")
+    if failed:
+        journal.close()
+        print(f"  Task names with errors: {failed} - run again to retry them")
+    else:
+        print(f"  {journal.complete()}")
     print("=" * 60)
 
     if unmatched_names:
@@ -135,4 +131,7 @@ def update_phases():
 
 
 if __name__ == "__main__":
-    update_phases()
+    parser = argparse.ArgumentParser(description="Update task_completions phases from Master Data")
+    parser.add_argument('--restart', action='store_true', help="Ignore progress from an interrupted run")
+    args = parser.parse_args()
+    update_phases(restart=args.restart)
@@ -4,7 +4,7 @@ Script to upload Excel train data to Supabase
 """
 
 import pandas as pd
-from supabase import create_client
+from supabase_metrics import create_client
 import os
 
 # Supabase credentials
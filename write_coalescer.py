@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Client-side write coalescer for per-row updates.
+
+Scripts submit (id, column, value) changes; flush() groups them by
+(column, value) and sends one .update({column: value}).in_('id', [...])
+request per group, chunked so the ID list stays under URL limits. Ten
+thousand rows getting the same team_id become a handful of requests
+instead of ten thousand.
+"""
+
+import json
+
+from batching import AdaptiveBatcher
+
+
+class WriteCoalescer:
+    """Collects per-row column changes for one table and applies them in bulk"""
+
+    def __init__(self, client, table, id_column='id', batcher=None):
+        self.client = client
+        self.table = table
+        self.id_column = id_column
+        self.batcher = batcher or AdaptiveBatcher.for_ids()
+        self.requests = 0
+        self.rows_written = 0
+        self.errors = 0
+        self.failed_requests = 0
+        self._pending = {}
+
+    def set(self, row_id, column, value):
+        """Queue `column = value` for one row (a later set() for the same cell wins)"""
+        self._pending[(row_id, column)] = value
+
+    def __len__(self):
+        return len(self._pending)
+
+    def groups(self):
+        """(column, value, [ids]) for the queued changes"""
+        grouped = {}
+        for (row_id, column), value in self._pending.items():
+            # Values such as lists aren't hashable, so group on their JSON form
+            key = (column, json.dumps(value, sort_keys=True, default=str))
+            if key not in grouped:
+                grouped[key] = (column, value, [])
+            grouped[key][2].append(row_id)
+        return list(grouped.values())
+
+    def flush(self, progress_every=0, journal=None):
+        """
+        Send the queued changes. Failed chunks are counted in `errors` and
+        the rest carry on. With a JobJournal, cells written by an earlier
+        interrupted run are skipped and each written chunk is recorded.
+        Returns (rows_written, errors).
+        """
+        changes = self.groups()
+        self._pending = {}
+
+        if journal is not None:
+            changes = [(column, value, [i for i in ids if f"{column}:{i}" not in journal])
+                       for column, value, ids in changes]
+            if journal.total is None:
+                journal.total = journal.resumed + sum(len(ids) for _, _, ids in changes)
+
+        for column, value, ids in changes:
+            for chunk in self.batcher.split(ids):
+                try:
+                    with self.batcher.timed():
+                        self.client.table(self.table).update({column: value}).in_(self.id_column, chunk).execute()
+                    self.rows_written += len(chunk)
+                    if journal is not None:
+                        journal.record_many(f"{column}:{i}" for i in chunk)
+                except Exception as e:
+                    self.errors += len(chunk)
+                    self.failed_requests += 1
+                    if self.failed_requests <= 3:
+                        print(f"   Error updating {len(chunk)} {self.table} rows: {e}")
+                self.requests += 1
+                if progress_every and self.requests % progress_every == 0:
+                    print(f"   {self.requests} requests, {self.rows_written} rows updated...")
+
+        return self.rows_written, self.errors
+
+    def summary(self):
+        """Request count compared with one request per row"""
+        total = self.rows_written + self.errors
+        if not self.requests:
+            return "no writes sent"
+        return (f"{total} row updates in {self.requests} requests "
+                f"({total / self.requests:.0f}x fewer than one per row)")